@@ -3,30 +3,81 @@ Enhanced Personal Task Manager
 With categories, due dates, and priority levels
 """
 
-import json
+import argparse
+import asyncio
 import os
-from datetime import datetime, timedelta
+import sys
+import time
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+from task_agenda import UrgencyWeights
+from task_archive import COMPRESSORS, TaskArchive
+from task_cache import DEFAULT_MAX_BYTES
+from task_engine import TaskEngine
+from task_io import FORMATS, READERS, guess_format, write_tasks
+from task_metrics import METRICS
+from task_projects import DEFAULT_PROJECT, Projects, check_project_name
+from task_query import SORT_FIELDS, parse_filter
+from task_recurrence import Recurrence, next_due_date
+from task_reminders import (
+    DEFAULT_DUE_TIME, canonical_offsets, format_offset, parse_due_time, parse_offsets, parse_sink
+)
+from task_render import STATUS_MARKS, TaskRenderer, format_task_line, priority_icon, repeat_mark
+from task_server import serve
+from task_storage import STORES
+
+# How often the remind command checks for other processes' changes
+REMINDER_REFRESH_SECONDS = 30
 
 class AdvancedTaskManager:
-    def __init__(self, filename="tasks.json"):
+    """Console menu over a TaskEngine (all task logic lives in task_engine.py)"""
+    
+    def __init__(self, filename="tasks.json", store=None, page_size=None, lazy=True, background=True,
+                 compact=False, cache_bytes=DEFAULT_MAX_BYTES, urgency=None, projects=None, project=DEFAULT_PROJECT):
         self.filename = filename
-        self.tasks = self.load_tasks()
+        # List views pause after this many tasks (None shows everything)
+        self.page_size = page_size
+        # One line per task in every list view
+        self.compact = compact
+        # The project being worked on; Switch Project opens another one's file
+        self.projects = projects if projects is not None else Projects(filename, notify=print)
+        self.project = project
+        self.urgency = urgency
+        self._engine_options = {'lazy': lazy, 'background': background, 'cache_bytes': cache_bytes, 'notify': print}
+        self.engine = self._open_engine(store if store is not None else self.projects.open_store(project))
         self.categories = ["Work", "Personal", "Study", "Shopping", "Health", "Other"]
+        self.priorities = ["High", "Medium", "Low"]
     
-    def load_tasks(self):
-        """Load tasks from JSON file"""
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r') as file:
-                    return json.load(file)
-            except (json.JSONDecodeError, FileNotFoundError):
-                return []
-        return []
+    def _open_engine(self, store):
+        engine = TaskEngine(store, **self._engine_options)
+        if self.urgency is not None:
+            engine.urgency = self.urgency
+        return engine
     
     def save_tasks(self):
-        """Save tasks to JSON file"""
-        with open(self.filename, 'w') as file:
-            json.dump(self.tasks, file, indent=2)
+        """Write all tasks to the storage backend"""
+        self.engine.save()
+    
+    def close(self):
+        """Flush pending writes, record the project's totals and release the storage backend"""
+        self.projects.record(self.project, self.engine.stats())
+        stats = self.engine.close()
+        if stats.get('flushes_saved'):
+            print(f"💾 {stats['flushes']} writes for {stats['save_requests']} changes "
+                  f"({stats['flushes_saved']} flushes saved by batching)")
+    
+    def _more(self, shown):
+        """Ask whether to show the next page"""
+        return input(f"-- {shown} shown: Enter for more, q to stop -- ").strip().lower() != 'q'
+    
+    def _renderer(self):
+        """Buffered renderer for a list view, paged and compact as configured"""
+        return TaskRenderer(page_size=self.page_size, compact=self.compact, more=self._more)
+    
+    @staticmethod
+    def _banner(title):
+        return "\n" + "="*50 + f"\n{title}\n" + "="*50 + "\n"
     
     def display_menu(self):
         """Display the main menu"""
@@ -42,9 +93,33 @@ class AdvancedTaskManager:
         print("7. View Today's Tasks")
         print("8. Search Tasks")
         print("9. Task Statistics")
-        print("10. Exit")
+        print("10. View Overdue Tasks")
+        print("11. View Upcoming Tasks")
+        print("12. What Next? (most urgent tasks)")
+        print("13. Switch Project")
+        print("14. Exit")
         print("-"*50)
     
+    def view_all_tasks(self):
+        """Display all tasks"""
+        if not self.engine.count()[0]:
+            print("No tasks found!")
+            return
+        
+        def row(task, number):
+            completed = f"   Completed: {task['completed_date']}\n" if task['completed'] else ""
+            return (
+                f"\n{number}. [{STATUS_MARKS[task['completed']]}] {priority_icon(task['priority'])} {task['title']}\n"
+                f"   Description: {task['description']}\n"
+                f"   Category: {task['category']}\n"
+                f"   Priority: {task['priority']}\n"
+                f"   Due: {task['due_date']}\n"
+                f"   Created: {task['created_date']}\n"
+                f"{completed}" + "-" * 40 + "\n"
+            )
+        
+        self._renderer().render(self.engine.iter_tasks(), row, header=self._banner("ALL TASKS"))
+    
     def add_task(self):
         """Add a new task with enhanced details"""
         print("\n" + "="*50)
@@ -89,27 +164,29 @@ class AdvancedTaskManager:
         print("3. Next week")
         print("4. Custom date")
         print("5. No due date")
+        print("6. Repeating (daily, weekdays, weekly, monthly, every N days)")
         
+        recurrence = None
         try:
-            date_choice = int(input("Select due date option (1-5): "))
-            due_date = self.get_due_date(date_choice)
+            date_choice = int(input("Select due date option (1-6): "))
+            if date_choice == 6:
+                recurrence = input("Repeat (e.g. daily, weekdays, weekly, monthly, every 3 days): ").strip()
+                due_date = input("First due date (YYYY-MM-DD, Enter for today): ").strip() or self.get_due_date(1)
+            else:
+                due_date = self.get_due_date(date_choice)
         except ValueError:
             due_date = "No due date"
         
-        new_task = {
-            'id': len(self.tasks) + 1,
-            'title': title,
-            'description': description,
-            'category': category,
-            'priority': priority,
-            'due_date': due_date,
-            'completed': False,
-            'created_date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            'completed_date': None
-        }
-        
-        self.tasks.append(new_task)
-        self.save_tasks()
+        remind = None
+        if due_date != "No due date":
+            remind = input("Remind before due (e.g. 1d,2h or off; Enter for the default): ").strip() or None
+        
+        # Prompts above run while a background load finishes
+        try:
+            self.engine.add(title, description, category, priority, due_date, recurrence, remind)
+        except ValueError as e:
+            print(f"{e}!")
+            return
         print(f"✅ Task '{title}' added successfully!")
     
     def get_due_date(self, choice):
@@ -128,128 +205,235 @@ class AdvancedTaskManager:
         else:
             return "No due date"
     
+    def mark_completed(self):
+        """Mark a task as completed"""
+        self.engine.ensure_loaded()
+        pending_tasks = list(self.engine.iter_pending())
+        
+        if not pending_tasks:
+            print("No pending tasks available! 🎉")
+            return
+        
+        TaskRenderer().render(
+            pending_tasks,
+            lambda task, number: f"{number}. {priority_icon(task['priority'])} {task['title']} ({task['category']})\n",
+            header="\nPENDING TASKS:\n"
+        )
+        
+        try:
+            num = int(input("\nEnter task number to mark as completed: "))
+            if 1 <= num <= len(pending_tasks):
+                task = self.engine.complete(pending_tasks[num - 1]['id'])
+                print(f"✅ Task '{task['title']}' marked as completed!")
+                if task.get('recurrence'):
+                    print(f"🔁 Next occurrence due {next_due_date(task)}")
+            else:
+                print("Invalid task number!")
+        except ValueError:
+            print("Please enter a valid number!")
+    
+    def delete_task(self):
+        """Delete a task"""
+        self.engine.ensure_loaded()
+        all_tasks = list(self.engine.iter_tasks())
+        if not all_tasks:
+            print("No tasks available!")
+            return
+        
+        TaskRenderer().render(
+            all_tasks,
+            lambda task, number: (f"{number}. [{STATUS_MARKS[task['completed']]}] {priority_icon(task['priority'])} "
+                                  f"{task['title']} ({task['category']})\n"),
+            header="\nALL TASKS:\n"
+        )
+        
+        try:
+            num = int(input("\nEnter task number to delete: "))
+            if 1 <= num <= len(all_tasks):
+                removed = self.engine.delete(all_tasks[num - 1]['id'])
+                print(f"🗑️  Task '{removed['title']}' deleted!")
+            else:
+                print("Invalid task number!")
+        except ValueError:
+            print("Please enter a valid number!")
+    
     def view_tasks_by_category(self):
         """View tasks grouped by category"""
-        if not self.tasks:
+        if not self.engine.count()[0]:
             print("No tasks found!")
             return
         
-        tasks_by_category = {}
-        for task in self.tasks:
-            category = task['category']
-            if category not in tasks_by_category:
-                tasks_by_category[category] = []
-            tasks_by_category[category].append(task)
-        
-        print("\n" + "="*50)
-        print("TASKS BY CATEGORY")
-        print("="*50)
-        
-        for category, tasks in tasks_by_category.items():
-            print(f"\n📁 {category.upper()}:")
-            print("-" * 30)
-            for task in tasks:
-                status = "✓" if task['completed'] else "✗"
-                priority_icon = "🔴" if task['priority'] == "High" else "🟡" if task['priority'] == "Medium" else "🟢"
-                print(f"   [{status}] {priority_icon} {task['title']} (Due: {task['due_date']})")
+        self._renderer().render(
+            self.engine.iter_by_category(),
+            lambda task, number: (f"   [{STATUS_MARKS[task['completed']]}] {priority_icon(task['priority'])} "
+                                  f"{task['title']} (Due: {task['due_date']})\n"),
+            header=self._banner("TASKS BY CATEGORY"),
+            group=lambda task: task['category'],
+            heading=lambda category: f"\n📁 {category.upper()}:\n" + "-" * 30 + "\n"
+        )
     
     def view_tasks_by_priority(self):
         """View tasks grouped by priority"""
-        if not self.tasks:
+        if not self.engine.count()[0]:
             print("No tasks found!")
             return
         
-        priority_order = {"High": 1, "Medium": 2, "Low": 3}
-        sorted_tasks = sorted(self.tasks, key=lambda x: priority_order[x['priority']])
-        
-        print("\n" + "="*50)
-        print("TASKS BY PRIORITY")
-        print("="*50)
-        
-        current_priority = None
-        for task in sorted_tasks:
-            if task['priority'] != current_priority:
-                current_priority = task['priority']
-                priority_icon = "🔴" if current_priority == "High" else "🟡" if current_priority == "Medium" else "🟢"
-                print(f"\n{priority_icon} {current_priority.upper()} PRIORITY:")
-                print("-" * 30)
-            
-            status = "✓" if task['completed'] else "✗"
-            print(f"   [{status}] {task['title']} - {task['category']} (Due: {task['due_date']})")
+        self._renderer().render(
+            self.engine.iter_by_priority(),
+            lambda task, number: (f"   [{STATUS_MARKS[task['completed']]}] {task['title']} - {task['category']} "
+                                  f"(Due: {task['due_date']})\n"),
+            header=self._banner("TASKS BY PRIORITY"),
+            group=lambda task: task['priority'],
+            heading=lambda priority: f"\n{priority_icon(priority)} {priority.upper()} PRIORITY:\n" + "-" * 30 + "\n"
+        )
     
     def view_todays_tasks(self):
         """View tasks due today"""
-        today = datetime.now().strftime("%Y-%m-%d")
-        todays_tasks = [task for task in self.tasks if task['due_date'] == today]
-        
-        if not todays_tasks:
+        today = date.today()
+        shown = self._renderer().render(
+            self.engine.iter_due_between(today, today),
+            lambda task, number: (
+                f"{priority_icon(task['priority'])} [{STATUS_MARKS[task['completed']]}] {task['title']}{repeat_mark(task)}\n"
+                f"   Category: {task['category']}\n"
+                f"   Description: {task['description']}\n" + "-" * 40 + "\n"
+            ),
+            header=self._banner("TODAY'S TASKS")
+        )
+        if not shown:
             print("No tasks due today! 🎉")
+    
+    def view_overdue_tasks(self):
+        """View pending tasks whose due date has passed"""
+        today = date.today()
+        
+        def row(task, number):
+            days_late = (today - date.fromisoformat(task['due_date'])).days
+            return (
+                f"{priority_icon(task['priority'])} {task['title']} ({days_late} day{'s' if days_late != 1 else ''} late)\n"
+                f"   Category: {task['category']} | Due: {task['due_date']}\n" + "-" * 40 + "\n"
+            )
+        
+        shown = self._renderer().render(self.engine.iter_overdue(today), row, header=self._banner("OVERDUE TASKS"))
+        if not shown:
+            print("No overdue tasks! 🎉")
+    
+    def view_upcoming_tasks(self):
+        """View tasks due within a date range"""
+        today = date.today()
+        answer = input("Show tasks due up to (YYYY-MM-DD or number of days, default 7): ").strip()
+        try:
+            if not answer:
+                end = today + timedelta(days=7)
+            elif answer.isdigit():
+                end = today + timedelta(days=int(answer))
+            else:
+                end = date.fromisoformat(answer)
+        except ValueError:
+            print("Invalid date format!")
             return
         
-        print("\n" + "="*50)
-        print("TODAY'S TASKS")
-        print("="*50)
-        
-        for task in todays_tasks:
-            status = "✓" if task['completed'] else "✗"
-            priority_icon = "🔴" if task['priority'] == "High" else "🟡" if task['priority'] == "Medium" else "🟢"
-            print(f"{priority_icon} [{status}] {task['title']}")
-            print(f"   Category: {task['category']}")
-            print(f"   Description: {task['description']}")
-            print("-" * 40)
+        shown = self._renderer().render(
+            self.engine.iter_due_between(today, end),
+            lambda task, number: (f"{priority_icon(task['priority'])} [{STATUS_MARKS[task['completed']]}] "
+                                  f"{task['due_date']}  {task['title']} ({task['category']}){repeat_mark(task)}\n"),
+            header=self._banner(f"TASKS DUE {today} TO {end}")
+        )
+        if not shown:
+            print(f"No tasks due between {today} and {end}! 🎉")
+    
+    def view_agenda(self):
+        """Show the most urgent pending tasks first, by priority, due date and age"""
+        answer = input("How many tasks (default 10): ").strip()
+        if answer and not answer.isdigit():
+            print("Please enter a number!")
+            return
+        ranked = self.engine.agenda(int(answer or 10))
+        urgency = {task['id']: score for task, score in ranked}
+        
+        def row(task, number):
+            return (
+                f"{number}. {priority_icon(task['priority'])} {task['title']}{repeat_mark(task)}\n"
+                f"   Urgency: {urgency[task['id']]:.1f} | Category: {task['category']} | Due: {task['due_date']}\n"
+                + "-" * 40 + "\n"
+            )
+        
+        shown = self._renderer().render((task for task, _ in ranked), row, header=self._banner("WHAT NEXT"))
+        if not shown:
+            print("Nothing pending! 🎉")
+    
+    def switch_project(self):
+        """Close this project and open another one (a new name starts an empty project)"""
+        manifest = self.projects.read_manifest()
+        print("\nProjects:")
+        for name in self.projects.names(self.project):
+            if name == self.project:
+                total_tasks, completed_tasks = self.engine.count()
+            else:
+                counts = manifest.get(name, {'total': 0, 'completed': 0})
+                total_tasks, completed_tasks = counts['total'], counts['completed']
+            marker = "*" if name == self.project else " "
+            print(f" {marker} {name}: {total_tasks} tasks ({completed_tasks} completed)")
+        
+        name = input("Open project (name, Enter to stay): ").strip()
+        if not name or name == self.project:
+            return
+        try:
+            store = self.projects.open_store(check_project_name(name))
+        except ValueError as e:
+            print(f"{e}!")
+            return
+        reminders = self.engine.reminders
+        self.close()
+        self.project = name
+        self.engine = self._open_engine(store)
+        if reminders is not None:
+            self.engine.start_reminders(reminders.sinks, reminders.default_offsets, reminders.due_time)
+        print(f"📁 Switched to project '{name}'")
     
     def search_tasks(self):
         """Search tasks by keyword"""
-        if not self.tasks:
+        if not self.engine.count()[0]:
             print("No tasks available to search!")
             return
         
-        keyword = input("Enter search keyword: ").lower().strip()
+        print("Words must all match; use OR for alternatives (e.g. 'report OR slides').")
+        print("Filters: category:Work priority:High due<=+7d !completed sort:due limit:10")
+        keyword = input("Enter search keyword: ").strip()
         if not keyword:
             print("Please enter a keyword to search!")
             return
-        
-        matching_tasks = [
-            task for task in self.tasks 
-            if keyword in task['title'].lower() or keyword in task['description'].lower()
-        ]
-        
-        if not matching_tasks:
-            print(f"No tasks found containing '{keyword}'")
+        try:
+            task_filter = parse_filter(keyword)
+        except ValueError as e:
+            print(f"{e}!")
             return
         
-        print(f"\nSearch results for '{keyword}':")
-        print("="*50)
-        
-        for task in matching_tasks:
-            status = "✓" if task['completed'] else "✗"
-            priority_icon = "🔴" if task['priority'] == "High" else "🟡" if task['priority'] == "Medium" else "🟢"
-            print(f"{priority_icon} [{status}] {task['title']}")
-            print(f"   {task['description']}")
-            print(f"   Category: {task['category']} | Due: {task['due_date']}")
-            print("-" * 40)
+        shown = self._renderer().render(
+            self.engine.find(task_filter),
+            lambda task, number: (
+                f"{priority_icon(task['priority'])} [{STATUS_MARKS[task['completed']]}] {task['title']}\n"
+                f"   {task['description']}\n"
+                f"   Category: {task['category']} | Due: {task['due_date']}\n" + "-" * 40 + "\n"
+            ),
+            header=f"\nSearch results for '{keyword}':\n" + "="*50 + "\n"
+        )
+        
+        if not shown:
+            print(f"No tasks found containing '{keyword}'")
     
     def show_statistics(self):
         """Show detailed statistics"""
-        if not self.tasks:
+        # Lifetime totals: the working set plus the archive's saved counts
+        archived = self.engine.archive.read_stats()
+        stats = self.engine.stats().merged(archived)
+        total_tasks, completed_tasks = stats.total, stats.completed
+        if not total_tasks:
             print("No tasks available for statistics!")
             return
         
-        total_tasks = len(self.tasks)
-        completed_tasks = len([task for task in self.tasks if task['completed']])
         pending_tasks = total_tasks - completed_tasks
-        
-        # Category statistics
-        category_stats = {}
-        for task in self.tasks:
-            cat = task['category']
-            category_stats[cat] = category_stats.get(cat, 0) + 1
-        
-        # Priority statistics
-        priority_stats = {}
-        for task in self.tasks:
-            pri = task['priority']
-            priority_stats[pri] = priority_stats.get(pri, 0) + 1
+        category_stats = stats.by_category
+        priority_stats = stats.by_priority
         
         print("\n" + "="*50)
         print("TASK STATISTICS")
@@ -261,6 +445,9 @@ class AdvancedTaskManager:
         if total_tasks > 0:
             completion_rate = (completed_tasks / total_tasks) * 100
             print(f"📈 Completion Rate: {completion_rate:.1f}%")
+        if archived.total:
+            print(f"🗄️  Archived: {archived.total} "
+                  f"({os.path.basename(self.engine.archive.filename)}, {self.engine.archive.size() // 1024} KB)")
         
         print("\n📁 By Category:")
         for category, count in category_stats.items():
@@ -268,8 +455,15 @@ class AdvancedTaskManager:
         
         print("\n🎯 By Priority:")
         for priority, count in priority_stats.items():
-            icon = "🔴" if priority == "High" else "🟡" if priority == "Medium" else "🟢"
-            print(f"   {icon} {priority}: {count} tasks")
+            print(f"   {priority_icon(priority)} {priority}: {count} tasks")
+        
+        if self.engine.cache is not None and self.engine.cache.hits + self.engine.cache.misses:
+            cache = self.engine.cache.stats()
+            print(f"\n⚡ Result cache: {cache['hits']} hits, {cache['misses']} misses "
+                  f"({cache['entries']} views, {cache['bytes'] // 1024} KB)")
+        if self.engine.reminders is not None:
+            reminders = self.engine.reminders.stats()
+            print(f"⏰ Reminders: {reminders['scheduled']} scheduled, {reminders['sent']} sent")
     
     def run(self):
         """Main application loop"""
@@ -278,13 +472,17 @@ class AdvancedTaskManager:
         while True:
             self.display_menu()
             
-            # Show quick overview
-            total_tasks = len(self.tasks)
-            completed_tasks = len([task for task in self.tasks if task['completed']])
+            # Show quick overview; other projects' totals come from the manifest
+            total_tasks, completed_tasks = self.engine.count()
             print(f"📊 Overview: {total_tasks} tasks ({completed_tasks} completed)")
+            others = {name: counts for name, counts in self.projects.read_manifest().items() if name != self.project}
+            if others:
+                print(f"📁 Project: {self.project} | " + " | ".join(
+                    f"{name}: {counts['total']} ({counts['completed']} completed)" for name, counts in sorted(others.items())
+                ))
             
             try:
-                choice = input("\nEnter your choice (1-10): ").strip()
+                choice = input("\nEnter your choice (1-14): ").strip()
                 
                 actions = {
                     '1': self.view_all_tasks,
@@ -296,39 +494,407 @@ class AdvancedTaskManager:
                     '7': self.view_todays_tasks,
                     '8': self.search_tasks,
                     '9': self.show_statistics,
-                    '10': lambda: None  # Exit handled below
+                    '10': self.view_overdue_tasks,
+                    '11': self.view_upcoming_tasks,
+                    '12': self.view_agenda,
+                    '13': self.switch_project,
+                    '14': lambda: None  # Exit handled below
                 }
                 
-                if choice == '10':
+                if choice == '14':
+                    self.close()
                     print("\nThank you for using Enhanced Task Manager! 👋")
                     print("Your tasks have been saved automatically.")
                     break
                 elif choice in actions:
-                    actions[choice]()
+                    with METRICS.capture(actions[choice].__name__):
+                        actions[choice]()
                 else:
-                    print("Invalid choice! Please enter a number between 1-10.")
+                    print("Invalid choice! Please enter a number between 1-14.")
                 
                 input("\nPress Enter to continue...")
                 
             except KeyboardInterrupt:
                 print("\n\nProgram interrupted. Saving tasks...")
                 self.save_tasks()
+                self.close()
                 break
             except Exception as e:
                 print(f"An error occurred: {e}")
 
-# Include the basic methods from previous version (view_all_tasks, mark_completed, delete_task, etc.)
-# These would be copied from the basic task manager
+def parse_due_date(text):
+    """Parse a command-line due date: YYYY-MM-DD, today, tomorrow or +N days"""
+    today = date.today()
+    if text == "today":
+        return today.isoformat()
+    if text == "tomorrow":
+        return (today + timedelta(days=1)).isoformat()
+    if text.startswith("+") and text[1:].isdigit():
+        return (today + timedelta(days=int(text[1:]))).isoformat()
+    try:
+        return date.fromisoformat(text).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid due date '{text}'")
+
+def parse_repeat(text):
+    """argparse type for --repeat: a task_recurrence rule"""
+    try:
+        return str(Recurrence.parse(text))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def parse_urgency(text):
+    """argparse type for --urgency: task_agenda weights"""
+    try:
+        return UrgencyWeights.parse(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def checked(parse):
+    """argparse type that reports parse's ValueError as a usage error"""
+    def argument_type(text):
+        try:
+            return parse(text)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(str(e))
+    argument_type.__name__ = parse.__name__
+    return argument_type
+
+def build_parser():
+    """Command-line interface; without a command the interactive menu runs"""
+    parser = argparse.ArgumentParser(description="Enhanced Task Manager")
+    parser.add_argument("--store", choices=sorted(STORES), default=os.environ.get("TASK_STORE", "json"),
+                        help="storage backend (default: $TASK_STORE or json)")
+    parser.add_argument("--file", default="tasks.json", help="task file (default: tasks.json)")
+    parser.add_argument("--project", type=checked(check_project_name),
+                        default=os.environ.get("TASK_PROJECT", DEFAULT_PROJECT),
+                        help="project to work on; each has its own file next to --file "
+                             "(default: $TASK_PROJECT or the --file itself)")
+    parser.add_argument("--compact", action="store_true", help="one line per task in the menu's list views")
+    parser.add_argument("--page-size", type=int, default=int(os.environ.get("TASK_PAGE_SIZE", "0")),
+                        help="pause list views after this many tasks (default: $TASK_PAGE_SIZE, 0 = never)")
+    parser.add_argument("--cache-mb", type=float,
+                        default=float(os.environ.get("TASK_CACHE_MB", DEFAULT_MAX_BYTES / (1 << 20))),
+                        help="memory for cached views and searches (default: $TASK_CACHE_MB or 32, 0 = off)")
+    parser.add_argument("--archive-after", type=int, metavar="DAYS",
+                        default=int(os.environ.get("TASK_ARCHIVE_DAYS", "0")),
+                        help="on start, archive tasks completed more than DAYS ago (default: $TASK_ARCHIVE_DAYS, 0 = never)")
+    parser.add_argument("--urgency", type=parse_urgency, metavar="WEIGHTS",
+                        default=os.environ.get("TASK_URGENCY", ""),
+                        help="agenda weights, e.g. 'high=10,medium=5,low=1,due=1,horizon=14,overdue=14,age=0.05' "
+                             "(default: $TASK_URGENCY or those values)")
+    parser.add_argument("--remind-before", type=checked(parse_offsets), metavar="OFFSETS",
+                        default=os.environ.get("TASK_REMIND_BEFORE", ""),
+                        help="reminders for tasks without their own, e.g. '1d,1h' "
+                             "(default: $TASK_REMIND_BEFORE, empty = none)")
+    parser.add_argument("--remind-sink", type=checked(parse_sink), action="append", metavar="SINK",
+                        help="where reminders go: stdout, log:PATH or command:CMD (repeatable; "
+                             "default: $TASK_REMIND_SINK or stdout)")
+    parser.add_argument("--due-time", type=checked(parse_due_time), metavar="HH:MM",
+                        default=os.environ.get("TASK_DUE_TIME", DEFAULT_DUE_TIME),
+                        help="time of day a due date falls due, for reminders (default: $TASK_DUE_TIME or 09:00)")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="collect timers and counters and write them to FILE on exit ('-' for stderr)")
+    parser.add_argument("--metrics-format", choices=["text", "prometheus"], default="text")
+    parser.add_argument("--profile", metavar="DIR", help="save a cProfile file per menu action or command in DIR")
+    parser.add_argument("--trace-memory", action="store_true", help="record peak memory per menu action or command")
+    commands = parser.add_subparsers(dest="command")
+    
+    add = commands.add_parser("add", help="add a task")
+    add.add_argument("title")
+    add.add_argument("-d", "--description", default="")
+    add.add_argument("-c", "--category", default="Other")
+    add.add_argument("-p", "--priority", choices=["High", "Medium", "Low"], default="Medium")
+    add.add_argument("--due", type=parse_due_date,
+                     help="YYYY-MM-DD, today, tomorrow or +N days")
+    add.add_argument("--repeat", type=parse_repeat, metavar="RULE",
+                     help="daily, weekdays, weekly, monthly or 'every N days|weeks|months' (starts today without --due)")
+    add.add_argument("--reminder", dest="remind", type=checked(canonical_offsets), metavar="OFFSETS",
+                     help="reminders before the due time, e.g. '1d,2h' ('off' for none; needs --due)")
+    
+    for name, verb in (("complete", "mark tasks completed"), ("delete", "delete tasks")):
+        command = commands.add_parser(name, help=verb)
+        command.add_argument("ids", type=int, nargs="+", metavar="ID")
+    
+    listing = commands.add_parser("list", help="list tasks")
+    status = listing.add_mutually_exclusive_group()
+    status.add_argument("--pending", action="store_true")
+    status.add_argument("--completed", action="store_true")
+    listing.add_argument("-c", "--category")
+    listing.add_argument("-p", "--priority", choices=["High", "Medium", "Low"])
+    due = listing.add_mutually_exclusive_group()
+    due.add_argument("--overdue", action="store_true", help="pending tasks due before today")
+    due.add_argument("--due-within", type=int, metavar="DAYS", help="tasks due from today to today+DAYS")
+    listing.add_argument("--sort", choices=SORT_FIELDS, help="sort field")
+    listing.add_argument("--desc", action="store_true", help="sort descending (with --sort)")
+    
+    search = commands.add_parser("search", help="search titles and descriptions")
+    search.add_argument("query", nargs="+")
+    search.add_argument("--all-projects", action="store_true",
+                        help="search every project in parallel (-n limits each project)")
+    
+    finder = commands.add_parser("query", help="filter with the query language, e.g. 'category:Work due<=+7d !completed deploy'")
+    finder.add_argument("filter", nargs="+")
+    finder.add_argument("--explain", action="store_true", help="show which index would be read instead of the tasks")
+    
+    archiving = commands.add_parser("archive", help="move old completed tasks to the compressed archive, or list it")
+    archiving.add_argument("--older-than", type=int, default=30, metavar="DAYS",
+                           help="archive tasks completed more than DAYS days ago (default: 30)")
+    archiving.add_argument("--compression", choices=sorted(COMPRESSORS), default="gzip",
+                           help="format of a new archive (an existing one keeps its format)")
+    archiving.add_argument("--list", action="store_true", help="print the archived tasks instead")
+    archiving.add_argument("--search", nargs="+", metavar="WORD", help="print archived tasks matching a search")
+    
+    for command in (listing, search, finder, archiving):
+        command.add_argument("-f", "--format", choices=FORMATS, default="text")
+        command.add_argument("-n", "--limit", type=int)
+        command.add_argument("--offset", type=int, default=0, help="skip this many matches first")
+    
+    commands.add_parser("projects", help="list the projects and their totals (without opening them)")
+    
+    agenda = commands.add_parser("agenda", help="the most urgent pending tasks (see --urgency)")
+    agenda.add_argument("-n", "--limit", type=int, default=10)
+    
+    reminding = commands.add_parser("remind", help="deliver reminders until interrupted, or list the next ones")
+    reminding.add_argument("--list", action="store_true", help="print the upcoming reminders instead")
+    reminding.add_argument("-n", "--limit", type=int, default=20)
+    
+    importing = commands.add_parser("import", help="bulk-add tasks from a CSV or NDJSON file ('-' for stdin)")
+    importing.add_argument("path")
+    importing.add_argument("-f", "--format", choices=sorted(READERS))
+    
+    export = commands.add_parser("export", help="write every task to a file (default: stdout)")
+    export.add_argument("path", nargs="?", default="-")
+    export.add_argument("-f", "--format", choices=[name for name in FORMATS if name != "text"])
+    
+    server = commands.add_parser("serve", help="share the task list over a local HTTP/JSON API")
+    server.add_argument("--host", default="127.0.0.1")
+    server.add_argument("--port", type=int, default=8765, help="0 picks a free port")
+    return parser
+
+def open_output(path, fmt):
+    """Open an export target; '-' is stdout"""
+    if path == "-":
+        return sys.stdout
+    return open(path, "w", encoding="utf-8", newline="" if fmt == "csv" else None)
+
+def start_reminders(engine, args, run=True):
+    """Start the engine's reminder scheduler with the command-line settings"""
+    sinks = args.remind_sink or [parse_sink(os.environ.get("TASK_REMIND_SINK", "stdout"))]
+    return engine.start_reminders(sinks, args.remind_before, args.due_time, run=run)
 
-def main():
+def archive_old_tasks(engine, days):
+    """Move tasks completed more than days ago to the archive and report it"""
+    archived = engine.archive_completed(days)
+    if archived:
+        print(f"🗄️  Archived {archived} tasks completed more than {days} days ago to {engine.archive.filename}")
+    return archived
+
+def run_projects_command(projects, args):
+    """Run a command that works on every project without opening the current one; None if it is not one"""
+    if args.command == "projects":
+        manifest = projects.read_manifest()
+        for name in projects.names(args.project):
+            counts = manifest.get(name, {'total': 0, 'completed': 0})
+            marker = "*" if name == args.project else " "
+            print(f"{marker} {name:<20} {counts['total']:>8} tasks {counts['completed']:>8} completed  "
+                  f"{projects.store_filename(name)}")
+        return 0
+    
+    if args.command == "search" and args.all_projects:
+        found = projects.search(" ".join(args.query), args.limit)
+        if args.format == "text":
+            for name, task in found:
+                print(f"[{name}] {format_task_line(task)}")
+        else:
+            write_tasks((dict(task.to_dict(), project=name) for name, task in found), sys.stdout, args.format)
+        return 0
+    return None
+
+def run_command(engine, args):
+    """Run one command-line command on a TaskEngine and return the exit status"""
+    if args.command == "add":
+        task = engine.add(args.title, args.description, args.category, args.priority, args.due, args.repeat,
+                          args.remind)
+        print(f"✅ Added task {task['id']}: {task['title']}{repeat_mark(task)}")
+        return 0
+    
+    if args.command in ("complete", "delete"):
+        status = 0
+        for task_id in args.ids:
+            if args.command == "complete":
+                task = engine.complete(task_id)
+                message = f"✅ Completed task {task_id}: " if task else f"No pending task with id {task_id}"
+                if task is not None and task.get('recurrence'):
+                    message = f"🔁 Completed task {task_id} (next due {next_due_date(task)}): "
+            else:
+                task = engine.delete(task_id)
+                message = f"🗑️  Deleted task {task_id}: " if task else f"No task with id {task_id}"
+            if task is None:
+                print(message, file=sys.stderr)
+                status = 1
+            else:
+                print(message + task['title'])
+        return status
+    
+    if args.command == "search":
+        tasks = engine.query(text=" ".join(args.query), limit=args.limit, offset=args.offset)
+        write_tasks(tasks, sys.stdout, args.format)
+        return 0
+    
+    if args.command == "list":
+        today = date.today()
+        due_from = due_to = None
+        if args.overdue:
+            due_to = today - timedelta(days=1)
+        elif args.due_within is not None:
+            due_from, due_to = today, today + timedelta(days=args.due_within)
+        # Overdue means due in the past and still pending
+        completed = False if args.pending or args.overdue else True if args.completed else None
+        if args.desc and not args.sort:
+            print("--desc needs --sort", file=sys.stderr)
+            return 1
+        tasks = engine.query(
+            completed=completed, category=args.category, priority=args.priority,
+            due_from=due_from, due_to=due_to, limit=args.limit, offset=args.offset,
+            sort=f"-{args.sort}" if args.desc else args.sort
+        )
+        write_tasks(tasks, sys.stdout, args.format)
+        return 0
+    
+    if args.command == "query":
+        task_filter = parse_filter(" ".join(args.filter))
+        if args.limit is not None:
+            task_filter.limit = args.limit
+        if args.offset:
+            task_filter.offset = args.offset
+        if args.explain:
+            plan = engine.explain(task_filter)
+            candidates = ", ".join(f"{source} ~{count}" for source, count in plan['candidates'].items())
+            print(f"📋 Read {plan['source']} (~{plan['estimated_tasks']} tasks; candidates: {candidates}); "
+                  f"ordering: {plan['sort']}")
+            return 0
+        write_tasks(engine.find(task_filter), sys.stdout, args.format)
+        return 0
+    
+    if args.command == "agenda":
+        for task, score in engine.agenda(args.limit):
+            print(f"{score:6.1f}  {format_task_line(task)}")
+        return 0
+    
+    if args.command == "remind":
+        scheduled = start_reminders(engine, args, run=not args.list)
+        if args.list:
+            for at, task, offset in engine.reminders.upcoming(args.limit):
+                when = "at due time" if not offset else f"{format_offset(offset)} before"
+                print(f"{datetime.fromtimestamp(at):%Y-%m-%d %H:%M}  ({when})  {format_task_line(task)}")
+            return 0
+        print(f"⏰ Watching {scheduled} reminders (Ctrl+C to stop)")
+        while True:
+            # Picks up tasks other processes add, complete or delete
+            time.sleep(REMINDER_REFRESH_SECONDS)
+            engine.refresh()
+    
+    if args.command == "import":
+        fmt = args.format or guess_format(args.path, "ndjson")
+        if fmt not in READERS:
+            print(f"Cannot import {fmt} files; use csv or ndjson", file=sys.stderr)
+            return 1
+        source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8", newline="")
+        with source:
+            imported = engine.import_tasks(READERS[fmt](source))
+        print(f"📥 Imported {imported} tasks")
+        return 0
+    
+    if args.command == "export":
+        fmt = args.format or guess_format(args.path if args.path != "-" else None, "ndjson")
+        output = open_output(args.path, fmt)
+        try:
+            exported = write_tasks(engine.iter_tasks(), output, fmt)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        if output is not sys.stdout:
+            print(f"📤 Exported {exported} tasks to {args.path}")
+        return 0
+    
+    if args.command == "archive":
+        if args.list or args.search:
+            tasks = engine.iter_archived(" ".join(args.search or ()))
+            if args.offset or args.limit is not None:
+                tasks = islice(tasks, args.offset, None if args.limit is None else args.offset + args.limit)
+            write_tasks(tasks, sys.stdout, args.format)
+        elif not archive_old_tasks(engine, args.older_than):
+            print(f"Nothing completed more than {args.older_than} days ago")
+        return 0
+    
+    if args.command == "serve":
+        if args.archive_after:
+            archive_old_tasks(engine, args.archive_after)
+        start_reminders(engine, args)
+        asyncio.run(serve(engine, args.host, args.port))
+        return 0
+    return 2
+
+def main(argv=None):
     """Main function to start the application"""
+    args = build_parser().parse_args(argv)
+    if args.metrics or args.profile or args.trace_memory:
+        METRICS.enable(profile_dir=args.profile, trace_memory=args.trace_memory)
     try:
-        task_manager = AdvancedTaskManager()
+        # --store / TASK_STORE selects the backend: "json" (default), "ndjson", "journal" or "sqlite"
+        backend = args.store
+        # Notices from the stores (conversions, quarantined files) go to the console
+        options = {'notify': print}
+        if backend in ("json", "ndjson") and os.environ.get("TASK_BATCH_WINDOW"):
+            options['batch_window'] = float(os.environ["TASK_BATCH_WINDOW"])
+        elif backend in ("json", "ndjson") and args.command == "serve":
+            # Coalesce rewrites so a burst of requests is not one file write each
+            options['batch_window'] = 0.05
+        if backend in ("json", "ndjson") and os.environ.get("TASK_SNAPSHOT") == "0":
+            options['snapshot'] = False
+        projects = Projects(args.file, backend, **options)
+        status = run_projects_command(projects, args)
+        if status is not None:
+            return status
+        store = projects.open_store(args.project)
+        cache_bytes = int(args.cache_mb * (1 << 20))
+        if args.command:
+            # One-shot commands read streaming stores without loading them
+            # unless the command changes something, and run each view once,
+            # so only the server keeps a result cache
+            archive = TaskArchive(store.filename, args.compression) if args.command == "archive" else None
+            engine = TaskEngine(store, lazy=args.command != "serve", background=False, notify=print,
+                                cache_bytes=cache_bytes if args.command == "serve" else 0, archive=archive)
+            engine.urgency = args.urgency
+            try:
+                with METRICS.capture(args.command):
+                    status = run_command(engine, args)
+                projects.record(args.project, engine.stats())
+                return status
+            finally:
+                engine.close()
+        task_manager = AdvancedTaskManager(args.file, store, page_size=args.page_size or None, compact=args.compact,
+                                           cache_bytes=cache_bytes, urgency=args.urgency,
+                                           projects=projects, project=args.project)
+        if args.archive_after:
+            archive_old_tasks(task_manager.engine, args.archive_after)
+        start_reminders(task_manager.engine, args)
         task_manager.run()
     except KeyboardInterrupt:
         print("\n\nGoodbye! 👋")
+    except BrokenPipeError:
+        # The reader went away (e.g. "list -f json | head"); send what is still
+        # buffered to devnull so the exit-time flush does not fail again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
     except Exception as e:
         print(f"Application error: {e}")
+        return 1
+    finally:
+        if args.metrics:
+            METRICS.dump(args.metrics, args.metrics_format)
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""
+Stress test: many processes writing one task file at the same time
+
+Each writer process runs its own TaskEngine on a shared file.  It adds
+tasks, completes or deletes some of its own, and completes a random
+pending task that may belong to another process.  A reader process keeps
+parsing the file without any lock.  At the end the file must hold every
+task that was not deleted, with unique ids, the expected completion flags
+and statistics that match a recount.
+
+Usage: python benchmarks/concurrent_writers.py [--store json|ndjson|sqlite]
+       [--processes 8] [--tasks 50] [--batch-window 0]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_engine import TaskEngine
+from task_stats import TaskStats
+from task_storage import open_store
+
+
+def make_store(args, filename):
+    options = {'batch_window': args.batch_window} if args.store in ("json", "ndjson") else {}
+    return open_store(filename, args.store, **options)
+
+
+def writer(args, filename, worker, results):
+    """Add, complete and delete tasks; report what the final file must contain"""
+    rng = random.Random(worker)
+    engine = TaskEngine(make_store(args, filename), lazy=False, notify=None)
+    kept, completed, deleted, completed_elsewhere = [], [], [], []
+    for number in range(args.tasks):
+        task = engine.add(f"w{worker}-{number}", category=rng.choice(["Work", "Home"]),
+                          priority=rng.choice(["High", "Medium", "Low"]))
+        if number % 5 == 4:
+            engine.delete(task['id'])
+            deleted.append(task['title'])
+        else:
+            kept.append(task['title'])
+            if number % 3 == 0:
+                engine.complete(task['id'])
+                completed.append(task['title'])
+        # Complete a pending task that may belong to another process
+        pending = list(engine.query(completed=False, limit=20))
+        if pending:
+            other = rng.choice(pending)
+            if engine.complete(other['id']) is not None:
+                completed_elsewhere.append(other['title'])
+    counters = engine.close()
+    results.put((kept, completed, deleted, completed_elsewhere, counters.get('merges', 0)))
+
+
+def reader(args, filename, stop, results):
+    """Read the file over and over without locks; count reads that failed"""
+    reads = failures = 0
+    while not stop.is_set():
+        if not os.path.exists(filename):
+            continue
+        try:
+            make_store(args, filename).load()
+        except Exception:
+            failures += 1
+        reads += 1
+    results.put((reads, failures))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--store", choices=["json", "ndjson", "sqlite"], default="json")
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--tasks", type=int, default=50, help="tasks added by each process")
+    parser.add_argument("--batch-window", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, {"json": "tasks.json", "ndjson": "tasks.ndjson", "sqlite": "tasks.db"}[args.store])
+        results, reads = multiprocessing.Queue(), multiprocessing.Queue()
+        stop = multiprocessing.Event()
+        read_process = multiprocessing.Process(target=reader, args=(args, filename, stop, reads))
+        writers = [
+            multiprocessing.Process(target=writer, args=(args, filename, worker, results))
+            for worker in range(args.processes)
+        ]
+        started = time.perf_counter()
+        read_process.start()
+        for process in writers:
+            process.start()
+        outcomes = [results.get() for _ in writers]
+        for process in writers:
+            process.join()
+        elapsed = time.perf_counter() - started
+        stop.set()
+        read_count, read_failures = reads.get()
+        read_process.join()
+
+        store = make_store(args, filename)
+        tasks = store.load()
+        titles = {task['title']: task for task in tasks}
+        problems = []
+
+        kept = {title for outcome in outcomes for title in outcome[0]}
+        deleted = {title for outcome in outcomes for title in outcome[2]}
+        missing = kept - set(titles)
+        if missing:
+            problems.append(f"{len(missing)} tasks lost, e.g. {sorted(missing)[:5]}")
+        resurrected = deleted & set(titles)
+        if resurrected:
+            problems.append(f"{len(resurrected)} deleted tasks came back")
+        if len({task['id'] for task in tasks}) != len(tasks):
+            problems.append("duplicate ids")
+        completed = {title for outcome in outcomes for title in outcome[1] + outcome[3]}
+        not_completed = [title for title in completed if title in titles and not titles[title]['completed']]
+        if not_completed:
+            problems.append(f"{len(not_completed)} completions lost")
+        if store.task_stats.to_dict() != TaskStats.from_tasks(tasks).to_dict():
+            problems.append("saved statistics do not match the tasks")
+        if read_failures:
+            problems.append(f"{read_failures} of {read_count} lock-free reads failed")
+        if hasattr(store, 'close'):
+            store.close()
+
+    operations = sum(len(o[0]) + len(o[1]) + 2 * len(o[2]) + len(o[3]) for o in outcomes)
+    merges = sum(outcome[4] for outcome in outcomes)
+    print(f"{args.processes} writers x {args.tasks} tasks on {args.store}: {operations} changes "
+          f"in {elapsed:.1f}s ({operations / elapsed:,.0f}/s), {merges} merges, "
+          f"{read_count} lock-free reads")
+    print(f"{len(tasks)} tasks on disk, {len(kept)} expected")
+    if problems:
+        for problem in problems:
+            print(f"FAIL: {problem}")
+        sys.exit(1)
+    print("OK: no task or change was lost")
+
+
+if __name__ == "__main__":
+    main()
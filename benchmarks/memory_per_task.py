@@ -0,0 +1,80 @@
+"""
+Memory benchmark: bytes per task as a JSON dict vs. as a compact Task
+
+Usage: python benchmarks/memory_per_task.py [count]
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_model import Task
+
+CATEGORIES = ["Work", "Personal", "Study", "Shopping", "Health", "Other"]
+PRIORITIES = ["High", "Medium", "Low"]
+
+
+def make_tasks_json(count):
+    """Serialized task list shaped like tasks.json"""
+    rng = random.Random(42)
+    start = date(2024, 1, 1)
+    tasks = []
+    for task_id in range(1, count + 1):
+        created = start + timedelta(days=rng.randrange(365))
+        completed = rng.random() < 0.4
+        tasks.append({
+            'id': task_id,
+            'title': f"Task {task_id} {rng.choice(['review', 'write', 'call', 'buy'])}",
+            'description': "x" * rng.randrange(0, 40),
+            'category': rng.choice(CATEGORIES),
+            'priority': rng.choice(PRIORITIES),
+            'due_date': (created + timedelta(days=rng.randrange(30))).isoformat() if rng.random() < 0.7 else "No due date",
+            'completed': completed,
+            'created_date': f"{created.isoformat()} {rng.randrange(24):02d}:{rng.randrange(60):02d}:00",
+            'completed_date': f"{created.isoformat()} 18:00:00" if completed else None,
+        })
+    return json.dumps(tasks)
+
+
+def measure(build):
+    """Bytes still allocated by whatever build() returns"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("count", type=int, nargs="?", default=100000, help="number of tasks (default 100000)")
+    count = parser.parse_args().count
+    text = make_tasks_json(count)
+
+    dicts, dict_bytes = measure(lambda: json.loads(text))
+    del dicts
+
+    tasks, task_bytes = measure(lambda: [Task.from_dict(task) for task in json.loads(text)])
+
+    original = json.loads(text)
+    assert [task.to_dict() for task in tasks] == original, "round trip changed the data"
+
+    print(f"Tasks:            {count}")
+    print(f"dict per task:    {dict_bytes / count:.0f} bytes")
+    print(f"Task per task:    {task_bytes / count:.0f} bytes")
+    print(f"Saving:           {100 * (1 - task_bytes / dict_bytes):.0f}%")
+    print("Round trip:       lossless")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Reminder benchmark: scheduling cost, memory and idle CPU with many pending reminders
+
+Loads the reminders of N tasks (two each) into a ReminderScheduler, runs
+its delivery thread while nothing is due and measures the CPU it uses,
+then schedules, cancels and delivers with a simulated clock.
+
+Usage: python benchmarks/reminder_load.py [count] [--idle-seconds 5]
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_reminders import ReminderScheduler, parse_offsets
+
+
+def make_tasks(count, start, first_id=1):
+    """Pending tasks due over the next year"""
+    rng = random.Random(first_id)
+    return [{
+        'id': task_id,
+        'title': f"Task {task_id}",
+        'category': "Work",
+        'priority': rng.choice(["High", "Medium", "Low"]),
+        'due_date': (start + timedelta(days=rng.randrange(1, 366))).isoformat(),
+        'completed': False,
+    } for task_id in range(first_id, first_id + count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("count", type=int, nargs="?", default=200000, help="number of tasks (default 200000)")
+    parser.add_argument("--idle-seconds", type=float, default=5.0, help="how long to watch the idle delivery thread")
+    args = parser.parse_args()
+    count, idle_seconds = args.count, args.idle_seconds
+    tasks = make_tasks(count, date.today())
+    delivered = []
+
+    scheduler = ReminderScheduler([lambda task, message: delivered.append(task['id'])], parse_offsets("1d,1h"))
+    started = time.perf_counter()
+    scheduled = scheduler.load(tasks)
+    load_seconds = time.perf_counter() - started
+
+    gc.collect()
+    tracemalloc.start()
+    measured = ReminderScheduler([], parse_offsets("1d,1h"))
+    measured.load(tasks)
+    heap_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del measured
+
+    scheduler.start()
+    cpu_before = time.process_time()
+    time.sleep(idle_seconds)
+    idle_cpu = time.process_time() - cpu_before
+    scheduler.stop()
+
+    extra = make_tasks(10000, date.today(), first_id=count + 1)
+    started = time.perf_counter()
+    for task in extra:
+        scheduler.schedule(task)
+    schedule_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    for task in tasks[:10000]:
+        scheduler.cancel(task)
+    cancel_seconds = time.perf_counter() - started
+
+    # Jump the clock a month ahead and deliver everything due by then
+    scheduler.clock = lambda: time.time() + 31 * 86400
+    started = time.perf_counter()
+    fired = scheduler.run_due()
+    deliver_seconds = time.perf_counter() - started
+
+    print(f"Reminders:        {scheduled} for {count} tasks")
+    print(f"Load (heapify):   {load_seconds * 1000:.0f} ms, {heap_bytes / scheduled:.0f} bytes per reminder")
+    print(f"Idle CPU:         {idle_cpu * 1000:.1f} ms over {idle_seconds:g} s")
+    print(f"Schedule:         {schedule_seconds / len(extra) * 1e6:.1f} us per task")
+    print(f"Cancel:           {cancel_seconds / 10000 * 1e6:.1f} us per task")
+    print(f"Deliver:          {fired} due in the next month, {deliver_seconds / max(fired, 1) * 1e6:.1f} us each")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Load test for the task server: requests per second against localhost
+
+Starts "Personallized Task Manager.py serve" on a free port with a fresh
+task file (unless --url points at a running server), opens keep-alive
+connections and sends a mix of reads and writes for a fixed time, then
+checks that the server counted every task that was added.
+
+Usage: python benchmarks/server_load.py [--store json] [--connections 32]
+       [--duration 5] [--write-ratio 0.2] [--preload 1000] [--url HOST:PORT]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, "Personallized Task Manager.py")
+
+CATEGORIES = ["Work", "Personal", "Study", "Shopping", "Health", "Other"]
+PRIORITIES = ["High", "Medium", "Low"]
+WORDS = ["review", "write", "call", "buy", "deploy", "report", "plan", "fix"]
+
+
+def start_server(store, directory):
+    """Run the server in a subprocess and return (process, host, port)"""
+    process = subprocess.Popen(
+        [sys.executable, SCRIPT, "--store", store, "--file", os.path.join(directory, "tasks.json"),
+         "serve", "--port", "0"],
+        stdout=subprocess.PIPE, text=True, cwd=directory
+    )
+    for line in process.stdout:
+        if "http://" in line:
+            address = line.split("http://", 1)[1].split()[0]
+            host, port = address.rsplit(":", 1)
+            return process, host, int(port)
+    raise RuntimeError("Server exited before it started listening")
+
+
+class Client:
+    """One keep-alive HTTP connection"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(data)}\r\n\r\n".encode()
+            + data
+        )
+        await self.writer.drain()
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status = int(head.split(b" ", 2)[1])
+        length = 0
+        for line in head.split(b"\r\n"):
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":", 1)[1])
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self):
+        self.writer.close()
+
+
+def random_task(rng):
+    return {
+        'title': f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.randrange(10000)}",
+        'description': rng.choice(WORDS),
+        'category': rng.choice(CATEGORIES),
+        'priority': rng.choice(PRIORITIES),
+        'due_date': f"2026-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}",
+    }
+
+
+def random_request(rng, write_ratio, max_id):
+    """Pick one request from the read/write mix"""
+    if rng.random() < write_ratio:
+        if rng.random() < 0.7:
+            return "POST", "/tasks", random_task(rng), 'add'
+        return "POST", f"/tasks/{rng.randrange(1, max_id + 1)}/complete", None, 'complete'
+    kind = rng.randrange(4)
+    if kind == 0:
+        return "GET", f"/tasks/{rng.randrange(1, max_id + 1)}", None, 'get'
+    if kind == 1:
+        return "GET", f"/search?q={rng.choice(WORDS)}&limit=20", None, 'search'
+    if kind == 2:
+        return "GET", f"/tasks?category={rng.choice(CATEGORIES)}&completed=false&limit=20", None, 'list'
+    return "GET", "/stats", None, 'stats'
+
+
+async def worker(host, port, deadline, write_ratio, max_id, seed, latencies, counts):
+    rng = random.Random(seed)
+    client = Client(host, port)
+    await client.connect()
+    try:
+        while time.perf_counter() < deadline:
+            method, path, body, kind = random_request(rng, write_ratio, max_id)
+            started = time.perf_counter()
+            status, _ = await client.request(method, path, body)
+            latencies.append(time.perf_counter() - started)
+            counts[kind] = counts.get(kind, 0) + 1
+            if kind == 'add' and status == 201:
+                counts['added'] = counts.get('added', 0) + 1
+            if status >= 500:
+                counts['errors'] = counts.get('errors', 0) + 1
+    finally:
+        client.close()
+
+
+async def preload(host, port, count, connections):
+    """Add count tasks through the API before measuring"""
+    rng = random.Random(7)
+
+    async def add_some(number):
+        client = Client(host, port)
+        await client.connect()
+        for _ in range(number):
+            await client.request("POST", "/tasks", random_task(rng))
+        client.close()
+
+    share, extra = divmod(count, connections)
+    await asyncio.gather(*(add_some(share + (index < extra)) for index in range(connections)))
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def run(host, port, args):
+    client = Client(host, port)
+    await client.connect()
+    _, before = await client.request("GET", "/stats")
+    if args.preload and not before['total']:
+        await preload(host, port, args.preload, args.connections)
+        _, before = await client.request("GET", "/stats")
+
+    latencies, counts = [], {}
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(
+        worker(host, port, deadline, args.write_ratio, max(before['total'], 1), seed, latencies, counts)
+        for seed in range(args.connections)
+    ))
+    elapsed = time.perf_counter() - started
+
+    _, after = await client.request("GET", "/stats")
+    client.close()
+
+    latencies.sort()
+    print(f"{len(latencies)} requests in {elapsed:.1f}s over {args.connections} connections: "
+          f"{len(latencies) / elapsed:,.0f} requests/sec")
+    print(f"latency p50 {percentile(latencies, 0.50) * 1000:.2f} ms, "
+          f"p95 {percentile(latencies, 0.95) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms")
+    print("mix: " + ", ".join(f"{kind} {counts[kind]}" for kind in sorted(counts)))
+    expected = before['total'] + counts.get('added', 0)
+    print(f"tasks before {before['total']}, added {counts.get('added', 0)}, after {after['total']} "
+          f"({'OK' if after['total'] == expected else 'MISMATCH'})")
+    return after['total'] == expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--store", default="json", help="backend for the spawned server")
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds")
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--preload", type=int, default=1000, help="tasks to add first on an empty server")
+    parser.add_argument("--url", help="HOST:PORT of a running server instead of spawning one")
+    args = parser.parse_args()
+
+    if args.url:
+        host, port = args.url.replace("http://", "").rsplit(":", 1)
+        ok = asyncio.run(run(host, int(port), args))
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            process, host, port = start_server(args.store, directory)
+            try:
+                ok = asyncio.run(run(host, port, args))
+            finally:
+                # SIGTERM lets the server flush its store before exiting
+                process.terminate()
+                process.wait()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Startup benchmark: parsing the JSON task file vs. loading its binary snapshot
+
+For each data set size a fresh task file is filled with synthetic tasks
+(see task_generator.py).  Loading is then timed with the snapshot turned
+off (the JSON file is parsed and every task converted) and with a fresh
+snapshot, both for the store alone and for a whole TaskEngine startup
+(load plus indexes).  The best of --repeat runs is reported.
+
+Usage: python benchmarks/startup_snapshot.py [--sizes 1k,10k,100k] [--store json] [--repeat 5]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from task_engine import TaskEngine
+from task_generator import add_generator_arguments, generate_tasks, generator_options, parse_count
+from task_snapshot import snapshot_filename
+from task_storage import open_store
+
+
+def best_time(run, repeat):
+    """Fastest of repeat calls of run(), in seconds"""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def run_size(args, size, directory):
+    """Time cold and warm loads of one data set size"""
+    filename = os.path.join(directory, f"tasks-{size}.json")
+    engine = TaskEngine(open_store(filename, args.store, snapshot=False), lazy=False, background=False, notify=None)
+    engine.import_tasks(generate_tasks(size, **generator_options(args)))
+    engine.close()
+    path = engine.store.filename
+
+    def load(snapshot):
+        store = open_store(filename, args.store, snapshot=snapshot)
+        tasks = store.load()
+        assert len(tasks) == size and store._snapshot_fresh == snapshot
+        return store
+
+    def start(snapshot):
+        engine = TaskEngine(open_store(filename, args.store, snapshot=snapshot),
+                            lazy=False, background=False, notify=None)
+        assert engine.store._snapshot_fresh == snapshot
+
+    store = load(False)
+    store.snapshot = True
+    started = time.perf_counter()
+    assert store.write_snapshot()
+    write_seconds = time.perf_counter() - started
+    del store
+
+    return {
+        'file_mb': os.path.getsize(path) / (1 << 20),
+        'snapshot_mb': os.path.getsize(snapshot_filename(path)) / (1 << 20),
+        'snapshot_write': write_seconds,
+        'cold_load': best_time(lambda: load(False), args.repeat),
+        'warm_load': best_time(lambda: load(True), args.repeat),
+        'cold_startup': best_time(lambda: start(False), args.repeat),
+        'warm_startup': best_time(lambda: start(True), args.repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1k,10k,100k", help="comma separated task counts, e.g. 1k,100k,1M")
+    parser.add_argument("--store", choices=["json", "ndjson"], default="json")
+    parser.add_argument("--repeat", type=int, default=5)
+    add_generator_arguments(parser)
+    args = parser.parse_args()
+
+    print(f"{'Tasks':>9} {'File MB':>8} {'Snap MB':>8} {'JSON load':>10} {'Snapshot':>10} {'Speedup':>8}"
+          f" {'Startup':>10} {'Warm':>10} {'Snap write':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in map(parse_count, args.sizes.split(",")):
+            result = run_size(args, size, directory)
+            print(f"{size:>9} {result['file_mb']:>8.1f} {result['snapshot_mb']:>8.1f}"
+                  f" {result['cold_load'] * 1000:>8.1f}ms {result['warm_load'] * 1000:>8.1f}ms"
+                  f" {result['cold_load'] / result['warm_load']:>7.1f}x"
+                  f" {result['cold_startup'] * 1000:>8.1f}ms {result['warm_startup'] * 1000:>8.1f}ms"
+                  f" {result['snapshot_write'] * 1000:>9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Benchmark suite: load, save, search, views and statistics at scale
+
+For each data set size a fresh task file is filled with synthetic tasks
+(see task_generator.py), then every operation is timed several times.
+The menu views run with their output sent to os.devnull, so the numbers
+include formatting but not the terminal.  Each operation reports latency
+percentiles, throughput and the peak memory it allocated (measured in a
+separate tracemalloc run so tracing does not slow the timed runs).
+
+Results are saved as JSON; pass --compare with an earlier results file to
+see the change per operation between commits.
+
+Usage: python benchmarks/suite.py [--sizes 1k,10k,100k] [--store json] [--repeat 5]
+       [--only load,search] [--output results.json] [--compare old.json]
+"""
+
+import argparse
+import contextlib
+import gc
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from task_engine import TaskEngine
+from task_generator import add_generator_arguments, generate_tasks, generator_options, parse_count
+from task_storage import STORES, open_store
+
+SEARCH_WORDS = ["deploy", "report budget", "meeting OR invoice", "zzz-no-match"]
+
+
+def load_manager_module():
+    """Import "Personallized Task Manager.py" (its name is not importable)"""
+    spec = importlib.util.spec_from_file_location(
+        "task_manager_app", os.path.join(ROOT, "Personallized Task Manager.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class Operations:
+    """The benchmarked operations on one task file
+
+    Each operation returns how many tasks it handled, used for throughput.
+    """
+
+    def __init__(self, manager_class, store_name, filename):
+        self.manager_class = manager_class
+        self.store_name = store_name
+        self.filename = filename
+        self.manager = self.open_manager()
+        self.engine = self.manager.engine
+        self.searches = 0
+        self.added = []
+
+    def open_manager(self):
+        return self.manager_class(
+            self.filename, store=open_store(self.filename, self.store_name), lazy=False, background=False
+        )
+
+    def total(self):
+        return self.engine.count()[0]
+
+    def load(self):
+        """Open the store and load every task with its indexes (what startup waits for)"""
+        manager = self.open_manager()
+        manager.engine.store.close()
+        return manager.engine.count()[0]
+
+    def save(self):
+        self.engine.save()
+        return self.total()
+
+    def add(self):
+        task = self.engine.add("benchmark task", "added by the benchmark", "Work", "High",
+                               date.today().isoformat())
+        self.added.append(task['id'])
+        return 1
+
+    def complete(self):
+        return 1 if self.added and self.engine.complete(self.added.pop()) is not None else 0
+
+    def search(self):
+        words = SEARCH_WORDS[self.searches % len(SEARCH_WORDS)]
+        self.searches += 1
+        return sum(1 for _ in self.engine.search(words))
+
+    def _render(self, view, answer=""):
+        with mock.patch("builtins.input", return_value=answer):
+            view()
+
+    def search_tasks(self):
+        words = SEARCH_WORDS[self.searches % len(SEARCH_WORDS)]
+        self.searches += 1
+        self._render(self.manager.search_tasks, words)
+        return sum(1 for _ in self.engine.search(words))
+
+    def view_all_tasks(self):
+        self._render(self.manager.view_all_tasks)
+        return self.total()
+
+    def view_tasks_by_category(self):
+        self._render(self.manager.view_tasks_by_category)
+        return self.total()
+
+    def view_tasks_by_priority(self):
+        self._render(self.manager.view_tasks_by_priority)
+        return self.total()
+
+    def view_todays_tasks(self):
+        self._render(self.manager.view_todays_tasks)
+        today = date.today()
+        return sum(1 for _ in self.engine.iter_due_between(today, today))
+
+    def view_upcoming_tasks(self):
+        self._render(self.manager.view_upcoming_tasks, "7")
+        today = date.today()
+        return sum(1 for _ in self.engine.iter_due_between(today, today + timedelta(days=7)))
+
+    def show_statistics(self):
+        self._render(self.manager.show_statistics)
+        return self.total()
+
+    def close(self):
+        self.engine.store.close()
+
+
+OPERATIONS = [
+    'load', 'save', 'add', 'complete', 'search', 'search_tasks', 'view_all_tasks',
+    'view_tasks_by_category', 'view_tasks_by_priority', 'view_todays_tasks',
+    'view_upcoming_tasks', 'show_statistics',
+]
+# Whole-file operations are slow at large sizes; they get fewer repeats
+HEAVY = {'load', 'save', 'view_all_tasks', 'view_tasks_by_category', 'view_tasks_by_priority'}
+
+
+def measure(operation, repeat):
+    """Time repeat calls, then one traced call for peak memory"""
+    timings, items = [], 0
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        items += operation()
+        timings.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    operation()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    timings.sort()
+    elapsed = sum(timings)
+    return {
+        'runs': repeat,
+        'mean_ms': elapsed / repeat * 1000,
+        'p50_ms': percentile(timings, 0.50) * 1000,
+        'p95_ms': percentile(timings, 0.95) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+        'max_ms': timings[-1] * 1000,
+        'ops_per_sec': repeat / elapsed if elapsed else None,
+        'tasks_per_sec': items / elapsed if elapsed else None,
+        'peak_memory_kb': peak / 1024,
+    }
+
+
+def build_task_file(store_name, filename, size, options):
+    """Fill a fresh store with size generated tasks; returns the seconds taken"""
+    started = time.perf_counter()
+    engine = TaskEngine(open_store(filename, store_name), lazy=False, background=False, notify=None)
+    engine.import_tasks(generate_tasks(size, **options))
+    engine.close()
+    return time.perf_counter() - started
+
+
+def run_size(manager_class, args, size, operations):
+    """Benchmark every operation on one data set size"""
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "tasks.json")
+        build_seconds = build_task_file(args.store, filename, size, generator_options(args))
+        print(f"\n{size:,} tasks on {args.store} (generated in {build_seconds:.1f}s)")
+        print(f"  {'operation':<24} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'ops/s':>10} "
+              f"{'tasks/s':>12} {'peak KB':>10}")
+        with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+            ops = Operations(manager_class, args.store, filename)
+        try:
+            for name in operations:
+                repeat = max(1, args.repeat // 2) if name in HEAVY and size >= 1000000 else args.repeat
+                with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+                    result = measure(getattr(ops, name), repeat)
+                results[name] = result
+                print(f"  {name:<24} {result['p50_ms']:>10.2f} {result['p95_ms']:>10.2f} "
+                      f"{result['p99_ms']:>10.2f} {result['ops_per_sec'] or 0:>10,.1f} "
+                      f"{result['tasks_per_sec'] or 0:>12,.0f} {result['peak_memory_kb']:>10,.0f}")
+        finally:
+            ops.close()
+    return {'build_seconds': build_seconds, 'operations': results}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Print the p50 change per operation against an earlier results file"""
+    print(f"\nChange against {baseline.get('commit') or 'baseline'} (p50, negative is faster):")
+    for size, current in results['sizes'].items():
+        old = baseline.get('sizes', {}).get(size)
+        if not old:
+            continue
+        for name, result in current['operations'].items():
+            before = old['operations'].get(name)
+            if before and before['p50_ms']:
+                change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100
+                flag = "  <-- slower" if change > 20 else ""
+                print(f"  {int(size):>10,} {name:<24} {before['p50_ms']:>10.2f} -> "
+                      f"{result['p50_ms']:>10.2f} ms ({change:+.0f}%){flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1k,10k,100k", help="comma separated, e.g. 1k,100k,10M")
+    parser.add_argument("--store", choices=sorted(STORES), default="json")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per operation")
+    parser.add_argument("--only", help="comma separated operations (default: all)")
+    parser.add_argument("--output", default="benchmark-results.json", help="JSON results file")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    add_generator_arguments(parser)
+    args = parser.parse_args()
+
+    operations = args.only.split(",") if args.only else OPERATIONS
+    unknown = set(operations) - set(OPERATIONS)
+    if unknown:
+        parser.error(f"unknown operations: {', '.join(sorted(unknown))}")
+
+    manager_class = load_manager_module().AdvancedTaskManager
+    results = {
+        'commit': git_commit(),
+        'date': datetime.now().isoformat(timespec="seconds"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'store': args.store,
+        'repeat': args.repeat,
+        'generator': {name: value for name, value in generator_options(args).items()},
+        'sizes': {},
+    }
+    for size in (parse_count(text) for text in args.sizes.split(",")):
+        results['sizes'][str(size)] = run_size(manager_class, args, size, operations)
+    # ru_maxrss is in kilobytes on Linux (bytes on macOS)
+    if resource is not None:
+        results['max_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            compare(results, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Synthetic task generator for the benchmarks
+
+Produces task rows shaped like task_io readers' output (no id), with
+configurable category, priority, due date, completion and text length
+distributions, so every benchmark can build the same data set from a seed.
+Rows are generated lazily, so millions of them never sit in a list here.
+
+Usage: python benchmarks/task_generator.py COUNT [--format ndjson|csv|json] [--output FILE]
+"""
+
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_io import FORMATS, write_tasks
+from task_model import NO_DUE_DATE
+
+DEFAULT_CATEGORIES = {"Work": 3, "Personal": 2, "Study": 1, "Shopping": 1, "Health": 1, "Other": 1}
+DEFAULT_PRIORITIES = {"High": 1, "Medium": 2, "Low": 1}
+WORDS = [
+    "review", "write", "call", "buy", "deploy", "report", "plan", "fix", "email", "meeting",
+    "budget", "slides", "invoice", "groceries", "gym", "doctor", "exam", "chapter", "release",
+    "backup", "server", "draft", "client", "design", "notes", "garden", "laundry", "tickets",
+]
+
+
+def parse_count(text):
+    """Parse a count such as 5000, 10k or 2M"""
+    text = text.strip().lower().replace("_", "")
+    for suffix, factor in (("k", 1000), ("m", 1000000)):
+        if text.endswith(suffix):
+            return int(float(text[:-1]) * factor)
+    return int(text)
+
+
+def parse_weights(text):
+    """Parse 'Work=3,Personal=1' into {name: weight}"""
+    weights = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        weights[name.strip()] = float(weight) if weight else 1.0
+    return weights
+
+
+def parse_range(text):
+    """Parse '2-6' (or a single number) into (low, high)"""
+    low, _, high = text.partition("-")
+    return int(low), int(high or low)
+
+
+def generate_tasks(count, seed=42, categories=None, priorities=None, due_spread=60,
+                   no_due=0.3, completed=0.4, title_words=(2, 6), description_length=(0, 80),
+                   today=None):
+    """Yield count task rows
+
+    Due dates fall uniformly within due_spread days either side of today
+    (no_due of them have none), and completed is the share already done.
+    Titles have title_words words and descriptions description_length
+    characters, both as (low, high) ranges.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    categories = categories or DEFAULT_CATEGORIES
+    priorities = priorities or DEFAULT_PRIORITIES
+    category_names, category_weights = list(categories), list(categories.values())
+    priority_names, priority_weights = list(priorities), list(priorities.values())
+    for number in range(count):
+        done = rng.random() < completed
+        created = today - timedelta(days=rng.randrange(365))
+        if rng.random() < no_due:
+            due_date = NO_DUE_DATE
+        else:
+            due_date = (today + timedelta(days=rng.randint(-due_spread, due_spread))).isoformat()
+        description = ""
+        length = rng.randint(*description_length)
+        while len(description) < length:
+            description += rng.choice(WORDS) + " "
+        yield {
+            'id': None,
+            'title': " ".join(rng.choice(WORDS) for _ in range(rng.randint(*title_words))) + f" {number}",
+            'description': description[:length].strip(),
+            'category': rng.choices(category_names, category_weights)[0],
+            'priority': rng.choices(priority_names, priority_weights)[0],
+            'due_date': due_date,
+            'completed': done,
+            'created_date': f"{created.isoformat()} {rng.randrange(24):02d}:{rng.randrange(60):02d}:00",
+            'completed_date': f"{created.isoformat()} 18:00:00" if done else None,
+        }
+
+
+def add_generator_arguments(parser):
+    """Add the data set options shared by the benchmark scripts"""
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--categories", type=parse_weights, default=DEFAULT_CATEGORIES,
+                        help="weights such as Work=3,Personal=2,Other=1")
+    parser.add_argument("--priorities", type=parse_weights, default=DEFAULT_PRIORITIES,
+                        help="weights such as High=1,Medium=2,Low=1")
+    parser.add_argument("--due-spread", type=int, default=60, help="due dates within +/- this many days")
+    parser.add_argument("--no-due", type=float, default=0.3, help="share of tasks without a due date")
+    parser.add_argument("--completed", type=float, default=0.4, help="share of completed tasks")
+    parser.add_argument("--title-words", type=parse_range, default=(2, 6), help="e.g. 2-6")
+    parser.add_argument("--description-length", type=parse_range, default=(0, 80), help="characters, e.g. 0-80")
+
+
+def generator_options(args):
+    """generate_tasks() keyword arguments from parsed add_generator_arguments options"""
+    return {
+        'seed': args.seed,
+        'categories': args.categories,
+        'priorities': args.priorities,
+        'due_spread': args.due_spread,
+        'no_due': args.no_due,
+        'completed': args.completed,
+        'title_words': args.title_words,
+        'description_length': args.description_length,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("count", type=parse_count)
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--output", help="file to write (default: stdout)")
+    add_generator_arguments(parser)
+    args = parser.parse_args()
+    rows = generate_tasks(args.count, **generator_options(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as file:
+            write_tasks(rows, file, args.format)
+    else:
+        write_tasks(rows, sys.stdout, args.format)
+
+
+if __name__ == "__main__":
+    main()
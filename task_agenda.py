@@ -0,0 +1,234 @@
+"""
+"What next" agenda: pending tasks ranked by an urgency score
+
+    urgency = priority weight
+            + due weight for every day closer than `horizon` days to the due
+              date (growing until `overdue` days past it, then flat)
+            + age weight for every day since the task was created
+
+As the days pass, every score changes, but in only two ways: tasks inside
+their due window gain due + age per day, all others gain age per day.  So
+Agenda keeps one heap per kind, keyed by the score minus that daily
+growth.  Keys stay valid from day to day, and a new day only re-files the
+tasks that enter or leave their due window, found by due date.  The most
+urgent k tasks are read from the two heaps without popping anything, in
+O(k log k).
+"""
+
+import heapq
+from datetime import date
+
+from task_index import DueDateIndex, due_ordinal, task_due_ordinal
+
+DEFAULT_PRIORITY_WEIGHTS = {"High": 10.0, "Medium": 5.0, "Low": 1.0}
+
+# Within the due window (growing with due + age weight) or outside it (age only)
+GROWING, STEADY = 0, 1
+
+
+def created_ordinal(task):
+    """Day number of a task's creation date, or None"""
+    return due_ordinal((task.get('created_date') or "")[:10])
+
+
+class UrgencyWeights:
+    """The weights of the urgency score"""
+
+    def __init__(self, priority=None, due=1.0, horizon=14, overdue=14, age=0.05):
+        self.priority = dict(DEFAULT_PRIORITY_WEIGHTS, **(priority or {}))
+        self.due = due
+        self.horizon = horizon
+        self.overdue = overdue
+        self.age = age
+
+    @classmethod
+    def parse(cls, text):
+        """Parse 'high=10,medium=5,low=1,due=1,horizon=14,overdue=14,age=0.05' (any subset)"""
+        weights = cls()
+        for item in filter(None, (part.strip() for part in text.split(","))):
+            name, _, value = item.partition("=")
+            name = name.strip().lower()
+            try:
+                number = float(value)
+            except ValueError:
+                raise ValueError(f"Invalid urgency weight '{item}' (expected name=number)")
+            if name.capitalize() in DEFAULT_PRIORITY_WEIGHTS:
+                weights.priority[name.capitalize()] = number
+            elif name in ('due', 'age'):
+                setattr(weights, name, number)
+            elif name in ('horizon', 'overdue'):
+                if number < 0:
+                    raise ValueError(f"{name} cannot be negative")
+                setattr(weights, name, int(number))
+            else:
+                raise ValueError(f"Unknown urgency weight '{name}' "
+                                 "(use high, medium, low, due, horizon, overdue or age)")
+        return weights
+
+    def __eq__(self, other):
+        return isinstance(other, UrgencyWeights) and vars(self) == vars(other)
+
+    def __str__(self):
+        priorities = ",".join(f"{name.lower()}={weight:g}" for name, weight in self.priority.items())
+        return (f"{priorities},due={self.due:g},horizon={self.horizon},"
+                f"overdue={self.overdue},age={self.age:g}")
+
+    def score(self, task, today):
+        """A task's urgency on a given day, computed directly"""
+        due, created = task_due_ordinal(task), created_ordinal(task)
+        return self._score(self.priority.get(task['priority'], 0.0), due,
+                           today.toordinal() if created is None else created, today.toordinal())
+
+    def _score(self, weight, due, created, day):
+        score = weight + self.age * (day - created)
+        if due is not None:
+            days_left = due - day
+            if days_left < -self.overdue:
+                score += self.due * (self.horizon + self.overdue)
+            elif days_left < self.horizon:
+                score += self.due * (self.horizon - days_left)
+        return score
+
+    def kind(self, due, day):
+        """GROWING while day is in the due window of a task due on day number due"""
+        if due is not None and due - self.horizon < day <= due + self.overdue:
+            return GROWING
+        return STEADY
+
+    def slope(self, kind):
+        """Score gained per day by tasks of one kind"""
+        return self.due + self.age if kind == GROWING else self.age
+
+
+class Agenda:
+    """Pending task ids on two heaps ordered by urgency
+
+    add(), remove() and top() keep it current as tasks change; the caller
+    passes today's date to top() and the heaps catch up with the days
+    that passed since the last call.
+    """
+
+    def __init__(self, weights=None, today=None):
+        self.weights = weights or UrgencyWeights()
+        self.day = (today or date.today()).toordinal()
+        # id -> (priority weight, due ordinal, created ordinal)
+        self.facts = {}
+        # id -> (kind, key) of the live heap entry; other heap entries are stale
+        self.entries = {}
+        self.heaps = {GROWING: [], STEADY: []}
+        self.due_index = DueDateIndex()
+
+    @classmethod
+    def build(cls, tasks, weights=None, today=None):
+        """Agenda of the pending tasks among tasks, heapified in one pass"""
+        agenda = cls(weights, today)
+        for task in tasks:
+            if not task['completed']:
+                agenda._remember(task)
+        agenda.due_index = DueDateIndex.build(
+            {'id': task_id, 'due_date': date.fromordinal(due).isoformat()}
+            for task_id, (_, due, _) in agenda.facts.items() if due is not None
+        )
+        agenda._rebuild()
+        return agenda
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _remember(self, task):
+        created = created_ordinal(task)
+        self.facts[task['id']] = (
+            self.weights.priority.get(task['priority'], 0.0),
+            task_due_ordinal(task),
+            self.day if created is None else created,
+        )
+        self.entries[task['id']] = self._entry(task['id'])
+
+    def _entry(self, task_id):
+        """(kind, key) of a task on the current day: its score less the daily growth"""
+        weight, due, created = self.facts[task_id]
+        kind = self.weights.kind(due, self.day)
+        key = self.weights._score(weight, due, created, self.day) - self.weights.slope(kind) * self.day
+        return kind, key
+
+    def _rebuild(self):
+        """Heapify every live entry from scratch, dropping stale ones"""
+        self.heaps = {GROWING: [], STEADY: []}
+        for task_id, (kind, key) in self.entries.items():
+            self.heaps[kind].append((-key, task_id))
+        for heap in self.heaps.values():
+            heapq.heapify(heap)
+
+    def _file(self, task_id):
+        """Push a task's current entry, leaving any older one stale"""
+        kind, key = self.entries[task_id] = self._entry(task_id)
+        heapq.heappush(self.heaps[kind], (-key, task_id))
+
+    def add(self, task):
+        """Start ranking a pending task (one heap push)"""
+        self._remember(task)
+        kind, key = self.entries[task['id']]
+        heapq.heappush(self.heaps[kind], (-key, task['id']))
+        if self.facts[task['id']][1] is not None:
+            self.due_index.add(task)
+        self._compact()
+
+    def remove(self, task):
+        """Stop ranking a task that was completed or deleted (its heap entry goes stale)"""
+        if self.facts.pop(task['id'], None) is not None:
+            del self.entries[task['id']]
+            self.due_index.remove(task)
+            self._compact()
+
+    def _compact(self):
+        """Drop stale entries once they outnumber the live ones"""
+        if sum(map(len, self.heaps.values())) > 2 * len(self.entries) + 64:
+            self._rebuild()
+
+    def advance(self, today):
+        """Move to a later day, re-filing only the tasks that enter or leave their due window"""
+        day = today.toordinal()
+        if day == self.day:
+            return
+        if day < self.day:
+            # The clock went back: refile everything
+            self.day = day
+            self.entries = {task_id: self._entry(task_id) for task_id in self.facts}
+            self._rebuild()
+            return
+        horizon, overdue = self.weights.horizon, self.weights.overdue
+        # Due window is due - horizon < day <= due + overdue
+        crossing = set(self.due_index.ids_between(self.day + horizon, day + horizon - 1))
+        crossing.update(self.due_index.ids_between(self.day - overdue, day - overdue - 1))
+        self.day = day
+        for task_id in crossing:
+            self._file(task_id)
+        self._compact()
+
+    def top(self, k, today=None):
+        """The k most urgent (task id, score) pairs, most urgent first
+
+        Walks both heaps with a frontier heap of candidate positions, so
+        nothing is popped and it costs O(k log k) plus stale entries.
+        """
+        self.advance(today or date.today())
+        frontier = []
+
+        def push(kind, position):
+            heap = self.heaps[kind]
+            if position < len(heap):
+                negative_key, task_id = heap[position]
+                score = -negative_key + self.weights.slope(kind) * self.day
+                heapq.heappush(frontier, (-score, task_id, kind, position))
+
+        for kind in self.heaps:
+            push(kind, 0)
+        result, seen = [], set()
+        while frontier and len(result) < k:
+            negative_score, task_id, kind, position = heapq.heappop(frontier)
+            if task_id not in seen and self.entries.get(task_id) == (kind, -self.heaps[kind][position][0]):
+                seen.add(task_id)
+                result.append((task_id, -negative_score))
+            push(kind, 2 * position + 1)
+            push(kind, 2 * position + 2)
+        return result
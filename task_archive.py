@@ -0,0 +1,99 @@
+"""
+Compressed archive for old completed tasks
+
+Finished work stays out of the working set: TaskEngine.archive_completed()
+moves tasks completed more than N days ago into "<task file>.archive.gz"
+(or .xz), one JSON task per line.  Each batch is appended as a new
+compressed member, so archiving never rewrites what is already there, and
+the file is only read when the archive is listed or searched.
+
+The counts of archived tasks are kept in "<task file>.archive.json", so
+lifetime statistics never have to open the archive.
+"""
+
+import gzip
+import json
+import lzma
+import os
+
+from task_metrics import METRICS
+from task_model import Task, json_default
+from task_search import matches_query, parse_query
+from task_stats import TaskStats
+from task_storage import TaskFileLock, atomic_write_json
+
+COMPRESSORS = {
+    'gzip': ('.gz', gzip.open),
+    'lzma': ('.xz', lzma.open),
+}
+
+
+class TaskArchive:
+    """Append-only compressed NDJSON file of archived tasks plus their stats
+
+    compression picks gzip or lzma for a new archive; an existing archive
+    keeps the format it was created with.
+    """
+
+    def __init__(self, filename, compression='gzip'):
+        if compression not in COMPRESSORS:
+            raise ValueError(f"Unknown archive compression '{compression}' (expected gzip or lzma)")
+        self.base_filename = filename + ".archive"
+        self.stats_filename = self.base_filename + ".json"
+        # Reuse whichever archive already exists
+        for name, (suffix, _) in COMPRESSORS.items():
+            if os.path.exists(self.base_filename + suffix):
+                compression = name
+                break
+        self.compression = compression
+        self.filename = self.base_filename + COMPRESSORS[compression][0]
+        self._open = COMPRESSORS[compression][1]
+        self._file_lock = TaskFileLock(self.base_filename + ".lock")
+        self.task_stats = self.read_stats()
+
+    def read_stats(self):
+        """Archived totals from the stats file, as another process may have archived since"""
+        try:
+            with open(self.stats_filename, 'r') as file:
+                return TaskStats.from_dict(json.load(file))
+        except (OSError, ValueError):
+            return TaskStats()
+
+    def append(self, tasks):
+        """Add tasks to the archive and its totals; returns how many"""
+        with METRICS.timer('archive_write'), self._file_lock:
+            # Another process may have archived since we read the totals
+            self.task_stats = self.read_stats()
+            with self._open(self.filename, 'at', encoding='utf-8') as file:
+                for task in tasks:
+                    file.write(json.dumps(task, default=json_default) + "\n")
+                    self.task_stats.add(task)
+            with open(self.filename, 'rb') as file:
+                os.fsync(file.fileno())
+            atomic_write_json(self.stats_filename, self.task_stats.to_dict())
+        return len(tasks)
+
+    def iter_tasks(self):
+        """Yield every archived task, decompressing as it goes"""
+        if not os.path.exists(self.filename):
+            return
+        with self._open(self.filename, 'rt', encoding='utf-8') as file:
+            try:
+                for line in file:
+                    if line.strip():
+                        yield Task.from_dict(json.loads(line))
+            except (EOFError, ValueError):
+                # A crash cut the last batch short; the rest is intact
+                return
+
+    def search(self, text):
+        """Yield archived tasks matching a search query, oldest first"""
+        groups = parse_query(text)
+        return (task for task in self.iter_tasks() if matches_query(task, groups))
+
+    def size(self):
+        """Size of the compressed archive in bytes"""
+        try:
+            return os.path.getsize(self.filename)
+        except FileNotFoundError:
+            return 0
@@ -0,0 +1,110 @@
+"""
+LRU cache for query results
+
+The menu asks for the same grouping, date range or search again and again
+while nothing changes.  ResultCache remembers the result lists keyed by
+(view, parameters, generation); the engine starts a new generation on
+every add, complete and delete and whenever another process changed the
+file, which drops every cached result at once.
+
+Results are recorded while the caller iterates, so views stay lazy: a list
+is only kept once it has been read to the end (a view abandoned after the
+first page is not cached) and only while it fits the memory cap.  The cap
+counts the cache's own lists of task references; the tasks themselves are
+shared with the engine.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+from task_metrics import METRICS
+
+DEFAULT_MAX_BYTES = 32 << 20
+
+
+class ResultCache:
+    """Least recently used result lists, bounded by their size in bytes"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        # Largest single result worth keeping
+        self.max_entry_bytes = max_bytes // 4
+        self.generation = 0
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Start a new generation: every cached result is out of date"""
+        with self._lock:
+            self.generation += 1
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.bytes = 0
+
+    def get(self, view, params):
+        """Return the cached result list, or None"""
+        key = (view, params, self.generation)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.entries.move_to_end(key)
+                self.hits += 1
+        METRICS.count('cache_lookups', view=view, result='miss' if entry is None else 'hit')
+        return entry
+
+    def put(self, view, params, generation, result):
+        """Store a result computed during generation, evicting the least recently used"""
+        size = sys.getsizeof(result)
+        if size > self.max_entry_bytes:
+            return
+        key = (view, params, generation)
+        with self._lock:
+            if generation != self.generation:
+                return  # Something changed while the caller was reading
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= sys.getsizeof(old)
+            self.entries[key] = result
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= sys.getsizeof(evicted)
+                self.evictions += 1
+
+    def record(self, view, params, items):
+        """Pass items through, caching them as one list if they are read to the end"""
+        return self._record(view, params, self.generation, items)
+
+    def _record(self, view, params, generation, items):
+        # A list of n references takes about 8n bytes
+        max_items = self.max_entry_bytes // 8
+        recorded = []
+        for item in items:
+            if recorded is not None:
+                recorded.append(item)
+                if len(recorded) > max_items:
+                    recorded = None
+            yield item
+        if recorded is not None:
+            self.put(view, params, generation, recorded)
+
+    def stats(self):
+        """Counters for reporting"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'generation': self.generation,
+        }
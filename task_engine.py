@@ -0,0 +1,804 @@
+"""
+Task engine: every task operation without console input or output
+
+TaskEngine owns the storage backend, the in-memory task map and its
+indexes.  Its methods take plain values and return Task objects, counts or
+TaskStats, and report bad arguments with ValueError, so the menu, the
+command line, a service or a benchmark can all drive the same code.
+"""
+
+import heapq
+import threading
+from datetime import date, datetime, timedelta
+from itertools import chain, islice
+
+from task_agenda import Agenda, UrgencyWeights
+from task_archive import TaskArchive
+from task_cache import DEFAULT_MAX_BYTES, ResultCache
+from task_index import BucketIndex, DueDateIndex, due_ordinal
+from task_metrics import METRICS
+from task_model import NO_DUE_DATE, Task
+from task_query import TaskFilter, sort_key
+from task_recurrence import Recurrence, next_due_date, occurrences
+from task_reminders import DEFAULT_DUE_TIME, ReminderScheduler, canonical_offsets
+from task_search import matches_query, open_search_index, parse_query
+from task_stats import TaskStats
+from task_storage import PRIORITY_LEVELS
+
+
+def validate_due_date(due_date):
+    """Return a due date as YYYY-MM-DD (or "No due date"); accepts date objects"""
+    if due_date is None or due_date == NO_DUE_DATE:
+        return NO_DUE_DATE
+    if isinstance(due_date, date):
+        return due_date.isoformat()
+    try:
+        return date.fromisoformat(due_date).isoformat()
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid due date '{due_date}' (expected YYYY-MM-DD)")
+
+
+class TaskEngine:
+    """Add, complete, delete and query tasks on one storage backend
+
+    In-memory stores are loaded into an id -> Task map with search, due
+    date, category and priority indexes.  With lazy=True a store that can
+    stream (ndjson) only reads its header up front; the tasks are loaded on
+    a background thread, or on first need with background=False, and
+    queries stream from the file until then.  Indexed stores (SQLite)
+    answer every query themselves.  notify receives one-line notices such
+    as duplicate-id repairs (None, the default, stays silent).
+
+    Views and searches are remembered in a ResultCache of cache_bytes
+    (0 turns it off) until the next add, complete or delete, or until
+    another process changes the store.
+
+    archive_completed() moves old completed tasks into a TaskArchive
+    (archive=None opens the one next to the task file).
+    """
+
+    def __init__(self, store, lazy=True, background=True, notify=None, cache_bytes=DEFAULT_MAX_BYTES,
+                 archive=None):
+        self.store = store
+        self.notify = notify
+        self.archive = archive if archive is not None else TaskArchive(store.filename)
+        self.cache = ResultCache(cache_bytes) if cache_bytes else None
+        self._data_version = store.data_version() if hasattr(store, 'data_version') else None
+        # id -> task for the in-memory stores (insertion ordered, so deletes
+        # never shift other tasks)
+        self.tasks = {}
+        self.search_index = None
+        self.due_index = None
+        self.category_index = None
+        self.priority_index = None
+        # id -> task for pending recurring tasks (the current occurrence of each series)
+        self.recurring = {}
+        # Urgency ranking for agenda(), built on first use
+        self.urgency = UrgencyWeights()
+        self._agenda = None
+        # ReminderScheduler while start_reminders() is in effect
+        self.reminders = None
+        self._loaded = threading.Event()
+        self._load_error = None
+        self._loader = None
+        self._load_lock = threading.Lock()
+        self._reminders_lock = threading.RLock()
+        if self.store.indexed:
+            self._loaded.set()
+        elif lazy and hasattr(self.store, 'iter_stream'):
+            self.store.read_header()
+            if background:
+                self._loader = threading.Thread(target=self._load_in_memory, daemon=True)
+                self._loader.start()
+        else:
+            self._load_in_memory()
+
+    # Loading and persistence
+
+    def _load_in_memory(self):
+        """Load every task and build the in-memory indexes"""
+        try:
+            with METRICS.timer('load'):
+                tasks = {
+                    task['id']: task if isinstance(task, Task) else Task.from_dict(task) for task in self.store.load()
+                }
+                if self.store.repaired:
+                    if self.notify:
+                        self.notify(f"🔧 Renumbered {self.store.repaired} tasks with duplicate ids")
+                    self.store.save(tasks)
+                self._build_indexes(tasks)
+            with self._reminders_lock:
+                # start_reminders() left the scheduling to us
+                self._reload_reminders()
+        except Exception as e:
+            self._load_error = e
+        finally:
+            self._loaded.set()
+
+    def _build_indexes(self, tasks):
+        """Adopt an id -> Task map and index it"""
+        with METRICS.timer('index_build'):
+            self.search_index = open_search_index(
+                self.search_index_filename(), tasks, self.store.fingerprint()
+            )
+            self.due_index = DueDateIndex.build(tasks.values())
+            self.category_index = BucketIndex.build('category', tasks.values())
+            self.priority_index = BucketIndex.build('priority', tasks.values())
+            self.recurring = {
+                task_id: task for task_id, task in tasks.items() if not task['completed'] and task.get('recurrence')
+            }
+        self.tasks = tasks
+
+    def refresh(self):
+        """Pick up tasks another process wrote to the same file; True if anything changed
+
+        Only a stat() of the task file (or a PRAGMA for SQLite) unless it
+        changed.  Called by every query and mutation, so each process sees
+        the others' work.
+        """
+        if self._data_version is not None:
+            version = self.store.data_version()
+            if version == self._data_version:
+                return False
+            self._data_version = version
+            self.store.reload_stats()
+            self._agenda = None
+            self._changed()
+            self._reload_reminders()
+            return True
+        if self.store.indexed or self.streaming or not hasattr(self.store, 'refresh'):
+            return False
+        tasks = self.store.refresh()
+        if tasks is None:
+            return False
+        self._build_indexes({
+            task['id']: task if isinstance(task, Task) else Task.from_dict(task) for task in tasks
+        })
+        self._agenda = None
+        self._changed()
+        self._reload_reminders()
+        return True
+
+    def _changed(self):
+        """Tasks were added, completed or deleted: cached results are out of date"""
+        if self.cache is not None:
+            self.cache.invalidate()
+
+    def _cached(self, view, params, produce):
+        """Serve a view from the result cache, or run produce() and cache what it yields"""
+        self.refresh()
+        if self.cache is None or self.streaming:
+            return produce()
+        result = self.cache.get(view, params)
+        if result is not None:
+            return iter(result)
+        return self.cache.record(view, params, produce())
+
+    def ensure_loaded(self):
+        """Wait for a background load to finish, or load now if none was started"""
+        with self._load_lock:
+            if not self._loaded.is_set() and self._loader is None:
+                self._load_in_memory()
+        self._loaded.wait()
+        if self._load_error is not None:
+            raise self._load_error
+
+    @property
+    def streaming(self):
+        """True while queries are answered by streaming the task file"""
+        return not self._loaded.is_set()
+
+    def search_index_filename(self):
+        """The search index is kept next to the task file"""
+        return self.store.filename + ".idx"
+
+    def save(self):
+        """Write all tasks to the storage backend"""
+        self.ensure_loaded()
+        with METRICS.timer('save'):
+            self.store.save(self.tasks)
+
+    def close(self):
+        """Flush pending writes, release the store and return its write counters"""
+        if self._loader is not None:
+            self.ensure_loaded()
+        self.stop_reminders()
+        self.store.close()
+        if self.search_index is not None:
+            # Index what is on disk now, so the saved index matches its fingerprint
+            self.refresh()
+            self.search_index.save(self.search_index_filename(), self.store.fingerprint())
+        return self.store.stats()
+
+    # In-memory task map and its indexes (not used with indexed stores)
+
+    def _insert_task(self, task):
+        """Add a task to the in-memory map and every index"""
+        self.tasks[task['id']] = task
+        self.search_index.add(task)
+        self.due_index.add(task)
+        self.category_index.add(task)
+        self.priority_index.add(task)
+        if not task['completed'] and task.get('recurrence'):
+            self.recurring[task['id']] = task
+
+    def _insert_tasks(self, tasks):
+        """Add a batch of tasks to the map and indexes, sorting each index once"""
+        for task in tasks:
+            self.tasks[task['id']] = task
+            self.category_index.add(task)
+            self.priority_index.add(task)
+            if not task['completed'] and task.get('recurrence'):
+                self.recurring[task['id']] = task
+        self.search_index.add_many(tasks)
+        self.due_index.add_many(tasks)
+
+    def _remove_task(self, task):
+        """Remove a task from the in-memory map and every index"""
+        del self.tasks[task['id']]
+        self.search_index.remove(task)
+        self.due_index.remove(task)
+        self.category_index.remove(task)
+        self.priority_index.remove(task)
+        self.recurring.pop(task['id'], None)
+
+    def _remove_tasks(self, tasks):
+        """Remove a batch of tasks from the map and indexes, one pass per index"""
+        for task in tasks:
+            del self.tasks[task['id']]
+            self.category_index.remove(task)
+            self.priority_index.remove(task)
+            self.recurring.pop(task['id'], None)
+        self.search_index.remove_many(tasks)
+        self.due_index.remove_many(tasks)
+
+    # Mutations
+
+    def add(self, title, description="", category="Other", priority="Medium", due_date=NO_DUE_DATE,
+            recurrence=None, remind=None):
+        """Add a task and return it
+
+        recurrence is a repeat rule ("weekly", "every 3 days", ... see
+        task_recurrence); a repeating task without a due date starts today.
+        remind sets the task's own reminder offsets ("1d,2h" or "off", see
+        task_reminders).  Raises ValueError for an empty title, an unknown
+        priority, a bad rule or offset, a reminder without a due date or a
+        due date that is not YYYY-MM-DD.
+        """
+        title = title.strip()
+        if not title:
+            raise ValueError("Task title cannot be empty")
+        if priority not in PRIORITY_LEVELS:
+            raise ValueError(f"Unknown priority '{priority}' (expected High, Medium or Low)")
+        due_date = validate_due_date(due_date)
+        if recurrence:
+            rule = Recurrence.parse(str(recurrence))
+            if due_date == NO_DUE_DATE:
+                due_date = date.today().isoformat()
+            recurrence = str(rule.anchored(date.fromisoformat(due_date)))
+        if remind:
+            remind = canonical_offsets(str(remind))
+            if remind != "off" and due_date == NO_DUE_DATE:
+                raise ValueError("A reminder needs a due date")
+        self.ensure_loaded()
+        self.refresh()
+        task = Task.from_dict({
+            'id': self.store.allocate_id(),
+            'title': title,
+            'description': description,
+            'category': category or "Other",
+            'priority': priority,
+            'due_date': due_date,
+            'completed': False,
+            'created_date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'completed_date': None
+        })
+        if recurrence:
+            task['recurrence'] = recurrence
+        if remind:
+            task['remind'] = remind
+        if not self.store.indexed:
+            self._insert_task(task)
+        if self._agenda is not None:
+            self._agenda.add(task)
+        if self.reminders is not None:
+            self.reminders.schedule(task)
+        self._changed()
+        with METRICS.timer('store_record', op='add'):
+            self.store.record_add(self.tasks, task)
+        return task
+
+    def complete(self, task_id):
+        """Mark a task completed; returns it, or None if there is no such pending task
+
+        Completing a repeating task adds its next occurrence as a new task
+        (see task_recurrence.next_due_date).
+        """
+        task = self.get(task_id)
+        if task is None or task['completed']:
+            return None
+        task['completed'] = True
+        task['completed_date'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.recurring.pop(task['id'], None)
+        if self._agenda is not None:
+            self._agenda.remove(task)
+        if self.reminders is not None:
+            self.reminders.cancel(task)
+        self._changed()
+        with METRICS.timer('store_record', op='complete'):
+            self.store.record_complete(self.tasks, task)
+        if task.get('recurrence'):
+            self.add(task['title'], task['description'], task['category'], task['priority'],
+                     next_due_date(task), recurrence=task['recurrence'], remind=task.get('remind'))
+        return task
+
+    def delete(self, task_id):
+        """Delete a task; returns it, or None if there is no such task"""
+        task = self.get(task_id)
+        if task is None:
+            return None
+        if not self.store.indexed:
+            self._remove_task(task)
+        if self._agenda is not None:
+            self._agenda.remove(task)
+        if self.reminders is not None:
+            self.reminders.cancel(task)
+        self._changed()
+        with METRICS.timer('store_record', op='delete'):
+            self.store.record_delete(self.tasks, task)
+        return task
+
+    def import_tasks(self, rows):
+        """Add every task dict from rows with a single write; returns how many
+
+        Rows come from task_io readers (no id). The store is written once at
+        the end, and SQLite inserts the whole stream in one transaction.
+        """
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # Rebuilt on next use: one heapify beats a push per imported task
+        self._agenda = None
+        self._changed()
+        if self.store.indexed:
+            with METRICS.timer('store_record', op='import'):
+                imported = self.store.record_bulk_add(
+                    self.tasks, (dict(row, created_date=row['created_date'] or now) for row in rows)
+                )
+            self._reload_reminders()
+            return imported
+        self.ensure_loaded()
+        self.refresh()
+        rows = list(rows)
+        first_id = self.store.allocate_ids(len(rows))
+        new_tasks = [
+            Task.from_dict(dict(row, id=first_id + offset, created_date=row['created_date'] or now))
+            for offset, row in enumerate(rows)
+        ]
+        self._insert_tasks(new_tasks)
+        self._changed()
+        with METRICS.timer('store_record', op='import'):
+            imported = self.store.record_bulk_add(self.tasks, new_tasks)
+        self._reload_reminders()
+        return imported
+
+    def archive_completed(self, older_than_days, today=None):
+        """Move tasks completed more than older_than_days days ago to the archive; returns how many
+
+        The tasks are written to the archive first and then removed from
+        the store in one write.  Tasks without a completion date stay.
+        """
+        if older_than_days < 0:
+            raise ValueError("older_than_days cannot be negative")
+        today = today or date.today()
+        # Timestamps are "YYYY-MM-DD HH:MM:SS", so anything from an earlier day sorts first
+        cutoff = (today - timedelta(days=older_than_days)).isoformat()
+        if self.store.indexed:
+            old = list(self.store.iter_completed_before(cutoff))
+        else:
+            self.ensure_loaded()
+            self.refresh()
+            old = [
+                task for task in self.tasks.values()
+                if task['completed'] and task['completed_date'] and task['completed_date'] < cutoff
+            ]
+        if not old:
+            return 0
+        self.archive.append(old)
+        if not self.store.indexed:
+            self._remove_tasks(old)
+        self._changed()
+        with METRICS.timer('store_record', op='archive'):
+            self.store.record_bulk_delete(self.tasks, old)
+        return len(old)
+
+    def agenda(self, limit=10, today=None, weights=None):
+        """Return [(task, urgency)] for the most urgent pending tasks, most urgent first
+
+        weights (an UrgencyWeights) replaces self.urgency.  The ranking is
+        built once from the pending tasks, then kept up to date by add,
+        complete and delete; a query costs O(limit log limit) plus the
+        tasks whose due window starts or ends on the days since the last
+        one (see task_agenda).
+        """
+        if not self.store.indexed:
+            self.ensure_loaded()
+        self.refresh()
+        if weights is not None and weights != self.urgency:
+            self.urgency = weights
+            self._agenda = None
+        if self._agenda is None:
+            with METRICS.timer('agenda_build'):
+                self._agenda = Agenda.build(self.iter_pending(), self.urgency, today)
+        ranked = self._agenda.top(limit, today)
+        if self.store.indexed:
+            return [(self.store.get_task(task_id), score) for task_id, score in ranked]
+        return [(self.tasks[task_id], score) for task_id, score in ranked]
+
+    def start_reminders(self, sinks, default_offsets=(), due_time=DEFAULT_DUE_TIME, run=True):
+        """Notify sinks as the reminders of pending tasks come due; returns how many are scheduled
+
+        default_offsets (seconds before the due time) apply to tasks
+        without their own 'remind'.  Adding, completing and deleting tasks
+        update the schedule, and so do changes from other processes,
+        picked up whenever the engine refreshes.  run=False only builds
+        the schedule (see reminders.upcoming()) without delivering.  While
+        a background load is running the loader schedules them, and 0 is
+        returned.
+        """
+        self.stop_reminders()
+        scheduled = 0
+        with self._reminders_lock:
+            self.reminders = ReminderScheduler(sinks, default_offsets, due_time)
+            if self._loaded.is_set():
+                scheduled = self._reload_reminders()
+            elif self._loader is None:
+                self.ensure_loaded()
+                scheduled = len(self.reminders)
+        if run:
+            self.reminders.start()
+        return scheduled
+
+    def stop_reminders(self):
+        if self.reminders is not None:
+            self.reminders.stop()
+            self.reminders = None
+
+    def _reload_reminders(self):
+        """Schedule the reminders of every task due from today on (earlier ones have passed)"""
+        if self.reminders is None:
+            return 0
+        today = date.today()
+        if self.store.indexed:
+            tasks = self.store.iter_due_between(today, None)
+        else:
+            tasks = (self.tasks[task_id] for task_id in self.due_index.ids_between(today.toordinal(), None))
+        with METRICS.timer('reminders_load'):
+            return self.reminders.load(tasks)
+
+    def iter_archived(self, text=None):
+        """Yield archived tasks, only those matching a search query if text is given"""
+        if text:
+            return self.archive.search(text)
+        return self.archive.iter_tasks()
+
+    # Queries: use the in-memory indexes, delegate to an indexed store, or
+    # stream from the file while the tasks are not loaded yet
+
+    def get(self, task_id):
+        """Look a task up by id, or return None"""
+        if self.store.indexed:
+            return self.store.get_task(task_id)
+        self.ensure_loaded()
+        self.refresh()
+        return self.tasks.get(task_id)
+
+    def count(self):
+        """Return (total, completed) from the store's running totals"""
+        self.refresh()
+        return self.store.task_stats.total, self.store.task_stats.completed
+
+    def stats(self):
+        """Return a copy of the running TaskStats"""
+        self.refresh()
+        return TaskStats.from_dict(self.store.task_stats.to_dict())
+
+    def iter_tasks(self):
+        """Yield every task"""
+        self.refresh()
+        if self.store.indexed:
+            return METRICS.counted(self.store.iter_tasks(), 'tasks_scanned', source='sqlite')
+        if self.streaming:
+            return METRICS.counted(self.store.iter_stream(), 'tasks_scanned', source='stream')
+        return METRICS.counted(iter(self.tasks.values()), 'tasks_scanned', source='memory')
+
+    def iter_pending(self):
+        """Yield tasks that are not completed"""
+        self.refresh()
+        if self.store.indexed:
+            return self.store.iter_pending()
+        return (task for task in self.iter_tasks() if not task['completed'])
+
+    def iter_by_category(self):
+        """Yield tasks grouped by category"""
+        return self._cached('by_category', (), self._iter_by_category)
+
+    def _iter_by_category(self):
+        if self.store.indexed:
+            return self.store.iter_by_category()
+        self.ensure_loaded()
+        return METRICS.counted((
+            self.tasks[task_id]
+            for category in self.category_index.keys()
+            for task_id in self.category_index.ids(category)
+        ), 'index_hits', index='category')
+
+    def iter_by_priority(self):
+        """Yield tasks ordered High, Medium, Low"""
+        return self._cached('by_priority', (), self._iter_by_priority)
+
+    def _iter_by_priority(self):
+        if self.store.indexed:
+            return self.store.iter_by_priority()
+        self.ensure_loaded()
+        return METRICS.counted((
+            self.tasks[task_id]
+            for priority in self.priority_index.keys(PRIORITY_LEVELS)
+            for task_id in self.priority_index.ids(priority)
+        ), 'index_hits', index='priority')
+
+    def iter_due_between(self, start, end):
+        """Yield tasks due between two dates (inclusive, None = open ended), in due date order
+
+        With an end date the later occurrences of repeating tasks that fall
+        in the range are merged in (see iter_occurrences).
+        """
+        return self._cached('due_between', (start, end), lambda: self._with_occurrences(
+            self._iter_due_between(start, end), start, end, 'due'
+        ))
+
+    def iter_recurring(self):
+        """Yield the pending repeating tasks (the stored occurrence of each series)"""
+        self.refresh()
+        if self.store.indexed:
+            return self.store.iter_recurring()
+        if self.streaming:
+            return (
+                Task.from_dict(task) for task in self.store.iter_stream()
+                if not task['completed'] and task.get('recurrence')
+            )
+        return iter(list(self.recurring.values()))
+
+    def iter_occurrences(self, start, end, today=None):
+        """Yield virtual occurrences of repeating tasks due from start to end, in due date order
+
+        Each series is expanded lazily from the first date in the range,
+        and never before today: missed days are not shown twice.
+        """
+        today = today or date.today()
+        start = max(start or today, today)
+        return heapq.merge(
+            *(occurrences(task, start, end) for task in self.iter_recurring()), key=sort_key('due')
+        )
+
+    def _with_occurrences(self, tasks, start, end, order=None, task_filter=None):
+        """Add the virtual occurrences from start to end to tasks
+
+        Merged in when tasks are sorted by the field order, else appended;
+        only occurrences matching task_filter (and its search words) are
+        added.
+        """
+        if end is None:
+            return tasks
+        extra = self.iter_occurrences(start, end)
+        if task_filter is not None:
+            extra = (task for task in extra if task_filter.matches(task))
+            if task_filter.text:
+                groups = parse_query(task_filter.text)
+                extra = (task for task in extra if matches_query(task, groups))
+        if order is None:
+            return chain(tasks, extra)
+        if order != 'due':
+            # Occurrences come in due date order; the range bounds this list
+            extra = sorted(extra, key=sort_key(order))
+        return heapq.merge(tasks, extra, key=sort_key(order))
+
+    def _iter_due_between(self, start, end):
+        self.refresh()
+        if self.store.indexed:
+            return self.store.iter_due_between(start, end)
+        low = start.toordinal() if start else None
+        high = end.toordinal() if end else None
+        if self.streaming:
+            return (
+                task for task in METRICS.counted(self.store.iter_stream(), 'tasks_scanned', source='stream')
+                if (ordinal := due_ordinal(task['due_date'])) is not None
+                and (low is None or ordinal >= low) and (high is None or ordinal <= high)
+            )
+        return METRICS.counted(
+            (self.tasks[task_id] for task_id in self.due_index.ids_between(low, high)), 'index_hits', index='due'
+        )
+
+    def iter_overdue(self, today=None):
+        """Yield pending tasks whose due date is before today"""
+        today = today or date.today()
+        return self._cached('overdue', (today,), lambda: (
+            task for task in self._iter_due_between(None, today - timedelta(days=1))
+            if not task['completed']
+        ))
+
+    def search(self, text, limit=None):
+        """Yield tasks matching a search query, best match first"""
+        return self._cached('search', (text, limit), lambda: self._search(text, limit))
+
+    def _search(self, text, limit=None):
+        self.refresh()
+        if self.store.indexed:
+            return self.store.iter_matching(text, limit)
+        if self.streaming:
+            groups = parse_query(text)
+            return islice((
+                task for task in METRICS.counted(self.store.iter_stream(), 'tasks_scanned', source='stream')
+                if matches_query(task, groups)
+            ), limit)
+        return METRICS.counted(iter(self.search_index.search(text, limit)), 'index_hits', index='search')
+
+    def _iter_bucket(self, index, value):
+        """Yield the tasks whose category or priority is value in any case, oldest first"""
+        self.refresh()
+        self.ensure_loaded()
+        ids = heapq.merge(*(index.ids(key) for key in self._matching_keys(value, index.buckets)))
+        return METRICS.counted((self.tasks[task_id] for task_id in ids), 'index_hits', index=index.field)
+
+    def query(self, completed=None, category=None, priority=None,
+              due_from=None, due_to=None, text=None, limit=None, offset=0, sort=None):
+        """Yield tasks matching every given filter (None = any)
+
+        See find() for how the tasks are read.  offset skips that many
+        matches before limit counts; sort is a task_query sort field
+        ("-due" for descending).
+        """
+        return self.find(TaskFilter(
+            completed=completed, category=category, priority=priority,
+            due_from=due_from, due_to=due_to, text=text or None,
+            sort=sort.lstrip("-") if sort else None, descending=bool(sort and sort.startswith("-")),
+            limit=limit, offset=offset
+        ))
+
+    def _matching_keys(self, value, counts):
+        """Every stored spelling of a category or priority that matches value in any case"""
+        value = value.lower()
+        return [key for key in counts if key.lower() == value]
+
+    def plan(self, task_filter):
+        """Choose where to read a filter's tasks from
+
+        Returns (source, estimated tasks read, candidates).  Every index
+        that can answer part of the filter is sized from counts it already
+        has (bucket sizes, two bisects on the due index, search posting
+        sizes) and the smallest one is read; the other conditions are
+        checked on each task it yields.  Search words without a sort always
+        read the search index so results stay ranked by relevance.
+        """
+        self.refresh()
+        stats = self.store.task_stats
+        candidates = []
+        if task_filter.text:
+            if self.store.indexed or self.streaming:
+                estimate = stats.total
+            else:
+                estimate = self.search_index.estimate(task_filter.text)
+            candidates.append(('search', estimate))
+            if task_filter.sort is None or self.streaming:
+                return 'search', estimate, candidates
+        if self.streaming:
+            # Only the file stream exists until the background load finishes
+            return 'all', stats.total, candidates + [('all', stats.total)]
+        if task_filter.due_range:
+            if self.store.indexed:
+                estimate = self.store.count_due_between(task_filter.due_from, task_filter.due_to)
+            else:
+                low = task_filter.due_from.toordinal() if task_filter.due_from else None
+                high = task_filter.due_to.toordinal() if task_filter.due_to else None
+                estimate = self.due_index.count_between(low, high)
+            candidates.append(('due', estimate))
+        if task_filter.category is not None:
+            keys = self._matching_keys(task_filter.category, stats.by_category)
+            candidates.append(('category', sum(stats.by_category[key] for key in keys)))
+        if task_filter.priority is not None:
+            keys = self._matching_keys(task_filter.priority, stats.by_priority)
+            candidates.append(('priority', sum(stats.by_priority[key] for key in keys)))
+        if task_filter.completed is False and self.store.indexed:
+            # Only SQLite has an index on the completed flag
+            candidates.append(('pending', stats.pending))
+        candidates.append(('all', stats.total))
+        source, estimate = min(candidates, key=lambda candidate: candidate[1])
+        return source, estimate, candidates
+
+    def _source(self, source, task_filter):
+        """Iterator over the tasks of one planned source"""
+        if source == 'search':
+            only_text = (task_filter.sort is None and task_filter.completed is None and task_filter.category is None
+                         and task_filter.priority is None and not task_filter.due_range and task_filter.has_due is None)
+            limit = task_filter.offset + task_filter.limit if only_text and task_filter.limit is not None else None
+            return self._search(task_filter.text, limit)
+        if source == 'due':
+            return self._iter_due_between(task_filter.due_from, task_filter.due_to)
+        if source == 'category':
+            if self.store.indexed:
+                return self.store.iter_bucket('category', task_filter.category)
+            return self._iter_bucket(self.category_index, task_filter.category)
+        if source == 'priority':
+            if self.store.indexed:
+                return self.store.iter_bucket('priority', task_filter.priority)
+            return self._iter_bucket(self.priority_index, task_filter.priority)
+        if source == 'pending':
+            return self.iter_pending()
+        return self.iter_tasks()
+
+    def _source_order(self, source):
+        """Sort field a source already yields its tasks in (None = search relevance)"""
+        if source == 'due':
+            return 'due'
+        if source == 'search' and not self.store.indexed and not self.streaming:
+            return None
+        return 'id'
+
+    def _sort_method(self, task_filter, source):
+        """How find() orders the matches: 'none', 'stream', 'heap' or 'sort'"""
+        if task_filter.sort is None:
+            return 'none'
+        if task_filter.sort == self._source_order(source) and not task_filter.descending:
+            return 'stream'
+        return 'heap' if task_filter.limit is not None else 'sort'
+
+    def find(self, task_filter):
+        """Yield the tasks matching a TaskFilter (see task_query), planned by plan()
+
+        Matches stream lazily from the chosen source.  With a sort they are
+        streamed as-is when the source already yields that order, picked
+        with a bounded heap when there is a limit, and sorted otherwise.
+        """
+        return self._cached('find', tuple(vars(task_filter).items()), lambda: self._find(task_filter))
+
+    def _find(self, task_filter):
+        source, _, _ = self.plan(task_filter)
+        METRICS.count('query_plans', source=source)
+        tasks = self._source(source, task_filter)
+
+        conditions = (
+            task_filter.completed is not None or task_filter.category is not None
+            or task_filter.priority is not None or task_filter.due_range or task_filter.has_due is not None
+        )
+        if conditions:
+            tasks = (task for task in tasks if task_filter.matches(task))
+        if task_filter.text and source != 'search':
+            groups = parse_query(task_filter.text)
+            tasks = (task for task in tasks if matches_query(task, groups))
+
+        method = self._sort_method(task_filter, source)
+        if task_filter.due_range and task_filter.completed is not True:
+            # Repeating tasks' later occurrences in the date range
+            tasks = self._with_occurrences(
+                tasks, task_filter.due_from, task_filter.due_to,
+                task_filter.sort if method == 'stream' else None, task_filter
+            )
+
+        offset, limit = task_filter.offset, task_filter.limit
+        if method == 'heap':
+            pick = heapq.nlargest if task_filter.descending else heapq.nsmallest
+            tasks = iter(pick(offset + limit, tasks, key=sort_key(task_filter.sort))[offset:])
+            offset, limit = 0, None
+        elif method == 'sort':
+            tasks = iter(sorted(tasks, key=sort_key(task_filter.sort), reverse=task_filter.descending))
+        if offset or limit is not None:
+            tasks = islice(tasks, offset, None if limit is None else offset + limit)
+        return METRICS.counted(tasks, 'tasks_matched')
+
+    def explain(self, task_filter):
+        """Describe how find() would run a filter, for --explain"""
+        source, estimate, candidates = self.plan(task_filter)
+        return {
+            'source': source,
+            'estimated_tasks': estimate,
+            'candidates': dict(candidates),
+            'sort': self._sort_method(task_filter, source),
+        }
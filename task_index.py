@@ -0,0 +1,138 @@
+"""
+Secondary indexes over the in-memory task map
+
+DueDateIndex keeps (due ordinal, task id) pairs sorted, so a date range is
+two bisects plus the matching entries instead of a scan of every task.
+BucketIndex groups task ids by category or priority so the grouped views
+can stream buckets without sorting or regrouping.
+"""
+
+import bisect
+from datetime import date
+
+
+def due_ordinal(due_date):
+    """Turn a YYYY-MM-DD due date into a day number (None for "No due date")"""
+    try:
+        return date.fromisoformat(due_date).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def task_due_ordinal(task):
+    """Due day ordinal of a Task or task dict"""
+    if isinstance(task, dict):
+        return due_ordinal(task['due_date'])
+    return task.due_ordinal
+
+
+class DueDateIndex:
+    """Sorted (due ordinal, task id) pairs for tasks that have a due date"""
+
+    def __init__(self):
+        self.entries = []
+
+    @classmethod
+    def build(cls, tasks):
+        """Index every task in one sort"""
+        index = cls()
+        index.entries = sorted(
+            (ordinal, task['id'])
+            for ordinal, task in ((task_due_ordinal(task), task) for task in tasks)
+            if ordinal is not None
+        )
+        return index
+
+    def add(self, task):
+        """Index a new task"""
+        ordinal = task_due_ordinal(task)
+        if ordinal is not None:
+            bisect.insort(self.entries, (ordinal, task['id']))
+
+    def add_many(self, tasks):
+        """Index a batch of new tasks with one sort instead of an insert each"""
+        self.entries.extend(
+            (ordinal, task['id'])
+            for ordinal, task in ((task_due_ordinal(task), task) for task in tasks)
+            if ordinal is not None
+        )
+        self.entries.sort()
+
+    def remove(self, task):
+        """Drop a deleted task from the index"""
+        ordinal = task_due_ordinal(task)
+        if ordinal is None:
+            return
+        position = bisect.bisect_left(self.entries, (ordinal, task['id']))
+        if position < len(self.entries) and self.entries[position] == (ordinal, task['id']):
+            del self.entries[position]
+
+    def remove_many(self, tasks):
+        """Drop a batch of deleted tasks with one pass over the index"""
+        gone = {task['id'] for task in tasks}
+        self.entries = [entry for entry in self.entries if entry[1] not in gone]
+
+    def count_between(self, start, end):
+        """Number of tasks due from day ordinal start to end (two bisects)"""
+        low = 0 if start is None else bisect.bisect_left(self.entries, (start, 0))
+        high = len(self.entries) if end is None else bisect.bisect_left(self.entries, (end + 1, 0))
+        return max(high - low, 0)
+
+    def ids_between(self, start, end):
+        """Yield ids of tasks due from day ordinal start to end (inclusive)
+
+        Either bound may be None for an open range.
+        """
+        low = 0 if start is None else bisect.bisect_left(self.entries, (start, 0))
+        high = len(self.entries) if end is None else bisect.bisect_left(self.entries, (end + 1, 0))
+        for position in range(low, high):
+            yield self.entries[position][1]
+
+
+class BucketIndex:
+    """Task ids grouped by the value of one field (category or priority)
+
+    Each bucket is an insertion-ordered dict used as a set, so adds and
+    removes are O(1) and tasks stay in the order they were created.
+    """
+
+    def __init__(self, field):
+        self.field = field
+        self.buckets = {}
+
+    @classmethod
+    def build(cls, field, tasks):
+        """Index every task"""
+        index = cls(field)
+        for task in tasks:
+            index.add(task)
+        return index
+
+    def add(self, task):
+        """Index a new task"""
+        self.buckets.setdefault(task[self.field], {})[task['id']] = None
+
+    def remove(self, task):
+        """Drop a deleted task from the index"""
+        bucket = self.buckets.get(task[self.field])
+        if bucket is None:
+            return
+        bucket.pop(task['id'], None)
+        if not bucket:
+            del self.buckets[task[self.field]]
+
+    def keys(self, order=None):
+        """Bucket values, in the given order or sorted"""
+        if order is None:
+            return sorted(self.buckets)
+        return [key for key in order if key in self.buckets] + sorted(
+            key for key in self.buckets if key not in order
+        )
+
+    def ids(self, key):
+        """Ids in one bucket, oldest first"""
+        return iter(self.buckets.get(key, ()))
+
+    def count(self, key):
+        """Number of tasks in one bucket"""
+        return len(self.buckets.get(key, ()))
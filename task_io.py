@@ -0,0 +1,136 @@
+"""
+Import and export formats for the task CLI
+
+Readers yield one normalized task dict per input row, and writers stream
+tasks to a file one at a time, so neither side needs the whole data set
+as a list.
+"""
+
+import csv
+import json
+from datetime import date
+
+from task_model import NO_DUE_DATE, TASK_FIELDS, json_default
+from task_recurrence import Recurrence
+from task_reminders import canonical_offsets
+from task_render import format_task_line
+from task_storage import PRIORITY_LEVELS
+
+FORMATS = ("text", "ndjson", "csv", "json")
+
+
+def normalize_task_row(row):
+    """Turn an imported row into a task dict without an id
+
+    Missing or invalid values fall back to the same defaults as the
+    interactive add: category "Other", priority "Medium", no due date.
+    """
+    title = (row.get('title') or "").strip()
+    if not title:
+        raise ValueError("task title cannot be empty")
+
+    priority = (row.get('priority') or "").strip().capitalize()
+    if priority not in PRIORITY_LEVELS:
+        priority = "Medium"
+
+    due_date = (row.get('due_date') or "").strip() or NO_DUE_DATE
+    if due_date != NO_DUE_DATE:
+        try:
+            date.fromisoformat(due_date)
+        except ValueError:
+            due_date = NO_DUE_DATE
+
+    completed = row.get('completed', False)
+    if isinstance(completed, str):
+        completed = completed.strip().lower() in ("1", "true", "yes", "y", "x", "✓")
+
+    recurrence = (row.get('recurrence') or "").strip()
+    if recurrence:
+        try:
+            rule = Recurrence.parse(recurrence)
+        except ValueError:
+            rule = None
+        if rule is not None and due_date == NO_DUE_DATE:
+            due_date = date.today().isoformat()
+        recurrence = str(rule.anchored(date.fromisoformat(due_date))) if rule else ""
+
+    remind = (row.get('remind') or "").strip()
+    if remind:
+        try:
+            remind = canonical_offsets(remind)
+        except ValueError:
+            remind = ""
+
+    task = {
+        'id': None,
+        'title': title,
+        'description': (row.get('description') or "").strip(),
+        'category': (row.get('category') or "").strip() or "Other",
+        'priority': priority,
+        'due_date': due_date,
+        'completed': bool(completed),
+        'created_date': row.get('created_date') or None,
+        'completed_date': (row.get('completed_date') or None) if completed else None,
+    }
+    if recurrence:
+        task['recurrence'] = recurrence
+    if remind:
+        task['remind'] = remind
+    return task
+
+
+def read_csv_tasks(file):
+    """Yield tasks from a CSV file with a header row of task field names"""
+    for row in csv.DictReader(file):
+        yield normalize_task_row(row)
+
+
+def read_ndjson_tasks(file):
+    """Yield tasks from a file with one JSON task per line
+
+    Lines without a title (such as the header of a tasks.ndjson file) are
+    skipped.
+    """
+    for line in file:
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        if 'title' in row:
+            yield normalize_task_row(row)
+
+
+READERS = {
+    'csv': read_csv_tasks,
+    'ndjson': read_ndjson_tasks,
+}
+
+
+def guess_format(filename, default):
+    """Pick a format from a file extension"""
+    for extension, name in ((".csv", 'csv'), (".ndjson", 'ndjson'), (".jsonl", 'ndjson'), (".json", 'json')):
+        if filename and filename.lower().endswith(extension):
+            return name
+    return default
+
+
+def write_tasks(tasks, file, fmt="text"):
+    """Stream tasks to a file in the given format; returns how many were written"""
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(file)
+        writer.writerow(TASK_FIELDS + ('recurrence', 'remind'))
+        for count, task in enumerate(tasks, 1):
+            writer.writerow([task[field] for field in TASK_FIELDS]
+                            + [task.get('recurrence') or "", task.get('remind') or ""])
+    elif fmt == "json":
+        file.write("[")
+        for count, task in enumerate(tasks, 1):
+            file.write(("," if count > 1 else "") + "\n  " + json.dumps(task, default=json_default))
+        file.write("\n]\n")
+    elif fmt == "ndjson":
+        for count, task in enumerate(tasks, 1):
+            file.write(json.dumps(task, default=json_default) + "\n")
+    else:
+        for count, task in enumerate(tasks, 1):
+            file.write(format_task_line(task) + "\n")
+    return count
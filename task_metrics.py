@@ -0,0 +1,229 @@
+"""
+Opt-in instrumentation: timers, counters and per-action profiles
+
+The storage backends, the engine and the menu report what they do to the
+shared METRICS object.  It is disabled by default, and then every hook
+costs one attribute check (timer() hands back a shared no-op context
+manager), so normal runs pay close to nothing.  When enabled with
+--metrics, it collects:
+
+  * timers: call count, total and maximum seconds per operation
+  * counters: bytes read and written, tasks scanned, index hits, ...
+  * optionally a cProfile file and a tracemalloc peak per menu action
+
+and dumps them as text or Prometheus exposition format on exit.
+"""
+
+import cProfile
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+METRIC_PREFIX = "task_manager_"
+
+_NULL_CONTEXT = nullcontext()
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class _Timer:
+    """Context manager that records one timing"""
+
+    __slots__ = ('metrics', 'key', 'started')
+
+    def __init__(self, metrics, key):
+        self.metrics = metrics
+        self.key = key
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics._observe(self.key, time.perf_counter() - self.started)
+
+
+class _CountingOutput:
+    """Wraps sys.stdout to time terminal writes and count the bytes printed"""
+
+    def __init__(self, metrics, stream):
+        self._metrics = metrics
+        self._stream = stream
+
+    def write(self, text):
+        started = time.perf_counter()
+        written = self._stream.write(text)
+        self._metrics._observe(('terminal_write', ()), time.perf_counter() - started)
+        self._metrics.count('terminal_bytes', len(text.encode('utf-8', 'replace')))
+        return written
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class Metrics:
+    """Registry of timers, counters and gauges (a no-op until enabled)"""
+
+    def __init__(self):
+        self.enabled = False
+        self.profile_dir = None
+        self.trace_memory = False
+        # (name, labels) -> value, or [count, total seconds, max seconds] for timers
+        self.counters = {}
+        self.gauges = {}
+        self.timers = {}
+        self.actions = 0
+        self._lock = threading.Lock()
+
+    def enable(self, profile_dir=None, trace_memory=False, wrap_output=True):
+        """Start collecting; optionally profile menu actions and trace their memory"""
+        self.enabled = True
+        self.profile_dir = profile_dir
+        self.trace_memory = trace_memory
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+        if wrap_output and not isinstance(sys.stdout, _CountingOutput):
+            sys.stdout = _CountingOutput(self, sys.stdout)
+
+    # Recording
+
+    def count(self, name, amount=1, **labels):
+        """Add amount to a counter"""
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def gauge_max(self, name, value, **labels):
+        """Keep the largest value seen for a gauge"""
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self.gauges[key] = max(self.gauges.get(key, value), value)
+
+    def timer(self, name, **labels):
+        """Context manager timing its block (a shared no-op when disabled)"""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return _Timer(self, _key(name, labels))
+
+    def counted(self, items, name, **labels):
+        """Pass items through, counting them once the iteration ends"""
+        if not self.enabled:
+            return items
+        return self._count_items(items, name, labels)
+
+    def _count_items(self, items, name, labels):
+        seen = 0
+        try:
+            for seen, item in enumerate(items, 1):
+                yield item
+        finally:
+            self.count(name, seen, **labels)
+
+    def _observe(self, key, seconds):
+        with self._lock:
+            timing = self.timers.get(key)
+            if timing is None:
+                self.timers[key] = [1, seconds, seconds]
+            else:
+                timing[0] += 1
+                timing[1] += seconds
+                if seconds > timing[2]:
+                    timing[2] = seconds
+
+    @contextmanager
+    def capture(self, action):
+        """Time one menu action or command, with cProfile and tracemalloc if requested"""
+        if not self.enabled:
+            yield
+            return
+        self.actions += 1
+        profiler = cProfile.Profile() if self.profile_dir else None
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        if profiler:
+            profiler.enable()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._observe(_key('action', {'action': action}), time.perf_counter() - started)
+            if profiler:
+                profiler.disable()
+                safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", action)
+                profiler.dump_stats(os.path.join(self.profile_dir, f"{self.actions:03d}-{safe_name}.prof"))
+            if tracing:
+                self.gauge_max('action_peak_memory_bytes', tracemalloc.get_traced_memory()[1], action=action)
+                tracemalloc.stop()
+
+    # Output
+
+    def render_text(self):
+        """Human-readable summary, slowest timers first"""
+        lines = []
+        if self.timers:
+            lines.append(f"{'timer':<50} {'calls':>8} {'total s':>10} {'mean ms':>10} {'max ms':>10}")
+            for (name, labels), (calls, total, longest) in sorted(
+                    self.timers.items(), key=lambda item: -item[1][1]):
+                lines.append(f"{name + _format_labels(labels):<50} {calls:>8} {total:>10.3f} "
+                             f"{total / calls * 1000:>10.3f} {longest * 1000:>10.3f}")
+        if self.counters or self.gauges:
+            lines.append("")
+            lines.append(f"{'counter':<50} {'value':>12}")
+            for (name, labels), value in sorted(list(self.counters.items()) + list(self.gauges.items())):
+                lines.append(f"{name + _format_labels(labels):<50} {value:>12,}")
+        return "\n".join(lines) + "\n"
+
+    def render_prometheus(self):
+        """Prometheus text exposition format"""
+        lines = []
+
+        def family(items, metric_type, suffix=""):
+            declared = set()
+            for (name, labels), value in sorted(items):
+                metric = METRIC_PREFIX + name + suffix
+                if metric not in declared:
+                    declared.add(metric)
+                    lines.append(f"# TYPE {metric} {metric_type}")
+                yield metric, labels, value
+
+        for metric, labels, value in family(self.counters.items(), "counter", "_total"):
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+        for metric, labels, value in family(self.gauges.items(), "gauge"):
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+        for metric, labels, (calls, total, longest) in family(self.timers.items(), "summary", "_seconds"):
+            lines.append(f"{metric}_count{_format_labels(labels)} {calls}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {total:.6f}")
+        for metric, labels, (calls, total, longest) in family(self.timers.items(), "gauge", "_seconds_max"):
+            lines.append(f"{metric}{_format_labels(labels)} {longest:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, filename, fmt="text"):
+        """Write the collected metrics to a file ('-' for stderr)"""
+        text = self.render_prometheus() if fmt == "prometheus" else self.render_text()
+        if filename == "-":
+            sys.stderr.write(text)
+            return
+        with open(filename, "w", encoding="utf-8") as file:
+            file.write(text)
+
+
+METRICS = Metrics()
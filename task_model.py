@@ -0,0 +1,166 @@
+"""
+Compact in-memory task record
+
+A task loaded from JSON is a nine-key dict holding its own copies of the
+category, priority and date strings.  Task keeps the same fields in
+__slots__, shares one interned string per category/priority value, and
+stores dates as integers (day ordinals and seconds), turning them back into
+the original strings only when read.  Task supports task['field'] access so
+existing code keeps working, and to_dict() reproduces the JSON form exactly.
+"""
+
+import sys
+from datetime import date
+
+NO_DUE_DATE = "No due date"
+
+# Field order of the JSON schema written by save_tasks
+TASK_FIELDS = (
+    'id', 'title', 'description', 'category', 'priority',
+    'due_date', 'completed', 'created_date', 'completed_date'
+)
+
+
+def encode_day(text):
+    """'YYYY-MM-DD' -> day ordinal; anything else is kept as the original string"""
+    if isinstance(text, str) and len(text) == 10 and text[4] == '-' and text[7] == '-':
+        try:
+            return date(int(text[:4]), int(text[5:7]), int(text[8:])).toordinal()
+        except ValueError:
+            pass
+    return text
+
+
+def decode_day(value):
+    """Inverse of encode_day"""
+    if isinstance(value, int):
+        return date.fromordinal(value).isoformat()
+    return value
+
+
+def encode_timestamp(text):
+    """'YYYY-MM-DD HH:MM:SS' -> seconds since year 1; other values are kept as-is"""
+    if isinstance(text, str) and len(text) == 19 and text[10] == ' ' and text[13] == ':' and text[16] == ':':
+        day = encode_day(text[:10])
+        if isinstance(day, int) and text[11:13].isdigit() and text[14:16].isdigit() and text[17:].isdigit():
+            hours, minutes, seconds = int(text[11:13]), int(text[14:16]), int(text[17:])
+            if hours < 24 and minutes < 60 and seconds < 60:
+                return day * 86400 + hours * 3600 + minutes * 60 + seconds
+    return text
+
+
+def decode_timestamp(value):
+    """Inverse of encode_timestamp"""
+    if isinstance(value, int):
+        day, seconds = divmod(value, 86400)
+        hours, seconds = divmod(seconds, 3600)
+        minutes, seconds = divmod(seconds, 60)
+        return f"{date.fromordinal(day).isoformat()} {hours:02d}:{minutes:02d}:{seconds:02d}"
+    return value
+
+
+class Task:
+    """One task, stored compactly; read and written like the JSON dict"""
+
+    __slots__ = (
+        'id', 'title', 'description', 'category', 'priority',
+        'due', 'completed', 'created', 'completed_at', 'extra'
+    )
+
+    def __init__(self, id, title, description, category, priority,
+                 due_date, completed, created_date, completed_date, extra=None):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.category = sys.intern(category)
+        self.priority = sys.intern(priority)
+        self.due = None if due_date == NO_DUE_DATE else encode_day(due_date)
+        self.completed = completed
+        self.created = encode_timestamp(created_date)
+        self.completed_at = encode_timestamp(completed_date)
+        # Keys outside the standard schema, kept for a lossless round trip
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a Task from a task dict as stored in tasks.json"""
+        extra = {key: value for key, value in data.items() if key not in TASK_FIELDS} or None
+        return cls(
+            data['id'], data['title'], data.get('description', ''),
+            data['category'], data['priority'], data['due_date'],
+            data['completed'], data.get('created_date'), data.get('completed_date'),
+            extra
+        )
+
+    @classmethod
+    def from_slots(cls, values):
+        """Build a Task from the tuple slots() returned, without re-encoding anything"""
+        task = cls.__new__(cls)
+        (task.id, task.title, task.description, task.category, task.priority,
+         task.due, task.completed, task.created, task.completed_at, task.extra) = values
+        return task
+
+    def slots(self):
+        """The stored field values, in __slots__ order"""
+        return (self.id, self.title, self.description, self.category, self.priority,
+                self.due, self.completed, self.created, self.completed_at, self.extra)
+
+    def to_dict(self):
+        """The task as a JSON-ready dict, identical to what was loaded"""
+        data = {field: self[field] for field in TASK_FIELDS}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    @property
+    def due_ordinal(self):
+        """Due day as an ordinal, or None without a (valid) due date"""
+        return self.due if isinstance(self.due, int) else None
+
+    def __getitem__(self, key):
+        if key == 'due_date':
+            return NO_DUE_DATE if self.due is None else decode_day(self.due)
+        if key == 'created_date':
+            return decode_timestamp(self.created)
+        if key == 'completed_date':
+            return decode_timestamp(self.completed_at)
+        if key in TASK_FIELDS:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == 'due_date':
+            self.due = None if value == NO_DUE_DATE else encode_day(value)
+        elif key == 'created_date':
+            self.created = encode_timestamp(value)
+        elif key == 'completed_date':
+            self.completed_at = encode_timestamp(value)
+        elif key in ('category', 'priority'):
+            setattr(self, key, sys.intern(value))
+        elif key in TASK_FIELDS:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        return key in TASK_FIELDS or bool(self.extra and key in self.extra)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self):
+        return f"Task({self.to_dict()!r})"
+
+
+def json_default(obj):
+    """json.dump hook so Task objects serialize as their dict form"""
+    if isinstance(obj, Task):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,108 @@
+"""
+Projects: named task lists, one task file (shard) each
+
+The default project is the task file itself (tasks.json); a project
+named "work" lives in tasks.project-work.json (tasks.project-work.ndjson,
+.journal.json or .db with those backends); the "project-" prefix keeps shard names
+apart from the manifest and the task file's other companions.  A command
+opens only the project it works on, so a large project never slows down
+a small one.
+
+The manifest, "tasks.projects.json", holds every project's totals.  The
+overview lists all projects from it without opening their files, and
+whoever closes a project writes its new totals back.  search() fans a
+query out over every project on a thread pool.
+"""
+
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from task_engine import TaskEngine
+from task_storage import TaskFileLock, atomic_write_json, open_store, store_filename
+
+DEFAULT_PROJECT = "default"
+NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+MAX_SEARCH_WORKERS = 8
+
+
+def check_project_name(name):
+    """Return name if it can be used in a file name, else raise ValueError"""
+    if not NAME_PATTERN.match(name or ""):
+        raise ValueError(f"Invalid project name '{name}' (use letters, digits, '-' and '_')")
+    return name
+
+
+class Projects:
+    """The projects sharing one task file's directory and name
+
+    Stores are opened with backend and store_options, like open_store().
+    """
+
+    def __init__(self, filename="tasks.json", backend="json", **store_options):
+        self.filename = filename
+        self.backend = backend
+        self.store_options = store_options
+        self.root = filename[:-len(".json")] if filename.endswith(".json") else filename
+        self.manifest_filename = self.root + ".projects.json"
+        self._lock = TaskFileLock(self.manifest_filename + ".lock")
+
+    def shard_filename(self, name):
+        """The task file of a project (before open_store picks the backend's extension)"""
+        if check_project_name(name) == DEFAULT_PROJECT:
+            return self.filename
+        return f"{self.root}.project-{name}.json"
+
+    def store_filename(self, name):
+        """The file a project's tasks are kept in with this backend"""
+        return store_filename(self.shard_filename(name), self.backend)
+
+    def open_store(self, name, **options):
+        """Open a project's store (created on first write)"""
+        return open_store(self.shard_filename(name), self.backend, **dict(self.store_options, **options))
+
+    def read_manifest(self):
+        """name -> {'total', 'completed', 'updated'} as last recorded"""
+        try:
+            with open(self.manifest_filename, 'r') as file:
+                return json.load(file).get('projects', {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def names(self, current=None):
+        """Every recorded project and current (if given), the default first"""
+        names = set(self.read_manifest()) | ({current} if current else set())
+        return [DEFAULT_PROJECT] + sorted(names - {DEFAULT_PROJECT})
+
+    def record(self, name, stats):
+        """Save a project's totals in the manifest (skipped when they did not change)"""
+        counts = {'total': stats.total, 'completed': stats.completed}
+        entry = self.read_manifest().get(name, {})
+        if {key: entry.get(key) for key in counts} == counts:
+            return False
+        with self._lock:
+            # Other processes record their projects too: update only this entry
+            projects = self.read_manifest()
+            projects[name] = dict(counts, updated=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            atomic_write_json(self.manifest_filename, {'projects': projects}, indent=2)
+        return True
+
+    def _search_one(self, name, text, limit):
+        engine = TaskEngine(self.open_store(name), lazy=True, background=False, notify=None, cache_bytes=0)
+        try:
+            return list(engine.search(text, limit))
+        finally:
+            engine.close()
+
+    def search(self, text, limit=None, names=None):
+        """[(project, task)] for tasks matching a search query in every project
+
+        Each project is searched on its own thread with its own store;
+        results come project by project, each best match first, with at
+        most limit per project.
+        """
+        names = list(names or self.names())
+        with ThreadPoolExecutor(max_workers=min(MAX_SEARCH_WORKERS, len(names))) as pool:
+            results = pool.map(lambda name: self._search_one(name, text, limit), names)
+            return [(name, task) for name, tasks in zip(names, results) for task in tasks]
@@ -0,0 +1,198 @@
+"""
+Filter language for combined task queries
+
+One line combines what the separate views can only do one at a time:
+
+    category:Work priority:High due<=+7d !completed deploy sort:due limit:10
+
+  category:NAME  priority:NAME      (also cat:, c:, pri:, p:; any case)
+  completed / done, !completed / pending, overdue
+  due:DATE, due<DATE, due<=DATE, due>DATE, due>=DATE, due:none, due:any
+      DATE is YYYY-MM-DD, today, tomorrow, yesterday or +N/-N days
+      (+2w for weeks)
+  sort:FIELD or sort:-FIELD  (id, due, priority, created, title, category)
+  limit:N  offset:N
+  anything else is a search word ("OR" and prefixes work as in search)
+
+parse_filter() turns the text into a TaskFilter; TaskEngine.find() plans
+and runs it over the indexes.
+"""
+
+import re
+import shlex
+from datetime import date, timedelta
+
+from task_index import task_due_ordinal
+
+FIELD_ALIASES = {
+    'category': 'category', 'cat': 'category', 'c': 'category',
+    'priority': 'priority', 'pri': 'priority', 'p': 'priority',
+    'status': 'status', 'is': 'status',
+    'sort': 'sort', 'order': 'sort',
+    'limit': 'limit', 'offset': 'offset',
+}
+STATUS_WORDS = {
+    'completed': True, 'done': True, '!completed': False, '!done': False,
+    'pending': False, 'open': False, '!pending': True,
+}
+PRIORITY_RANK = {"High": 0, "Medium": 1, "Low": 2}
+SORT_FIELDS = ('id', 'due', 'priority', 'created', 'title', 'category')
+
+DUE_PATTERN = re.compile(r"^due(<=|>=|<|>|=|:)(.+)$", re.IGNORECASE)
+RELATIVE_DAYS = re.compile(r"^([+-]\d+)([dw]?)$")
+
+
+def parse_day(text, today=None):
+    """Parse YYYY-MM-DD, today, tomorrow, yesterday or +N/-N days (+Nw weeks) into a date"""
+    today = today or date.today()
+    word = text.lower()
+    if word == "today":
+        return today
+    if word == "tomorrow":
+        return today + timedelta(days=1)
+    if word == "yesterday":
+        return today - timedelta(days=1)
+    match = RELATIVE_DAYS.match(word)
+    if match:
+        return today + timedelta(days=int(match.group(1)) * (7 if match.group(2) == "w" else 1))
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"Invalid date '{text}' (use YYYY-MM-DD, today, tomorrow or +N days)")
+
+
+def sort_key(field):
+    """Key function for sort:FIELD; tasks without a value sort last, ties by id"""
+    if field == 'due':
+        return lambda task: (task_due_ordinal(task) is None, task_due_ordinal(task) or 0, task['id'])
+    if field == 'priority':
+        return lambda task: (PRIORITY_RANK.get(task['priority'], len(PRIORITY_RANK)), task['id'])
+    if field == 'created':
+        return lambda task: (task['created_date'] or "", task['id'])
+    if field == 'title':
+        return lambda task: (task['title'].lower(), task['id'])
+    if field == 'category':
+        return lambda task: (task['category'].lower(), task['id'])
+    return lambda task: task['id']
+
+
+class TaskFilter:
+    """A parsed query: every condition that is None matches any task"""
+
+    def __init__(self, completed=None, category=None, priority=None, due_from=None, due_to=None,
+                 has_due=None, text=None, sort=None, descending=False, limit=None, offset=0):
+        self.completed = completed
+        self.category = category
+        self.priority = priority
+        # Dates (inclusive); either one implies has_due
+        self.due_from = due_from
+        self.due_to = due_to
+        self.has_due = has_due
+        self.text = text
+        self.sort = sort
+        self.descending = descending
+        self.limit = limit
+        self.offset = offset
+
+    @property
+    def due_range(self):
+        return self.due_from is not None or self.due_to is not None
+
+    def matches(self, task):
+        """Check every condition except the search text"""
+        if self.completed is not None and task['completed'] != self.completed:
+            return False
+        if self.category is not None and task['category'].lower() != self.category.lower():
+            return False
+        if self.priority is not None and task['priority'].lower() != self.priority.lower():
+            return False
+        if self.has_due is not None or self.due_range:
+            ordinal = task_due_ordinal(task)
+            if self.has_due is not None and (ordinal is not None) != self.has_due:
+                return False
+            if self.due_range and (
+                ordinal is None
+                or (self.due_from is not None and ordinal < self.due_from.toordinal())
+                or (self.due_to is not None and ordinal > self.due_to.toordinal())
+            ):
+                return False
+        return True
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={value!r}" for name, value in vars(self).items()
+                           if value not in (None, False, 0))
+        return f"TaskFilter({fields})"
+
+
+def _narrow_due(task_filter, operator, day):
+    """Intersect the filter's due range with one comparison"""
+    if operator in ("<", "<="):
+        day = day - timedelta(days=1) if operator == "<" else day
+        task_filter.due_to = day if task_filter.due_to is None else min(task_filter.due_to, day)
+    if operator in (">", ">="):
+        day = day + timedelta(days=1) if operator == ">" else day
+        task_filter.due_from = day if task_filter.due_from is None else max(task_filter.due_from, day)
+    if operator in ("=", ":"):
+        _narrow_due(task_filter, ">=", day)
+        _narrow_due(task_filter, "<=", day)
+
+
+def parse_filter(text, today=None):
+    """Parse a filter line into a TaskFilter; raises ValueError for bad values"""
+    today = today or date.today()
+    try:
+        words = shlex.split(text)
+    except ValueError:
+        # An unbalanced quote: fall back to plain words
+        words = text.split()
+
+    task_filter = TaskFilter()
+    search_words = []
+    for word in words:
+        lowered = word.lower()
+        if lowered in STATUS_WORDS:
+            task_filter.completed = STATUS_WORDS[lowered]
+            continue
+        if lowered == "overdue":
+            task_filter.completed = False
+            _narrow_due(task_filter, "<", today)
+            continue
+
+        due = DUE_PATTERN.match(word)
+        if due:
+            operator, value = due.groups()
+            if value.lower() in ("none", "never"):
+                task_filter.has_due = False
+            elif value.lower() == "any":
+                task_filter.has_due = True
+            else:
+                _narrow_due(task_filter, operator, parse_day(value, today))
+            continue
+
+        name, colon, value = word.partition(":")
+        field = FIELD_ALIASES.get(name.lower()) if colon and value else None
+        if field == 'category':
+            task_filter.category = value
+        elif field == 'priority':
+            task_filter.priority = value.capitalize()
+            if task_filter.priority not in PRIORITY_RANK:
+                raise ValueError(f"Unknown priority '{value}' (expected High, Medium or Low)")
+        elif field == 'status':
+            if value.lower() not in STATUS_WORDS:
+                raise ValueError(f"Unknown status '{value}' (expected done or pending)")
+            task_filter.completed = STATUS_WORDS[value.lower()]
+        elif field == 'sort':
+            task_filter.descending = value.startswith("-")
+            task_filter.sort = value.lstrip("+-").lower()
+            if task_filter.sort not in SORT_FIELDS:
+                raise ValueError(f"Cannot sort by '{value}' (use {', '.join(SORT_FIELDS)})")
+        elif field in ('limit', 'offset'):
+            if not value.isdigit():
+                raise ValueError(f"{field} must be a number, got '{value}'")
+            setattr(task_filter, field, int(value))
+        else:
+            search_words.append(word)
+
+    task_filter.text = " ".join(search_words) or None
+    return task_filter
+
@@ -0,0 +1,145 @@
+"""
+Repeat rules for recurring tasks
+
+A recurring task is an ordinary task with a 'recurrence' rule such as
+"daily", "weekdays", "weekly", "monthly" or "every 3 days".  Only the
+current occurrence is stored, due on its due_date; completing it adds the
+next one.  The later occurrences are generated on demand by
+occurrences(), which jumps straight to the start of the window being
+viewed, so a date view never expands the series beyond what it shows.
+"""
+
+import calendar
+import re
+from datetime import date, timedelta
+
+from task_model import Task
+
+UNITS = {'day': 'day', 'days': 'day', 'week': 'week', 'weeks': 'week', 'month': 'month', 'months': 'month'}
+NAMED_RULES = {'daily': 'day', 'weekly': 'week', 'monthly': 'month', 'weekdays': 'weekday'}
+RULE_PATTERN = re.compile(r"^(?:every\s+(\d+\s+)?(\w+)|(\w+))(?:\s+on\s+day\s+(\d{1,2}))?$")
+
+
+def _add_months(day, months, day_of_month):
+    """The date months after day's month, on day_of_month (clamped to the month's end)"""
+    month_index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(month_index, 12)
+    month += 1
+    return date(year, month, min(day_of_month, calendar.monthrange(year, month)[1]))
+
+
+class Recurrence:
+    """Every interval days, weeks or months, or every weekday (Monday to Friday)
+
+    Monthly rules remember their day of the month, so a series started on
+    the 31st comes back to the 31st after a short month.
+    """
+
+    def __init__(self, unit, interval=1, day_of_month=None):
+        if unit not in ('day', 'week', 'month', 'weekday'):
+            raise ValueError(f"Unknown repeat unit '{unit}'")
+        if interval < 1:
+            raise ValueError("Repeat interval must be at least 1")
+        if day_of_month is not None and (unit != 'month' or not 1 <= day_of_month <= 31):
+            raise ValueError(f"Invalid day of the month {day_of_month} (only for monthly rules, 1-31)")
+        self.unit = unit
+        self.interval = interval
+        self.day_of_month = day_of_month
+
+    @classmethod
+    def parse(cls, text):
+        """Parse daily, weekly, monthly, weekdays or every N days/weeks/months (optionally 'on day D')"""
+        words = " ".join(text.lower().split())
+        match = RULE_PATTERN.match(words)
+        if match is None:
+            raise ValueError(f"Invalid repeat rule '{text}' (use daily, weekdays, weekly, monthly or every N days)")
+        count, unit, name, day_of_month = match.groups()
+        day_of_month = int(day_of_month) if day_of_month else None
+        if unit in UNITS:
+            # every N days, every week, ...
+            return cls(UNITS[unit], int(count or 1), day_of_month)
+        if unit == 'weekday' and count is None:
+            return cls('weekday', 1, day_of_month)
+        if name in NAMED_RULES:
+            return cls(NAMED_RULES[name], 1, day_of_month)
+        raise ValueError(f"Invalid repeat rule '{text}' (use daily, weekdays, weekly, monthly or every N days)")
+
+    def anchored(self, day):
+        """This rule with a monthly series pinned to day's day of the month"""
+        if self.unit == 'month' and self.day_of_month is None:
+            return Recurrence(self.unit, self.interval, day.day)
+        return self
+
+    def __str__(self):
+        if self.unit == 'weekday':
+            text = "weekdays"
+        elif self.interval == 1:
+            text = {'day': "daily", 'week': "weekly", 'month': "monthly"}[self.unit]
+        else:
+            text = f"every {self.interval} {self.unit}s"
+        if self.day_of_month is not None:
+            text += f" on day {self.day_of_month}"
+        return text
+
+    def dates(self, anchor, start=None):
+        """Yield the occurrence dates after anchor, from start on (endless: stop at your window's end)
+
+        The first date is computed directly from start, so a window far
+        in the future costs the same as one next week.
+        """
+        start = max(start or anchor, anchor + timedelta(days=1))
+        if self.unit in ('day', 'week'):
+            step = self.interval * (7 if self.unit == 'week' else 1)
+            # Smallest anchor + k * step that is on or after start
+            k = -(-(start - anchor).days // step)
+            day = anchor + timedelta(days=k * step)
+            while True:
+                yield day
+                day += timedelta(days=step)
+        elif self.unit == 'month':
+            day_of_month = self.day_of_month or anchor.day
+            months = (start.year - anchor.year) * 12 + start.month - anchor.month
+            # Start a step early: clamping can put that month's date after start
+            k = max(1, months // self.interval - 1)
+            while True:
+                day = _add_months(anchor, k * self.interval, day_of_month)
+                if day >= start:
+                    yield day
+                k += 1
+        else:
+            day = start
+            while True:
+                if day.weekday() < 5:
+                    yield day
+                day += timedelta(days=1)
+
+    def next_after(self, anchor, day):
+        """First occurrence after both anchor and day"""
+        return next(self.dates(anchor, max(anchor, day) + timedelta(days=1)))
+
+
+def task_recurrence(task):
+    """The task's Recurrence, or None for a one-off task"""
+    rule = task.get('recurrence')
+    return Recurrence.parse(rule) if rule else None
+
+
+def next_due_date(task, today=None):
+    """Due date of a repeating task's next occurrence: the first after both its due date and today"""
+    rule = task_recurrence(task)
+    return rule.next_after(date.fromisoformat(task['due_date']), today or date.today()).isoformat()
+
+
+def occurrences(task, start, end):
+    """Yield virtual copies of a recurring task for its later occurrences from start to end
+
+    The stored task is the current occurrence; the copies carry the same
+    id, the occurrence's due date and 'virtual': True.
+    """
+    rule = task_recurrence(task)
+    anchor = date.fromisoformat(task['due_date'])
+    data = task.to_dict() if isinstance(task, Task) else dict(task)
+    for day in rule.dates(anchor, start):
+        if day > end:
+            return
+        yield Task.from_dict(dict(data, due_date=day.isoformat(), virtual=True))
@@ -0,0 +1,312 @@
+"""
+Reminders: notify sinks as due dates come near
+
+A pending task with a due date is due at its date's due time (09:00 by
+default).  Its reminders fire at the due time minus each of its offsets:
+the task's own 'remind' field ("1d,2h", or "off") or the scheduler's
+default offsets.
+
+ReminderScheduler keeps every upcoming reminder on one heap, and a
+background thread sleeps until the earliest one, so hundreds of
+thousands of reminders cost one wake-up per reminder and nothing while
+idle.  Completed and deleted tasks are not searched for in the heap:
+their entries are skipped when they reach the top, and the heap is
+rebuilt once skipped entries outnumber the live ones.  Reminders that
+came due while nothing was running are not replayed; Overdue shows them.
+
+Sinks are callables taking (task, message); stdout, log:PATH and
+command:CMD are built in (see parse_sink).
+"""
+
+import heapq
+import os
+import re
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, datetime
+
+from task_metrics import METRICS
+from task_model import NO_DUE_DATE, encode_day
+
+DEFAULT_DUE_TIME = "09:00"
+# Longest sleep between checks, so a suspended machine or a changed clock
+# is noticed within minutes
+MAX_SLEEP = 300
+OFFSET_UNITS = {'w': 7 * 86400, 'd': 86400, 'h': 3600, 'm': 60}
+OFFSET_PATTERN = re.compile(r"^(\d+)\s*([wdhm]?)$")
+
+
+def parse_offsets(text):
+    """Parse '1d,2h,30m' (weeks, days, hours or minutes before the due time, 0 = at it) into seconds
+
+    'off' (or an empty string) means no reminders.
+    """
+    text = text.strip().lower()
+    if text in ("", "off", "none"):
+        return ()
+    offsets = set()
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        match = OFFSET_PATTERN.match(item)
+        if match is None or (not match.group(2) and match.group(1) != "0"):
+            raise ValueError(f"Invalid reminder '{item}' (use e.g. 0, 30m, 2h, 1d or 1w before the due time)")
+        count, unit = match.groups()
+        offsets.add(int(count) * OFFSET_UNITS.get(unit, 0))
+    return tuple(sorted(offsets, reverse=True))
+
+
+def format_offset(seconds):
+    """'1d', '90m', ... for an offset in seconds ('0' at the due time)"""
+    if not seconds:
+        return "0"
+    for unit, size in OFFSET_UNITS.items():
+        if seconds % size == 0:
+            return f"{seconds // size}{unit}"
+    return f"{seconds // 60}m"
+
+
+def format_offsets(offsets):
+    """Canonical text for offsets, earliest reminder first ('off' for none)"""
+    return ",".join(format_offset(seconds) for seconds in sorted(offsets, reverse=True)) or "off"
+
+
+def canonical_offsets(text):
+    """Offsets text in canonical form, e.g. '2h, 24h' -> '1d,2h'"""
+    return format_offsets(parse_offsets(text))
+
+
+def parse_due_time(text):
+    """Parse HH:MM into a datetime.time"""
+    try:
+        return datetime.strptime(text.strip(), "%H:%M").time()
+    except ValueError:
+        raise ValueError(f"Invalid due time '{text}' (expected HH:MM)")
+
+
+def reminder_message(task, offset):
+    """Notification text for one reminder"""
+    when = "now" if not offset else f"in {format_offset(offset)}"
+    return f"⏰ Due {when}: {task['title']} ({task['category']}, {task['priority']}, due {task['due_date']})"
+
+
+def stdout_sink(task, message):
+    print(message, flush=True)
+
+
+class LogFileSink:
+    """Append one timestamped line per reminder to a file"""
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def __call__(self, task, message):
+        with open(self.filename, 'a', encoding='utf-8') as file:
+            file.write(f"{datetime.now():%Y-%m-%d %H:%M:%S} #{task['id']} {message}\n")
+
+
+class CommandSink:
+    """Run a command per reminder, with the message as its last argument
+
+    The task is passed in TASK_ID, TASK_TITLE, TASK_CATEGORY,
+    TASK_PRIORITY and TASK_DUE_DATE, e.g. command:notify-send Tasks.
+    """
+
+    def __init__(self, command, timeout=30):
+        self.args = shlex.split(command)
+        if not self.args:
+            raise ValueError("Reminder command cannot be empty")
+        self.timeout = timeout
+
+    def __call__(self, task, message):
+        env = dict(
+            os.environ, TASK_ID=str(task['id']), TASK_TITLE=task['title'], TASK_CATEGORY=task['category'],
+            TASK_PRIORITY=task['priority'], TASK_DUE_DATE=task['due_date']
+        )
+        subprocess.run(self.args + [message], env=env, stdin=subprocess.DEVNULL,
+                       timeout=self.timeout, check=True)
+
+
+def parse_sink(spec):
+    """Sink for 'stdout', 'log:PATH' or 'command:CMD'"""
+    kind, _, argument = spec.partition(":")
+    if kind == "stdout" and not argument:
+        return stdout_sink
+    if kind == "log" and argument:
+        return LogFileSink(argument)
+    if kind == "command" and argument:
+        return CommandSink(argument)
+    raise ValueError(f"Invalid reminder sink '{spec}' (use stdout, log:PATH or command:CMD)")
+
+
+class ReminderScheduler:
+    """Heap of upcoming reminders with a thread that delivers each one when it comes due
+
+    load() replaces everything, schedule() and cancel() follow single
+    tasks, and start() and stop() run the delivery thread.  clock returns
+    the current time as a Unix timestamp.
+    """
+
+    def __init__(self, sinks, default_offsets=(), due_time=DEFAULT_DUE_TIME, clock=time.time):
+        self.sinks = list(sinks)
+        self.default_offsets = tuple(default_offsets)
+        self.due_time = parse_due_time(due_time) if isinstance(due_time, str) else due_time
+        self.clock = clock
+        # due_date -> Unix time of its due time; a local-time conversion is slow
+        # and most tasks share their due date with many others
+        self._due_at = {}
+        # (time, task id, offset), earliest first; entries of cancelled tasks are stale
+        self._heap = []
+        # id -> [task, reminders of it still on the heap]
+        self._tasks = {}
+        self._stale = 0
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self.sent = 0
+        self.failed = 0
+
+    def offsets(self, task):
+        """The task's own offsets, or the defaults"""
+        remind = task.get('remind')
+        return parse_offsets(remind) if remind else self.default_offsets
+
+    def reminder_times(self, task, now):
+        """(time, offset) of a task's reminders after now"""
+        if task['completed'] or task['due_date'] == NO_DUE_DATE:
+            return []
+        offsets = self.offsets(task)
+        if not offsets:
+            return []
+        due_at = self._due_at.get(task['due_date'])
+        if due_at is None:
+            day = encode_day(task['due_date'])
+            if not isinstance(day, int):
+                # A legacy due date that is not YYYY-MM-DD: no day to remind before
+                return []
+            due_at = datetime.combine(date.fromordinal(day), self.due_time).timestamp()
+            self._due_at[task['due_date']] = due_at
+        return [(due_at - offset, offset) for offset in offsets if due_at - offset > now]
+
+    def load(self, tasks):
+        """Replace every reminder with those of tasks, heapified in one pass; returns how many"""
+        now = self.clock()
+        heap, live = [], {}
+        for task in tasks:
+            times = self.reminder_times(task, now)
+            if times:
+                live[task['id']] = [task, len(times)]
+                heap.extend((at, task['id'], offset) for at, offset in times)
+        heapq.heapify(heap)
+        with self._condition:
+            self._heap, self._tasks, self._stale = heap, live, 0
+            self._condition.notify()
+        return len(heap)
+
+    def schedule(self, task):
+        """Add the reminders of a new task"""
+        times = self.reminder_times(task, self.clock())
+        if not times:
+            return
+        with self._condition:
+            self.cancel(task)
+            self._tasks[task['id']] = [task, len(times)]
+            for at, offset in times:
+                heapq.heappush(self._heap, (at, task['id'], offset))
+            if self._heap[0][1] == task['id']:
+                # Earlier than what the thread is sleeping until
+                self._condition.notify()
+
+    def cancel(self, task):
+        """Drop the reminders of a completed or deleted task"""
+        with self._condition:
+            entry = self._tasks.pop(task['id'], None)
+            if entry is not None:
+                self._stale += entry[1]
+                if self._stale > len(self._heap) // 2 + 64:
+                    self._compact()
+
+    def _compact(self):
+        """Rebuild the heap without stale entries"""
+        self._heap = [entry for entry in self._heap if entry[1] in self._tasks]
+        heapq.heapify(self._heap)
+        self._stale = 0
+
+    def __len__(self):
+        return len(self._heap) - self._stale
+
+    def upcoming(self, limit):
+        """[(time, task, offset)] of the next reminders, earliest first"""
+        with self._condition:
+            entries = heapq.nsmallest(limit + self._stale, self._heap)
+            return [(at, self._tasks[task_id][0], offset) for at, task_id, offset in entries
+                    if task_id in self._tasks][:limit]
+
+    def _pop_due(self, now):
+        """Take every reminder due by now off the heap: [(task, offset)]"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, task_id, offset = heapq.heappop(self._heap)
+            entry = self._tasks.get(task_id)
+            if entry is None:
+                self._stale -= 1
+                continue
+            due.append((entry[0], offset))
+            entry[1] -= 1
+            if not entry[1]:
+                del self._tasks[task_id]
+        return due
+
+    def deliver(self, task, offset):
+        """Send one reminder to every sink; a failing sink does not stop the others"""
+        message = reminder_message(task, offset)
+        for sink in self.sinks:
+            try:
+                sink(task, message)
+                self.sent += 1
+                METRICS.count('reminders_sent')
+            except Exception as e:
+                self.failed += 1
+                METRICS.count('reminder_errors')
+                print(f"⚠️  Reminder for task {task['id']} not delivered: {e}", file=sys.stderr)
+
+    def run_due(self):
+        """Deliver everything due now (the thread does this; also useful with a fake clock)"""
+        with self._condition:
+            due = self._pop_due(self.clock())
+        for task, offset in due:
+            self.deliver(task, offset)
+        return len(due)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopping:
+                    now = self.clock()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    # Sleep until the earliest reminder, or until schedule() or stop() wakes us
+                    self._condition.wait(min(self._heap[0][0] - now, MAX_SLEEP) if self._heap else MAX_SLEEP)
+                if self._stopping:
+                    return
+            self.run_due()
+
+    def start(self):
+        """Run the delivery thread (a daemon, so it never keeps the program alive)"""
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="task-reminders", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the delivery thread"""
+        if self._thread is not None:
+            with self._condition:
+                self._stopping = True
+                self._condition.notify()
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self):
+        return {'scheduled': len(self), 'sent': self.sent, 'failed': self.failed}
@@ -0,0 +1,104 @@
+"""
+Buffered, paginated rendering of task lists
+
+Views used to print several lines per task, each through its own print()
+call.  TaskRenderer formats rows into a buffer and writes it in large
+chunks (and at the end of every page), skips and limits rows with
+islice, and pulls rows lazily from the query, so a long view costs
+bounded memory and stops reading tasks as soon as the user quits.
+"""
+
+import sys
+from itertools import islice
+
+PRIORITY_ICONS = {"High": "🔴", "Medium": "🟡", "Low": "🟢"}
+STATUS_MARKS = {True: "✓", False: "✗"}
+
+BUFFER_CHARS = 1 << 16
+
+
+def priority_icon(priority):
+    return PRIORITY_ICONS.get(priority, "🟢")
+
+
+def repeat_mark(task):
+    """' 🔁 weekly' for a repeating task, '' otherwise"""
+    rule = task.get('recurrence')
+    return f" 🔁 {rule}" if rule else ""
+
+
+def format_task_line(task):
+    """One-line text form used by the compact views and the list and search commands"""
+    return (f"#{task['id']} [{STATUS_MARKS[task['completed']]}] {priority_icon(task['priority'])} "
+            f"{task['title']} ({task['category']}, due: {task['due_date']}){repeat_mark(task)}")
+
+
+def compact_row(task, number):
+    return format_task_line(task) + "\n"
+
+
+class TaskRenderer:
+    """Write formatted task rows to a stream in buffered chunks, a page at a time
+
+    page_size pauses after that many rows and asks more(shown) whether to
+    continue (None shows everything).  compact=True replaces every view's
+    row format with one line per task.
+    """
+
+    def __init__(self, stream=None, page_size=None, compact=False, more=None, buffer_chars=BUFFER_CHARS):
+        # None writes to whatever sys.stdout is at the time
+        self.stream = stream
+        self.page_size = page_size
+        self.compact = compact
+        self.more = more
+        self.buffer_chars = buffer_chars
+        self._buffer = []
+        self._buffered = 0
+
+    def write(self, text):
+        """Buffer text, writing the buffer out once it is large"""
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.buffer_chars:
+            self.flush()
+
+    def flush(self):
+        """Write everything buffered in one call"""
+        if self._buffer:
+            stream = self.stream or sys.stdout
+            stream.write("".join(self._buffer))
+            stream.flush()
+            self._buffer = []
+            self._buffered = 0
+
+    def render(self, tasks, row, header=None, group=None, heading=None, limit=None, offset=0):
+        """Render rows for tasks and return how many were shown
+
+        row(task, number) returns the text for one task (number counts
+        from offset + 1).  header is written before the first row only, so
+        an empty result writes nothing.  When group(task) changes,
+        heading(key) is written before the row.
+        """
+        if self.compact:
+            row = compact_row
+        if offset or limit is not None:
+            tasks = islice(tasks, offset, None if limit is None else offset + limit)
+        shown = 0
+        current = object()
+        try:
+            for shown, task in enumerate(tasks, 1):
+                if shown == 1 and header:
+                    self.write(header)
+                if group is not None:
+                    key = group(task)
+                    if key != current:
+                        current = key
+                        self.write(heading(key))
+                self.write(row(task, offset + shown))
+                if self.page_size and shown % self.page_size == 0:
+                    self.flush()
+                    if self.more is not None and not self.more(shown):
+                        break
+        finally:
+            self.flush()
+        return shown
@@ -0,0 +1,238 @@
+"""
+Inverted index for task search
+
+Titles and descriptions are split into lowercase word tokens.  Each token
+maps to the ids of the tasks containing it, so a search only touches the
+postings of the words it asks for instead of scanning every task.
+
+Query syntax: words are AND-ed, "OR" (or "|") separates alternatives, and
+every word matches as a prefix ("dep" finds "deploy").
+"""
+
+import bisect
+import heapq
+import json
+import os
+import re
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# A word in the title counts this many times more than one in the description
+TITLE_WEIGHT = 3
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def parse_query(query):
+    """Turn 'a b OR c' into [['a', 'b'], ['c']] (OR of AND-groups)"""
+    groups, current = [], []
+    for word in query.split():
+        if word in ("OR", "|"):
+            if current:
+                groups.append(current)
+            current = []
+        else:
+            current.extend(tokenize(word))
+    if current:
+        groups.append(current)
+    return groups
+
+
+def matches_query(task, groups):
+    """Check one task against a parsed query without using the index"""
+    tokens = task_token_weights(task)
+    return any(
+        all(any(token.startswith(term) for token in tokens) for term in terms)
+        for terms in groups
+    )
+
+
+def score_task(task, groups):
+    """A task's score for a parsed query, as SearchIndex ranks it (0 if it does not match)"""
+    tokens = task_token_weights(task)
+    best = 0
+    for terms in groups:
+        total = 0
+        for term in terms:
+            # Whole-word hits count double, as in SearchIndex._term_scores
+            score = sum(weight * (2 if token == term else 1)
+                        for token, weight in tokens.items() if token.startswith(term))
+            if not score:
+                total = 0
+                break
+            total += score
+        best = max(best, total)
+    return best
+
+
+def task_token_weights(task):
+    """Return {token: weight} for a task's title and description"""
+    weights = {}
+    for token in tokenize(task['title']):
+        weights[token] = weights.get(token, 0) + TITLE_WEIGHT
+    for token in tokenize(task.get('description', '')):
+        weights[token] = weights.get(token, 0) + 1
+    return weights
+
+
+class SearchIndex:
+    """Token -> {task id: weight} postings with prefix lookup
+
+    tasks is the manager's id -> task map, used to turn ids back into tasks.
+    """
+
+    def __init__(self, tasks):
+        self.tasks = tasks
+        self.postings = {}
+        self.vocabulary = []
+
+    @classmethod
+    def build(cls, tasks):
+        """Tokenize every task into a fresh index"""
+        index = cls(tasks)
+        index.add_many(tasks.values())
+        return index
+
+    def add(self, task, keep_sorted=True):
+        """Index a new task"""
+        task_id = task['id']
+        for token, weight in task_token_weights(task).items():
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = {}
+                if keep_sorted:
+                    bisect.insort(self.vocabulary, token)
+            posting[task_id] = posting.get(task_id, 0) + weight
+
+    def add_many(self, tasks):
+        """Index a batch of new tasks, sorting the vocabulary once at the end"""
+        for task in tasks:
+            self.add(task, keep_sorted=False)
+        self.vocabulary = sorted(self.postings)
+
+    def remove(self, task, keep_sorted=True):
+        """Drop a deleted task from the index"""
+        task_id = task['id']
+        for token in task_token_weights(task):
+            posting = self.postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(task_id, None)
+            if not posting:
+                del self.postings[token]
+                if keep_sorted:
+                    del self.vocabulary[bisect.bisect_left(self.vocabulary, token)]
+
+    def remove_many(self, tasks):
+        """Drop a batch of deleted tasks, rebuilding the vocabulary once at the end"""
+        for task in tasks:
+            self.remove(task, keep_sorted=False)
+        self.vocabulary = sorted(self.postings)
+
+    def _term_scores(self, term):
+        """Return {task id: score} for tasks containing a token starting with term"""
+        scores = {}
+        start = bisect.bisect_left(self.vocabulary, term)
+        for position in range(start, len(self.vocabulary)):
+            token = self.vocabulary[position]
+            if not token.startswith(term):
+                break
+            # Whole-word hits rank above prefix hits
+            factor = 2 if token == term else 1
+            for task_id, weight in self.postings[token].items():
+                scores[task_id] = scores.get(task_id, 0) + weight * factor
+        return scores
+
+    def _group_scores(self, terms):
+        """AND the terms of one group together"""
+        term_scores = sorted((self._term_scores(term) for term in terms), key=len)
+        if not term_scores:
+            return {}
+        result = dict(term_scores[0])
+        for scores in term_scores[1:]:
+            result = {task_id: score + scores[task_id] for task_id, score in result.items() if task_id in scores}
+            if not result:
+                break
+        return result
+
+    def estimate(self, query):
+        """Upper bound on the number of matches, from posting sizes only
+
+        Each AND-group can match at most as many tasks as its rarest term,
+        so the planner can compare the search with other indexes without
+        scoring anything.
+        """
+        total = 0
+        for terms in parse_query(query):
+            smallest = None
+            for term in terms:
+                count = 0
+                start = bisect.bisect_left(self.vocabulary, term)
+                for position in range(start, len(self.vocabulary)):
+                    token = self.vocabulary[position]
+                    if not token.startswith(term):
+                        break
+                    count += len(self.postings[token])
+                smallest = count if smallest is None else min(smallest, count)
+            total += smallest or 0
+        return min(total, len(self.tasks))
+
+    def search(self, query, limit=None):
+        """Return matching tasks, best match first"""
+        groups = parse_query(query)
+        scores = {}
+        for terms in groups:
+            for task_id, score in self._group_scores(terms).items():
+                scores[task_id] = max(score, scores.get(task_id, 0))
+
+        ranking = ((-score, task_id) for task_id, score in scores.items())
+        if limit is None:
+            ranked = sorted(ranking)
+        else:
+            ranked = heapq.nsmallest(limit, ranking)
+
+        return [self.tasks[task_id] for _, task_id in ranked]
+
+    def save(self, filename, fingerprint):
+        """Write the postings next to the task file"""
+        data = {
+            'fingerprint': fingerprint,
+            'postings': {
+                token: list(self.postings[token].items()) for token in self.vocabulary
+            }
+        }
+        with open(filename, 'w') as file:
+            # dumps() takes the C encoder path, much faster than dump() here
+            file.write(json.dumps(data))
+
+    @classmethod
+    def load(cls, filename, tasks, fingerprint):
+        """Load saved postings, or return None if they are missing or stale"""
+        if not os.path.exists(filename):
+            return None
+        try:
+            with open(filename, 'r') as file:
+                data = json.load(file)
+        except (json.JSONDecodeError, OSError):
+            return None
+        if data.get('fingerprint') != fingerprint:
+            return None
+
+        index = cls(tasks)
+        index.postings = {
+            token: {task_id: weight for task_id, weight in entries}
+            for token, entries in data['postings'].items()
+        }
+        index.vocabulary = list(index.postings)
+        return index
+
+
+def open_search_index(filename, tasks, fingerprint):
+    """Load the saved index if it matches the task file, else rebuild it"""
+    index = SearchIndex.load(filename, tasks, fingerprint)
+    if index is None:
+        index = SearchIndex.build(tasks)
+    return index
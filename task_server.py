@@ -0,0 +1,301 @@
+"""
+Local HTTP/JSON server sharing one TaskEngine between many clients
+
+Scripts, dashboards and cron jobs talk to one server process instead of
+each loading tasks.json and overwriting the others' changes.  Everything
+runs on one asyncio event loop: reads are answered straight from the
+engine's in-memory indexes, and every mutation is queued to a single
+writer task, so writes are applied one at a time in arrival order.
+
+The writer runs each mutation on the loop itself, because the engine's
+indexes are not safe to change while a read walks them.  A request that
+arrives during a write therefore waits for it: one SQLite commit or
+journal append, or, with the json/ndjson backends, only the in-memory
+change (their file writes are coalesced onto a timer thread), unless a
+coalesced write is in progress at that moment.
+
+    GET    /tasks?completed=&category=&priority=&due_from=&due_to=&q=&limit=&offset=
+    GET    /tasks/<id>
+    POST   /tasks                 {"title", "description", "category", "priority", "due_date", "recurrence", "remind"}
+    POST   /tasks/<id>/complete
+    DELETE /tasks/<id>
+    GET    /search?q=...&limit=&offset=   (q uses the task_query filter language)
+    GET    /agenda?limit=                 (most urgent pending tasks, with their urgency)
+    GET    /stats
+"""
+
+import asyncio
+import json
+import signal
+from datetime import date
+from urllib.parse import parse_qs, urlsplit
+
+from task_model import json_default
+from task_query import parse_filter
+
+DEFAULT_LIMIT = 100
+MAX_BODY_BYTES = 1 << 20
+
+REASONS = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+}
+
+
+class HttpError(Exception):
+    """An error answered with the given HTTP status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _parse_bool(value):
+    if value.lower() in ("1", "true", "yes"):
+        return True
+    if value.lower() in ("0", "false", "no"):
+        return False
+    raise ValueError(f"Expected true or false, got '{value}'")
+
+
+class TaskServer:
+    """HTTP/1.1 JSON API over a TaskEngine (keep-alive, one request at a time per connection)"""
+
+    def __init__(self, engine, host="127.0.0.1", port=8765):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.writes = 0
+        self.server = None
+        # writer -> handler task of each open connection
+        self._connections = {}
+        self._write_queue = None
+        self._writer = None
+
+    async def start(self):
+        """Start listening; self.port holds the bound port afterwards (useful with port 0)"""
+        self._write_queue = asyncio.Queue()
+        self._writer = asyncio.create_task(self._write_loop())
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Stop accepting connections, close idle ones and finish queued writes"""
+        self.server.close()
+        handlers = list(self._connections.values())
+        for writer in list(self._connections):
+            writer.transport.abort()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        await self.server.wait_closed()
+        await self._write_queue.join()
+        self._writer.cancel()
+
+    # Writes
+
+    async def _write_loop(self):
+        """The single writer: apply queued mutations one at a time"""
+        while True:
+            operation, future = await self._write_queue.get()
+            try:
+                result = operation()
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            else:
+                self.writes += 1
+                if not future.cancelled():
+                    future.set_result(result)
+            finally:
+                self._write_queue.task_done()
+
+    async def _write(self, operation):
+        """Queue a mutation for the writer task and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+        await self._write_queue.put((operation, future))
+        return await future
+
+    # HTTP
+
+    async def _handle_connection(self, reader, writer):
+        """Serve requests on one connection until the client closes it"""
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                keep_alive = False
+                try:
+                    request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                    method, target, version = request_line.split(" ", 2)
+                    headers = {}
+                    for line in header_lines:
+                        name, _, value = line.partition(":")
+                        headers[name.strip().lower()] = value.strip()
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                    length = int(headers.get("content-length") or 0)
+                    if length > MAX_BODY_BYTES:
+                        raise HttpError(413, "Request body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.dispatch(method, target, body)
+                except HttpError as e:
+                    status, payload, keep_alive = e.status, {'error': str(e)}, False
+                except ValueError:
+                    status, payload, keep_alive = 400, {'error': "Malformed request"}, False
+
+                data = json.dumps(payload, default=json_default).encode()
+                response = (
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                )
+                if not keep_alive:
+                    response += "Connection: close\r\n"
+                writer.write((response + "\r\n").encode() + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    async def dispatch(self, method, target, body):
+        """Route one request; returns (status, JSON-ready payload)"""
+        self.requests += 1
+        url = urlsplit(target)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split("/") if part]
+        try:
+            if parts == ["stats"]:
+                self._require(method, "GET")
+                return 200, self._stats()
+            if parts == ["agenda"]:
+                self._require(method, "GET")
+                return 200, self._agenda(params)
+            if parts == ["search"]:
+                self._require(method, "GET")
+                if not params.get('q'):
+                    raise HttpError(400, "Missing search query 'q'")
+                return 200, self._search(params)
+            if parts == ["tasks"]:
+                if method == "GET":
+                    return 200, self._list(params)
+                self._require(method, "POST")
+                fields = self._json_body(body)
+                task = await self._write(lambda: self.engine.add(
+                    str(fields.get('title', '')),
+                    str(fields.get('description', '')),
+                    str(fields.get('category') or "Other"),
+                    str(fields.get('priority') or "Medium"),
+                    fields.get('due_date'),
+                    fields.get('recurrence'),
+                    fields.get('remind')
+                ))
+                return 201, task
+            if len(parts) in (2, 3) and parts[0] == "tasks":
+                task_id = self._task_id(parts[1])
+                if len(parts) == 3:
+                    if parts[2] != "complete":
+                        raise HttpError(404, "Not found")
+                    self._require(method, "POST")
+                    task = await self._write(lambda: self.engine.complete(task_id))
+                    if task is None:
+                        raise HttpError(404, f"No pending task with id {task_id}")
+                    return 200, task
+                if method == "GET":
+                    task = self.engine.get(task_id)
+                elif method == "DELETE":
+                    task = await self._write(lambda: self.engine.delete(task_id))
+                else:
+                    raise HttpError(405, f"{method} not allowed here")
+                if task is None:
+                    raise HttpError(404, f"No task with id {task_id}")
+                return 200, task
+            raise HttpError(404, "Not found")
+        except HttpError as e:
+            return e.status, {'error': str(e)}
+        except ValueError as e:
+            return 400, {'error': str(e)}
+
+    @staticmethod
+    def _require(method, allowed):
+        if method != allowed:
+            raise HttpError(405, f"{method} not allowed here")
+
+    @staticmethod
+    def _task_id(text):
+        if not text.isdigit():
+            raise HttpError(404, "Not found")
+        return int(text)
+
+    @staticmethod
+    def _json_body(body):
+        try:
+            fields = json.loads(body or b"{}")
+        except ValueError:
+            raise HttpError(400, "Body must be a JSON object")
+        if not isinstance(fields, dict):
+            raise HttpError(400, "Body must be a JSON object")
+        return fields
+
+    def _list(self, params):
+        """GET /tasks and /search: query the engine with the URL parameters"""
+        limit = int(params.get('limit', DEFAULT_LIMIT))
+        tasks = self.engine.query(
+            completed=_parse_bool(params['completed']) if 'completed' in params else None,
+            category=params.get('category'),
+            priority=params.get('priority'),
+            due_from=date.fromisoformat(params['due_from']) if 'due_from' in params else None,
+            due_to=date.fromisoformat(params['due_to']) if 'due_to' in params else None,
+            text=params.get('q') or None,
+            limit=limit if limit > 0 else None,
+            offset=max(int(params.get('offset', 0)), 0)
+        )
+        return list(tasks)
+
+    def _search(self, params):
+        """GET /search: run a filter-language query"""
+        task_filter = parse_filter(params['q'])
+        limit = int(params.get('limit', task_filter.limit or DEFAULT_LIMIT))
+        task_filter.limit = limit if limit > 0 else None
+        task_filter.offset = max(int(params.get('offset', task_filter.offset)), 0)
+        return list(self.engine.find(task_filter))
+
+    def _agenda(self, params):
+        """GET /agenda: pending tasks, most urgent first"""
+        limit = int(params.get('limit', 10))
+        return [{'task': task, 'urgency': round(score, 2)} for task, score in self.engine.agenda(max(limit, 0))]
+
+    def _stats(self):
+        stats = self.engine.stats()
+        result = dict(stats.to_dict(), pending=stats.pending, requests=self.requests, writes=self.writes)
+        result['archived'] = self.engine.archive.read_stats().to_dict()
+        if self.engine.cache is not None:
+            result['cache'] = self.engine.cache.stats()
+        if self.engine.reminders is not None:
+            result['reminders'] = self.engine.reminders.stats()
+        return result
+
+
+async def serve(engine, host="127.0.0.1", port=8765):
+    """Run a TaskServer until Ctrl+C or SIGTERM"""
+    server = TaskServer(engine, host, port)
+    await server.start()
+    stopping = asyncio.Event()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopping.set)
+    except (NotImplementedError, AttributeError):
+        pass  # No signal handlers on Windows; Ctrl+C still works
+    print(f"🌐 Serving tasks on http://{server.host}:{server.port} (Ctrl+C to stop)", flush=True)
+    try:
+        await stopping.wait()
+    finally:
+        await server.stop()
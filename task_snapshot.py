@@ -0,0 +1,121 @@
+"""
+Binary snapshot of a task file for fast startup
+
+Parsing tasks.json and turning every dict into a Task takes most of the
+startup time with a large file.  The snapshot, "tasks.json.snap", holds
+the same tasks as marshal data: one tuple of already encoded Task fields
+per task, so loading it is one unmarshal of the memory-mapped file plus
+a tuple unpack per task.
+
+The snapshot starts with a small header recording the task file's size,
+mtime and BLAKE2 digest.  It is used only while the task file still
+matches: the same size and mtime, or the same size and digest when only
+the mtime moved (a copy or a touch).  Anything else, including another
+Python version or a changed Task layout, means it is stale and the JSON
+file is read instead.  The JSON file always stays the source of truth.
+"""
+
+import hashlib
+import marshal
+import mmap
+import os
+import stat
+import struct
+import sys
+import tempfile
+
+from task_metrics import METRICS
+from task_model import Task
+
+SNAPSHOT_VERSION = 1
+DIGEST_CHUNK = 1 << 20
+# File layout: MAGIC, the header's length, the marshalled header, the marshalled task rows
+MAGIC = b"TASKSNAP"
+LENGTH = struct.Struct("<I")
+
+
+def snapshot_filename(filename):
+    """The snapshot is kept next to the task file"""
+    return filename + ".snap"
+
+
+def file_digest(filename):
+    """BLAKE2 digest of a file's contents"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filename, 'rb') as file:
+        for chunk in iter(lambda: file.read(DIGEST_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stat(filename):
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _format():
+    """What a snapshot must have been written with to be readable here"""
+    return [SNAPSHOT_VERSION, list(sys.version_info[:2]), list(Task.__slots__)]
+
+
+def save_snapshot(filename, header, tasks, fingerprint):
+    """Write the snapshot of a task file whose contents are tasks (Task objects or dicts)
+
+    fingerprint is [size, mtime_ns] of the task file as those tasks were
+    read or written.  Nothing is written (and False returned) if the file
+    changed since, as the snapshot would not match it.
+    """
+    if fingerprint is None or _stat(filename) != fingerprint:
+        return False
+    digest = file_digest(filename)
+    if _stat(filename) != fingerprint:
+        # Replaced while we were hashing it
+        return False
+    meta = {'format': _format(), 'fingerprint': fingerprint, 'digest': digest, 'header': header}
+    rows = [(task if isinstance(task, Task) else Task.from_dict(task)).slots() for task in tasks]
+    target = snapshot_filename(filename)
+    directory = os.path.dirname(os.path.abspath(target))
+    fd, temp_filename = tempfile.mkstemp(prefix=os.path.basename(target) + ".", suffix=".tmp", dir=directory)
+    try:
+        with METRICS.timer('snapshot_write'), os.fdopen(fd, 'wb') as file:
+            meta = marshal.dumps(meta)
+            file.write(MAGIC + LENGTH.pack(len(meta)) + meta)
+            marshal.dump(rows, file)
+        # The snapshot holds the same data, so it gets the task file's permissions
+        os.chmod(temp_filename, stat.S_IMODE(os.stat(filename).st_mode))
+        os.replace(temp_filename, target)
+    except BaseException:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
+    return True
+
+
+def load_snapshot(filename, fingerprint):
+    """Return (tasks, header) from a task file's snapshot, or None if it is missing or stale
+
+    fingerprint is [size, mtime_ns] of the task file now.
+    """
+    if fingerprint is None:
+        return None
+    try:
+        with METRICS.timer('snapshot_load'), open(snapshot_filename(filename), 'rb') as file:
+            prefix = file.read(len(MAGIC) + LENGTH.size)
+            if prefix[:len(MAGIC)] != MAGIC:
+                return None
+            meta = marshal.loads(file.read(LENGTH.unpack(prefix[len(MAGIC):])[0]))
+            if not isinstance(meta, dict) or meta.get('format') != _format():
+                return None
+            if meta['fingerprint'] != fingerprint:
+                if meta['fingerprint'][0] != fingerprint[0] or meta['digest'] != file_digest(filename):
+                    return None
+            # Unmarshal straight from the mapped file: a file object is read in small pieces
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+                rows = marshal.loads(view[file.tell():])
+            tasks = [Task.from_slots(row) for row in rows]
+    except (OSError, EOFError, ValueError, TypeError, KeyError, IndexError, struct.error):
+        return None
+    return tasks, meta['header']
@@ -0,0 +1,79 @@
+"""
+Running task statistics
+
+TaskStats is updated on every add, complete and delete, so the overview
+banner and the statistics screen never have to walk the task list.  The
+stores persist it alongside the tasks for readers of the header alone;
+loading the tasks counts them again, so a hand-edited file cannot leave
+the totals wrong.
+"""
+
+
+class TaskStats:
+    """Totals by status, category and priority"""
+
+    def __init__(self, total=0, completed=0, by_category=None, by_priority=None):
+        self.total = total
+        self.completed = completed
+        self.by_category = by_category if by_category is not None else {}
+        self.by_priority = by_priority if by_priority is not None else {}
+
+    @property
+    def pending(self):
+        return self.total - self.completed
+
+    @classmethod
+    def from_tasks(cls, tasks):
+        """Count a task collection from scratch"""
+        stats = cls()
+        for task in tasks:
+            stats.add(task)
+        return stats
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild stats saved with to_dict()"""
+        return cls(
+            data.get('total', 0), data.get('completed', 0),
+            dict(data.get('by_category', {})), dict(data.get('by_priority', {}))
+        )
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'completed': self.completed,
+            'by_category': dict(self.by_category),
+            'by_priority': dict(self.by_priority),
+        }
+
+    def merged(self, other):
+        """Totals of this collection and another one together"""
+        merged = TaskStats.from_dict(self.to_dict())
+        merged.total += other.total
+        merged.completed += other.completed
+        for counts, more in ((merged.by_category, other.by_category), (merged.by_priority, other.by_priority)):
+            for key, count in more.items():
+                counts[key] = counts.get(key, 0) + count
+        return merged
+
+    def add(self, task):
+        """Count a new task (completed or not)"""
+        self.total += 1
+        if task['completed']:
+            self.completed += 1
+        self.by_category[task['category']] = self.by_category.get(task['category'], 0) + 1
+        self.by_priority[task['priority']] = self.by_priority.get(task['priority'], 0) + 1
+
+    def complete(self, task):
+        """Count a task that just changed from pending to completed"""
+        self.completed += 1
+
+    def remove(self, task):
+        """Stop counting a deleted task"""
+        self.total -= 1
+        if task['completed']:
+            self.completed -= 1
+        for counts, key in ((self.by_category, task['category']), (self.by_priority, task['priority'])):
+            counts[key] -= 1
+            if not counts[key]:
+                del counts[key]
@@ -0,0 +1,1219 @@
+"""
+Storage backends for the Enhanced Task Manager
+
+JsonFileStore keeps the original behaviour (one JSON array, rewritten on
+every change), optionally coalescing bursts of changes into one write.
+NdjsonStore writes one task per line so big files can be streamed.
+JournalStore appends one small record per mutation to a log file and
+folds the log into a snapshot in the background.  SqliteStore keeps tasks
+in an indexed SQLite database and answers the views with queries, so the
+task list never has to be held in memory.
+"""
+
+import heapq
+import json
+import os
+import sqlite3
+import stat
+import tempfile
+import threading
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from task_metrics import METRICS
+from task_model import Task, json_default
+from task_search import parse_query, score_task
+from task_snapshot import load_snapshot, save_snapshot
+from task_stats import TaskStats
+
+# Read once at import: os.umask() can only be read by changing it, which is
+# not safe once other threads may create files
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def file_mode(filename):
+    """Permissions for rewriting filename: its current ones, or those open() gives a new file"""
+    try:
+        return stat.S_IMODE(os.stat(filename).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def atomic_write_json(filename, data, indent=None):
+    """Write JSON so that readers see either the old file or the new one"""
+    atomic_write(filename, lambda file: json.dump(data, file, indent=indent, default=json_default))
+
+
+def atomic_write(filename, write):
+    """Call write(file) on a temporary file, fsync it and rename it over filename"""
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, temp_filename = tempfile.mkstemp(prefix=os.path.basename(filename) + ".", suffix=".tmp", dir=directory)
+    try:
+        with METRICS.timer('file_write'), os.fdopen(fd, 'w') as file:
+            write(file)
+            file.flush()
+            if METRICS.enabled:
+                METRICS.count('bytes_written', file.tell(), file=os.path.basename(filename))
+            os.fsync(file.fileno())
+        # mkstemp creates the file as 0600; keep the mode a shared file was given
+        os.chmod(temp_filename, file_mode(filename))
+        os.replace(temp_filename, filename)
+    except BaseException:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
+    _fsync_directory(directory)
+
+
+def _fsync_directory(directory):
+    """Make a rename durable (not supported on Windows)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def file_fingerprint(*filenames):
+    """Size and modification time of each file, to detect outside changes"""
+    fingerprint = []
+    for filename in filenames:
+        try:
+            stat = os.stat(filename)
+            fingerprint.append([stat.st_size, stat.st_mtime_ns])
+        except FileNotFoundError:
+            fingerprint.append(None)
+    return fingerprint
+
+
+def quarantine_corrupt_file(filename, notify=None):
+    """Move an unreadable tasks file aside instead of overwriting it"""
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    corrupt_filename = f"{filename}.corrupt-{stamp}"
+    os.replace(filename, corrupt_filename)
+    if notify:
+        notify(f"⚠️  {filename} could not be read and was moved to {corrupt_filename}")
+    return corrupt_filename
+
+
+def read_tasks_file(filename):
+    """Read a tasks file, returning (tasks, header)
+
+    Accepts both a plain JSON array (older files) and the
+    {"next_id": ..., "stats": {...}, "tasks": [...]} layout written by
+    the stores.
+    """
+    with METRICS.timer('json_parse'), open(filename, 'r') as file:
+        data = json.load(file)
+        if METRICS.enabled:
+            METRICS.count('bytes_read', os.fstat(file.fileno()).st_size, file=os.path.basename(filename))
+    if isinstance(data, list):
+        return data, {}
+    tasks = data.pop('tasks', [])
+    return tasks, data
+
+
+def repair_task_ids(tasks, next_id=1):
+    """Give every task a unique id, renumbering duplicates in place
+
+    Older versions assigned len(tasks) + 1, which reuses ids after a
+    delete.  Returns (next_id, number of tasks renumbered).
+    """
+    for task in tasks:
+        if isinstance(task.get('id'), int):
+            next_id = max(next_id, task['id'] + 1)
+    seen_ids = set()
+    renumbered = 0
+    for task in tasks:
+        if not isinstance(task.get('id'), int) or task['id'] in seen_ids:
+            task['id'] = next_id
+            next_id += 1
+            renumbered += 1
+        seen_ids.add(task['id'])
+    return next_id, renumbered
+
+
+def apply_change(tasks, change):
+    """Replay one recorded change onto an id -> task map (idempotent)"""
+    op = change[0]
+    if op == 'add':
+        tasks[change[1]['id']] = change[1]
+    elif op == 'complete':
+        task = tasks.get(change[1])
+        if task is not None and not task['completed']:
+            task['completed'] = True
+            task['completed_date'] = change[2]
+    elif op == 'delete':
+        tasks.pop(change[1], None)
+
+
+class TaskFileLock:
+    """Advisory lock (fcntl.flock) shared by every process using one task file
+
+    The lock file also holds {"next_id", "generation"}, so writers hand out
+    unique ids and notice another process's write without reading the task
+    file.  Readers never take it: task files are replaced atomically.
+    Without fcntl (Windows) locking is skipped and only one process should
+    write at a time.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = None
+
+    def __enter__(self):
+        self.file = os.fdopen(os.open(self.filename, os.O_RDWR | os.O_CREAT, 0o644), 'r+')
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        self.file.close()
+        self.file = None
+
+    def read(self):
+        """The shared state (call while locked)"""
+        self.file.seek(0)
+        try:
+            return json.loads(self.file.read() or "{}")
+        except ValueError:
+            return {}
+
+    def write(self, state):
+        """Replace the shared state (call while locked)"""
+        self.file.seek(0)
+        self.file.truncate()
+        self.file.write(json.dumps(state))
+        self.file.flush()
+
+
+class JsonFileStore:
+    """Whole-file JSON storage (one full rewrite per mutation)
+
+    With batch_window > 0, saves arriving within that many seconds of the
+    first unsaved change are coalesced into a single atomic write.
+
+    Several processes may share one file.  Writes happen under a
+    TaskFileLock and bump a generation counter stored in the file; when a
+    writer finds that another process has written since it last read, it
+    re-reads the file and replays its own recorded changes on top instead
+    of overwriting them.  refresh() picks up other processes' writes
+    without locking.
+
+    With snapshot (the default), load() reads the binary snapshot next to
+    the file while it is fresh, and close() rewrites it if the file
+    changed (see task_snapshot).
+    """
+
+    # Tasks are held in memory by the manager and queried by scanning
+    indexed = False
+
+    def __init__(self, filename="tasks.json", batch_window=0.0, snapshot=True, notify=None):
+        self.filename = filename
+        self.batch_window = batch_window
+        self.snapshot = snapshot
+        self.notify = notify
+        self.next_id = 1
+        self.generation = 0
+        self.repaired = 0
+        self.task_stats = TaskStats()
+        self.save_requests = 0
+        self.flushes = 0
+        self.merges = 0
+        self._dirty = None
+        self._timer = None
+        self._lock = threading.Lock()
+        self._file_lock = TaskFileLock(filename + ".lock")
+        # Changes since the last write, replayed if another process wrote first
+        self._changes = []
+        # Merged task map the manager has not picked up yet (see refresh)
+        self._merged = None
+        self._disk_fingerprint = None
+        # The tasks the file holds (as last read or written), for the snapshot
+        self._disk_tasks = None
+        self._snapshot_fresh = False
+
+    def _read_file(self):
+        """Return (tasks, header) from the task file"""
+        return read_tasks_file(self.filename)
+
+    def load(self):
+        """Load tasks from JSON file (or its snapshot) as Task objects"""
+        tasks, header = [], {}
+        fingerprint = file_fingerprint(self.filename)
+        snapshot = load_snapshot(self.filename, fingerprint[0]) if self.snapshot else None
+        if snapshot is not None:
+            # Snapshots are only written from repaired tasks, with their next_id
+            tasks, header = snapshot
+            self.next_id, self.repaired = header['next_id'], 0
+            # Counted by this store from the same tasks when it wrote the snapshot
+            self.task_stats = TaskStats.from_dict(header['stats'])
+            METRICS.count('snapshot_hits')
+        else:
+            if os.path.exists(self.filename):
+                try:
+                    tasks, header = self._read_file()
+                except json.JSONDecodeError:
+                    quarantine_corrupt_file(self.filename, self.notify)
+                except FileNotFoundError:
+                    pass
+            self.next_id, self.repaired = repair_task_ids(tasks, header.get('next_id', 1))
+            tasks = [Task.from_dict(task) for task in tasks]
+            self.task_stats = TaskStats.from_tasks(tasks)
+        self.generation = header.get('generation', 0)
+        self._disk_fingerprint = fingerprint
+        # Renumbered tasks are not what the file holds until they are saved
+        self._disk_tasks = None if self.repaired else tasks
+        self._snapshot_fresh = snapshot is not None
+        return tasks
+
+    def allocate_id(self):
+        """Hand out the next task id (ids are never reused)"""
+        return self.allocate_ids(1)
+
+    def allocate_ids(self, count):
+        """Reserve count consecutive ids and return the first
+
+        The counter in the lock file keeps ids unique across processes.
+        """
+        with self._lock, self._file_lock as lock:
+            state = lock.read()
+            first_id = max(self.next_id, state.get('next_id', 1))
+            self.next_id = first_id + count
+            lock.write(dict(state, next_id=self.next_id))
+            return first_id
+
+    def save(self, tasks):
+        """Save tasks to JSON file, or schedule a coalesced flush"""
+        with self._lock:
+            self.save_requests += 1
+            self._dirty = tasks
+            if self.batch_window <= 0:
+                self._flush_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.batch_window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Write any pending changes now"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._dirty is None:
+            return
+        with self._file_lock as lock:
+            state = lock.read()
+            disk_generation = state.get('generation')
+            if disk_generation is None and os.path.exists(self.filename):
+                # No lock state yet (first run, or it was deleted): ask the file
+                disk_generation = self._read_file()[1].get('generation', 0)
+            if disk_generation not in (None, self.generation):
+                tasks = self._merge(self._read_file()[0])
+                self.generation = disk_generation
+            elif self._merged is not None:
+                # An earlier merge the manager has not picked up yet
+                tasks = self._merge(list(self._merged.values()))
+            else:
+                tasks = list(self._dirty.values())
+            self.generation += 1
+            self.next_id = max(self.next_id, state.get('next_id', 1))
+            self._write_file(tasks)
+            lock.write({'next_id': self.next_id, 'generation': self.generation})
+            # Under the lock, so the fingerprint is that of the tasks just written
+            self._disk_fingerprint = file_fingerprint(self.filename)
+        self._disk_tasks = tasks
+        self._snapshot_fresh = False
+        self._changes = []
+        self._dirty = None
+        self.flushes += 1
+
+    def _merge(self, base_tasks):
+        """Replay this store's unsaved changes onto tasks another process wrote"""
+        merged = {task['id']: task for task in base_tasks}
+        for change in self._changes:
+            apply_change(merged, change)
+        self.task_stats = TaskStats.from_tasks(merged.values())
+        self._merged = merged
+        self.merges += 1
+        return list(merged.values())
+
+    def refresh(self):
+        """Return the current task list if another process changed it, else None
+
+        Checks the file's size and mtime without locking.  Changes this
+        store has not written yet are kept: they are replayed onto the
+        returned list, or merged by the next flush.
+        """
+        with self._lock:
+            if self._merged is not None:
+                merged, self._merged = self._merged, None
+                for change in self._changes:
+                    apply_change(merged, change)
+                return list(merged.values())
+            if self._dirty is not None or file_fingerprint(self.filename) == self._disk_fingerprint:
+                return None
+        return self.load()
+
+    def _write_file(self, tasks):
+        """Write the whole task file"""
+        data = {
+            'next_id': self.next_id,
+            'generation': self.generation,
+            'stats': self.task_stats.to_dict(),
+            'tasks': tasks
+        }
+        atomic_write_json(self.filename, data, indent=2)
+
+    @property
+    def flushes_saved(self):
+        """Number of physical writes avoided by coalescing"""
+        return self.save_requests - self.flushes
+
+    def fingerprint(self):
+        """Fingerprint of the task file as this store last read or wrote it"""
+        if self._disk_fingerprint is not None:
+            return self._disk_fingerprint
+        return file_fingerprint(self.filename)
+
+    def stats(self):
+        """Write counters for reporting"""
+        return {
+            'save_requests': self.save_requests,
+            'flushes': self.flushes,
+            'flushes_saved': self.flushes_saved,
+            'merges': self.merges,
+        }
+
+    def _record(self, tasks, change):
+        """Remember a change for merging, then save"""
+        with self._lock:
+            self._changes.append(change)
+        self.save(tasks)
+
+    def record_add(self, tasks, task):
+        """Persist a newly added task"""
+        self.task_stats.add(task)
+        self._record(tasks, ('add', task))
+
+    def record_complete(self, tasks, task):
+        """Persist the completion of a task"""
+        self.task_stats.complete(task)
+        self._record(tasks, ('complete', task['id'], task['completed_date']))
+
+    def record_delete(self, tasks, task):
+        """Persist the removal of a task"""
+        self.task_stats.remove(task)
+        self._record(tasks, ('delete', task['id']))
+
+    def record_bulk_add(self, tasks, new_tasks):
+        """Persist a batch of new tasks (already in tasks) with one write"""
+        with self._lock:
+            for task in new_tasks:
+                self.task_stats.add(task)
+                self._changes.append(('add', task))
+        self.save(tasks)
+        return len(new_tasks)
+
+    def record_bulk_delete(self, tasks, removed):
+        """Persist the removal of a batch of tasks (already gone from tasks) with one write"""
+        with self._lock:
+            for task in removed:
+                self.task_stats.remove(task)
+                self._changes.append(('delete', task['id']))
+        self.save(tasks)
+        return len(removed)
+
+    def write_snapshot(self):
+        """Write the binary snapshot of the task file unless it is up to date; True if written"""
+        with self._lock:
+            if not self.snapshot or self._snapshot_fresh or self._disk_tasks is None or self._dirty is not None:
+                return False
+            header = {'next_id': self.next_id, 'generation': self.generation, 'stats': self.task_stats.to_dict()}
+            self._snapshot_fresh = save_snapshot(self.filename, header, self._disk_tasks, self._disk_fingerprint[0])
+            return self._snapshot_fresh
+
+    def close(self):
+        """Flush pending changes and bring the snapshot up to date"""
+        self.flush()
+        self.write_snapshot()
+
+
+class NdjsonStore(JsonFileStore):
+    """Line-delimited JSON: a header line, then one task per line
+
+    The header carries next_id and the statistics, so the overview can be
+    shown after reading one line, and iter_stream() parses tasks one at a
+    time for views that do not need the whole list in memory.
+    """
+
+    def read_header(self):
+        """Read only the header line (next_id and statistics)"""
+        header = {}
+        if os.path.exists(self.filename):
+            with open(self.filename, 'r') as file:
+                first_line = file.readline()
+            try:
+                header = json.loads(first_line) if first_line.strip() else {}
+            except json.JSONDecodeError:
+                header = {}
+        self.next_id = header.get('next_id', 1)
+        self.generation = header.get('generation', 0)
+        self.task_stats = TaskStats.from_dict(header['stats']) if 'stats' in header else TaskStats()
+        self._disk_fingerprint = file_fingerprint(self.filename)
+        return header
+
+    def iter_stream(self):
+        """Yield task dicts straight from the file, one line at a time"""
+        if not os.path.exists(self.filename):
+            return
+        with open(self.filename, 'r') as file:
+            file.readline()
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _read_file(self):
+        """Return (tasks, header), reading both from one open file"""
+        with METRICS.timer('json_parse'), open(self.filename, 'r') as file:
+            first_line = file.readline()
+            header = json.loads(first_line) if first_line.strip() else {}
+            tasks = [json.loads(line) for line in file if line.strip()]
+            if METRICS.enabled:
+                METRICS.count('bytes_read', os.fstat(file.fileno()).st_size, file=os.path.basename(self.filename))
+        return tasks, header
+
+    def _write_file(self, tasks):
+        """Write the header line and one line per task"""
+        header = {
+            'format': 'tasks-ndjson',
+            'next_id': self.next_id,
+            'generation': self.generation,
+            'stats': self.task_stats.to_dict()
+        }
+
+        def write(file):
+            file.write(json.dumps(header) + "\n")
+            for task in tasks:
+                file.write(json.dumps(task, default=json_default) + "\n")
+        atomic_write(self.filename, write)
+
+
+def convert_json_to_ndjson(json_filename, ndjson_filename):
+    """Rewrite a tasks.json file (array or header layout) as NDJSON"""
+    tasks, header = read_tasks_file(json_filename)
+    store = NdjsonStore(ndjson_filename)
+    store.next_id, _ = repair_task_ids(tasks, header.get('next_id', 1))
+    store.task_stats = TaskStats.from_tasks(tasks)
+    store._write_file(tasks)
+    return len(tasks)
+
+
+class JournalStore:
+    """Snapshot plus append-only mutation log
+
+    Every mutation appends one JSON line to "<filename>.log".  Once
+    compact_every records have accumulated, the log is rotated and a
+    background thread writes a fresh snapshot to <filename>.  Records
+    carry a sequence number so replay skips anything the snapshot
+    already contains.  With fsync=True every append is forced to disk.
+    """
+
+    indexed = False
+
+    def __init__(self, filename="tasks.json", compact_every=1000, fsync=False, notify=None):
+        self.filename = filename
+        self.fsync = fsync
+        self.notify = notify
+        self.log_filename = filename + ".log"
+        self.old_log_filename = filename + ".log.old"
+        self.compact_every = compact_every
+        self.seq = 0
+        self.pending = 0
+        self.next_id = 1
+        self.repaired = 0
+        self.task_stats = TaskStats()
+        self._log = None
+        self._lock = threading.Lock()
+        self._compactor = None
+
+    def load(self):
+        """Rebuild tasks from the snapshot and the log tail"""
+        snapshot, header = [], {}
+        if os.path.exists(self.filename):
+            try:
+                snapshot, header = read_tasks_file(self.filename)
+            except json.JSONDecodeError:
+                quarantine_corrupt_file(self.filename, self.notify)
+        snapshot_seq = header.get('seq', 0)
+        self.next_id, self.repaired = repair_task_ids(snapshot, header.get('next_id', 1))
+        self.task_stats = TaskStats.from_tasks(snapshot)
+        tasks = {task['id']: task for task in snapshot}
+
+        self.seq = snapshot_seq
+        self.pending = 0
+        for log_filename in (self.old_log_filename, self.log_filename):
+            for record in self._read_log(log_filename):
+                if record['seq'] <= snapshot_seq:
+                    continue
+                self._apply(tasks, record)
+                self.seq = record['seq']
+                self.pending += 1
+        return list(tasks.values())
+
+    def allocate_id(self):
+        """Hand out the next task id (ids are never reused)"""
+        return self.allocate_ids(1)
+
+    def allocate_ids(self, count):
+        """Reserve count consecutive ids and return the first"""
+        with self._lock:
+            first_id = self.next_id
+            self.next_id += count
+            return first_id
+
+    def _read_log(self, log_filename):
+        """Return the records of a log file, cutting off a torn last line"""
+        records = []
+        if not os.path.exists(log_filename):
+            return records
+        good_bytes = 0
+        with open(log_filename, 'rb') as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                good_bytes += len(line)
+            else:
+                return records
+        # Crashed mid-append: drop the partial record so new appends start clean
+        with open(log_filename, 'r+b') as file:
+            file.truncate(good_bytes)
+        return records
+
+    def _apply(self, tasks, record):
+        """Replay one log record onto the id -> task map
+
+        A snapshot taken mid-mutation may already contain the change, so
+        each operation is applied (and counted) only once.
+        """
+        op = record['op']
+        if op == 'add':
+            task = record['task']
+            if task['id'] not in tasks:
+                self.task_stats.add(task)
+            tasks[task['id']] = task
+            self.next_id = max(self.next_id, task['id'] + 1)
+        elif op == 'complete':
+            task = tasks.get(record['id'])
+            if task is not None and not task['completed']:
+                task['completed'] = True
+                task['completed_date'] = record['completed_date']
+                self.task_stats.complete(task)
+        elif op == 'delete':
+            task = tasks.pop(record['id'], None)
+            if task is not None:
+                self.task_stats.remove(task)
+
+    def _append(self, tasks, record):
+        """Append one record to the log and compact when it grows too long"""
+        with self._lock:
+            if self._log is None:
+                self._log = open(self.log_filename, 'a')
+            self.seq += 1
+            record['seq'] = self.seq
+            line = json.dumps(record, default=json_default) + "\n"
+            self._log.write(line)
+            self._log.flush()
+            if METRICS.enabled:
+                METRICS.count('bytes_written', len(line), file=os.path.basename(self.log_filename))
+            if self.fsync:
+                os.fsync(self._log.fileno())
+            self.pending += 1
+            should_compact = self.pending >= self.compact_every
+        if should_compact:
+            self.compact(tasks, background=True)
+
+    def record_add(self, tasks, task):
+        """Log a newly added task"""
+        self.task_stats.add(task)
+        self._append(tasks, {'op': 'add', 'task': task})
+
+    def record_complete(self, tasks, task):
+        """Log the completion of a task"""
+        self.task_stats.complete(task)
+        self._append(tasks, {
+            'op': 'complete',
+            'id': task['id'],
+            'completed_date': task['completed_date']
+        })
+
+    def record_delete(self, tasks, task):
+        """Log the removal of a task"""
+        self.task_stats.remove(task)
+        self._append(tasks, {'op': 'delete', 'id': task['id']})
+
+    def record_bulk_add(self, tasks, new_tasks):
+        """Write a batch of new tasks (already in tasks) as one snapshot
+
+        One snapshot is cheaper than one log record per task and leaves
+        nothing to replay.
+        """
+        for task in new_tasks:
+            self.task_stats.add(task)
+        self.save(tasks)
+        return len(new_tasks)
+
+    def record_bulk_delete(self, tasks, removed):
+        """Write the tasks left after removing a batch as one snapshot"""
+        for task in removed:
+            self.task_stats.remove(task)
+        self.save(tasks)
+        return len(removed)
+
+    def save(self, tasks):
+        """Write a full snapshot now and truncate the log"""
+        self.compact(tasks, background=False)
+
+    def compact(self, tasks, background=True):
+        """Fold the log into a new snapshot"""
+        self.wait()
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+            self._rotate_log()
+            # A shallow copy is enough: later adds and deletes change the
+            # map, not this copy, and replaying a completion is idempotent.
+            snapshot = list(tasks.values())
+            header = {'seq': self.seq, 'next_id': self.next_id, 'stats': self.task_stats.to_dict()}
+            self.pending = 0
+
+        if background:
+            self._compactor = threading.Thread(
+                target=self._write_snapshot, args=(snapshot, header), daemon=True
+            )
+            self._compactor.start()
+        else:
+            self._write_snapshot(snapshot, header)
+
+    def _rotate_log(self):
+        """Move the live log aside so new records start a fresh file"""
+        if not os.path.exists(self.log_filename):
+            return
+        if os.path.exists(self.old_log_filename):
+            # An earlier compaction never finished; keep its records
+            with open(self.log_filename, 'r') as source, open(self.old_log_filename, 'a') as target:
+                target.write(source.read())
+            os.remove(self.log_filename)
+        else:
+            os.replace(self.log_filename, self.old_log_filename)
+
+    def _write_snapshot(self, tasks, header):
+        """Write the snapshot file and drop the log it replaces"""
+        atomic_write_json(self.filename, dict(header, tasks=tasks))
+        if os.path.exists(self.old_log_filename):
+            os.remove(self.old_log_filename)
+
+    def wait(self):
+        """Block until a running background compaction has finished"""
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+
+    def close(self):
+        """Finish compaction and close the log"""
+        self.wait()
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def fingerprint(self):
+        """Fingerprint of the files backing this store"""
+        return file_fingerprint(self.filename, self.log_filename, self.old_log_filename)
+
+    def stats(self):
+        """Write counters for reporting"""
+        return {'seq': self.seq, 'pending_log_records': self.pending}
+
+
+TASK_COLUMNS = (
+    'id', 'title', 'description', 'category', 'priority',
+    'due_date', 'completed', 'created_date', 'completed_date', 'recurrence', 'remind'
+)
+# Columns added after the first schema, with ALTER TABLE on older databases
+OPTIONAL_COLUMNS = ('recurrence', 'remind')
+
+PRIORITY_LEVELS = ("High", "Medium", "Low")
+
+
+# Matches the YYYY-MM-DD due dates the date range queries compare as text
+ISO_DATE_GLOB = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]"
+
+
+def convert_json_to_journal(json_filename, journal_filename):
+    """Start a journal snapshot from a tasks.json file
+
+    Older versions kept the journal in tasks.json itself, with its log in
+    tasks.json.log; such a file has a seq in its header and its log is
+    replayed into the new snapshot.  A file last written by the json
+    backend has no seq, so a log lying next to it is older than the file
+    and is ignored.
+    """
+    tasks, header = read_tasks_file(json_filename)
+    if 'seq' in header:
+        old_journal = JournalStore(json_filename)
+        tasks = old_journal.load()
+        next_id = old_journal.next_id
+    else:
+        next_id, _ = repair_task_ids(tasks, header.get('next_id', 1))
+    atomic_write_json(journal_filename, {
+        'seq': 0, 'next_id': next_id, 'stats': TaskStats.from_tasks(tasks).to_dict(), 'tasks': tasks
+    })
+    return len(tasks)
+
+
+class SqliteStore:
+    """SQLite storage with indexes on category, priority, due date and status
+
+    The manager does not keep a task list for this store; every view is
+    answered by an indexed query that streams rows from the database.
+    """
+
+    indexed = True
+
+    def __init__(self, filename="tasks.db", migrate_from=None, notify=None):
+        self.filename = filename
+        self.notify = notify
+        self.conn = sqlite3.connect(filename, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._create_schema()
+        self.task_stats = self._load_stats()
+        if migrate_from and os.path.exists(migrate_from) and self._never_written():
+            migrated = self.migrate_from_json(migrate_from)
+            if notify:
+                notify(f"📦 Migrated {migrated} tasks from {migrate_from} to {filename}")
+
+    def _create_schema(self):
+        """Create the tasks table and its indexes"""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(tasks)")}
+        for column in OPTIONAL_COLUMNS:
+            if columns and column not in columns:
+                with self.conn:
+                    self.conn.execute(f"ALTER TABLE tasks ADD COLUMN {column} TEXT")
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id INTEGER PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    description TEXT NOT NULL DEFAULT '',
+                    category TEXT NOT NULL,
+                    priority TEXT NOT NULL,
+                    due_date TEXT NOT NULL,
+                    completed INTEGER NOT NULL DEFAULT 0,
+                    created_date TEXT,
+                    completed_date TEXT,
+                    recurrence TEXT,
+                    remind TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_tasks_category ON tasks(category);
+                CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority);
+                CREATE INDEX IF NOT EXISTS idx_tasks_category_nocase ON tasks(category COLLATE NOCASE);
+                CREATE INDEX IF NOT EXISTS idx_tasks_priority_nocase ON tasks(priority COLLATE NOCASE);
+                CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks(due_date);
+                CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks(completed);
+                CREATE INDEX IF NOT EXISTS idx_tasks_recurring ON tasks(id)
+                    WHERE recurrence IS NOT NULL AND completed = 0;
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS stats (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    data TEXT NOT NULL
+                );
+            """)
+
+    def _load_stats(self):
+        """Read the saved statistics row, counting from scratch if it is missing"""
+        row = self.conn.execute("SELECT data FROM stats WHERE id = 1").fetchone()
+        if row is not None:
+            return TaskStats.from_dict(json.loads(row[0]))
+        with self.conn:
+            # Count under the write lock so another process cannot insert in between
+            self.conn.execute("BEGIN IMMEDIATE")
+            row = self.conn.execute("SELECT data FROM stats WHERE id = 1").fetchone()
+            if row is not None:
+                return TaskStats.from_dict(json.loads(row[0]))
+            total, completed = self.count_tasks()
+            stats = TaskStats(total, completed, self.category_counts(), self.priority_counts())
+            self._save_stats(stats)
+        return stats
+
+    def _save_stats(self, stats=None):
+        """Write the statistics row (call inside the mutation's transaction)"""
+        stats = stats or self.task_stats
+        self.conn.execute(
+            "INSERT OR REPLACE INTO stats (id, data) VALUES (1, ?)", (json.dumps(stats.to_dict()),)
+        )
+
+    def _never_written(self):
+        """True for a database nothing was migrated or written into yet
+
+        An empty database that was written before (every task deleted or
+        archived) must not import the JSON file again.
+        """
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM meta WHERE key IN ('migrated', 'next_id')"
+        ).fetchone()[0] == 0 and self.task_stats.total == 0
+
+    def migrate_from_json(self, json_filename):
+        """Copy the tasks of a JSON file into the database in one transaction
+
+        Duplicate ids from older files are renumbered on the way in.
+        """
+        tasks, header = read_tasks_file(json_filename)
+        next_id, _ = repair_task_ids(tasks, header.get('next_id', 1))
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO tasks ({', '.join(TASK_COLUMNS)}) VALUES ({', '.join('?' * len(TASK_COLUMNS))})",
+                (self._to_row(task) for task in tasks)
+            )
+            self._set_next_id(next_id)
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated', 1)")
+            self.task_stats = TaskStats.from_tasks(tasks)
+            self._save_stats()
+        return len(tasks)
+
+    @staticmethod
+    def _to_row(task):
+        """Convert a task dict into a row tuple in TASK_COLUMNS order"""
+        return (
+            task.get('id'), task['title'], task.get('description', ''),
+            task['category'], task['priority'], task['due_date'],
+            1 if task['completed'] else 0,
+            task.get('created_date'), task.get('completed_date'), task.get('recurrence'), task.get('remind')
+        )
+
+    @staticmethod
+    def _to_task(row):
+        """Convert a database row into a Task"""
+        task = dict(row)
+        task['completed'] = bool(task['completed'])
+        for column in OPTIONAL_COLUMNS:
+            if task[column] is None:
+                del task[column]
+        return Task.from_dict(task)
+
+    def _query(self, sql, params=()):
+        """Stream query results as task dicts"""
+        for row in self.conn.execute(sql, params):
+            yield self._to_task(row)
+
+    def load(self):
+        """Return every task (the manager does not need this for SQLite)"""
+        return list(self.iter_tasks())
+
+    def save(self, tasks):
+        """Changes are committed as they happen"""
+        self.conn.commit()
+
+    def _set_next_id(self, next_id):
+        """Remember the id allocator position"""
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('next_id', ?)", (next_id,))
+
+    def _next_id(self):
+        """Read the id allocator position"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()
+        if row is None:
+            (max_id,) = self.conn.execute("SELECT MAX(id) FROM tasks").fetchone()
+            return (max_id or 0) + 1
+        return row[0]
+
+    def _begin_write(self):
+        """Start a transaction holding SQLite's write lock
+
+        Other processes may share the database, so the statistics row is
+        re-read once no one else can change it.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.reload_stats()
+
+    def reload_stats(self):
+        """Re-read the statistics row, e.g. after another process committed"""
+        row = self.conn.execute("SELECT data FROM stats WHERE id = 1").fetchone()
+        if row is not None:
+            self.task_stats = TaskStats.from_dict(json.loads(row[0]))
+
+    def allocate_id(self):
+        """Hand out the next task id (ids are never reused)"""
+        with self.conn:
+            self._begin_write()
+            task_id = self._next_id()
+            self._set_next_id(task_id + 1)
+        return task_id
+
+    def get_task(self, task_id):
+        """Look a task up by id, or return None"""
+        for task in self._query("SELECT * FROM tasks WHERE id = ?", (task_id,)):
+            return task
+        return None
+
+    def record_add(self, tasks, task):
+        """Insert a new task"""
+        with self.conn:
+            self._begin_write()
+            self.conn.execute(
+                f"INSERT INTO tasks ({', '.join(TASK_COLUMNS)}) VALUES ({', '.join('?' * len(TASK_COLUMNS))})",
+                self._to_row(task)
+            )
+            self.task_stats.add(task)
+            self._save_stats()
+
+    def record_bulk_add(self, tasks, new_tasks):
+        """Insert a stream of new tasks in a single transaction
+
+        Tasks without an id are numbered here, so a large import is one
+        executemany and one commit rather than a commit per task.
+        """
+        added = 0
+
+        def rows():
+            nonlocal next_id, added
+            for task in new_tasks:
+                if task.get('id') is None:
+                    task['id'] = next_id
+                next_id = max(next_id, task['id'] + 1)
+                stats.add(task)
+                added += 1
+                yield self._to_row(task)
+
+        with self.conn:
+            self._begin_write()
+            stats = TaskStats.from_dict(self.task_stats.to_dict())
+            next_id = self._next_id()
+            self.conn.executemany(
+                f"INSERT INTO tasks ({', '.join(TASK_COLUMNS)}) VALUES ({', '.join('?' * len(TASK_COLUMNS))})",
+                rows()
+            )
+            self._set_next_id(next_id)
+            self._save_stats(stats)
+        self.task_stats = stats
+        return added
+
+    def record_complete(self, tasks, task):
+        """Mark a task completed (counted once even if another process raced us)"""
+        with self.conn:
+            self._begin_write()
+            updated = self.conn.execute(
+                "UPDATE tasks SET completed = 1, completed_date = ? WHERE id = ? AND completed = 0",
+                (task['completed_date'], task['id'])
+            ).rowcount
+            if updated:
+                self.task_stats.complete(task)
+                self._save_stats()
+
+    def record_delete(self, tasks, task):
+        """Delete a task, counting it as it is now stored"""
+        with self.conn:
+            self._begin_write()
+            stored = self.get_task(task['id'])
+            if stored is not None:
+                self.conn.execute("DELETE FROM tasks WHERE id = ?", (task['id'],))
+                self.task_stats.remove(stored)
+                self._save_stats()
+
+    def record_bulk_delete(self, tasks, removed):
+        """Delete a batch of tasks in a single transaction; returns how many were still stored"""
+        deleted = 0
+        with self.conn:
+            self._begin_write()
+            for task in removed:
+                stored = self.get_task(task['id'])
+                if stored is not None:
+                    self.conn.execute("DELETE FROM tasks WHERE id = ?", (task['id'],))
+                    self.task_stats.remove(stored)
+                    deleted += 1
+            self._save_stats()
+        return deleted
+
+    def iter_recurring(self):
+        """Stream pending repeating tasks (uses the partial index)"""
+        return self._query("SELECT * FROM tasks WHERE recurrence IS NOT NULL AND completed = 0 ORDER BY id")
+
+    def iter_completed_before(self, timestamp):
+        """Stream completed tasks whose completed_date sorts before timestamp"""
+        return self._query(
+            "SELECT * FROM tasks WHERE completed = 1 AND completed_date < ? ORDER BY id", (timestamp,)
+        )
+
+    def count_tasks(self):
+        """Return (total, completed)"""
+        total, completed = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(completed), 0) FROM tasks"
+        ).fetchone()
+        return total, completed
+
+    def iter_tasks(self):
+        """Stream all tasks"""
+        return self._query("SELECT * FROM tasks ORDER BY id")
+
+    def iter_pending(self):
+        """Stream tasks that are not completed"""
+        return self._query("SELECT * FROM tasks WHERE completed = 0 ORDER BY id")
+
+    def iter_by_category(self):
+        """Stream tasks ordered by category"""
+        return self._query("SELECT * FROM tasks ORDER BY category, id")
+
+    def iter_by_priority(self):
+        """Stream tasks ordered High, Medium, Low"""
+        for priority in PRIORITY_LEVELS:
+            yield from self._query("SELECT * FROM tasks WHERE priority = ? ORDER BY id", (priority,))
+
+    def iter_due_between(self, start, end):
+        """Stream tasks due between two dates (inclusive, None = open ended)"""
+        # ISO dates sort as text; the range excludes the "No due date" marker,
+        # and the GLOB legacy dates such as 2026/10/20 that sort inside it
+        low = start.isoformat() if start else "0000-01-01"
+        high = end.isoformat() if end else "9999-12-31"
+        return self._query(
+            f"SELECT * FROM tasks WHERE due_date BETWEEN ? AND ? AND due_date GLOB '{ISO_DATE_GLOB}'"
+            " ORDER BY due_date, id", (low, high)
+        )
+
+    def iter_bucket(self, field, value):
+        """Stream the tasks with one category or priority, in any case (uses the column index)"""
+        if field not in ('category', 'priority'):
+            raise ValueError(f"No index on '{field}'")
+        return self._query(f"SELECT * FROM tasks WHERE {field} = ? COLLATE NOCASE ORDER BY id", (value,))
+
+    def count_due_between(self, start, end):
+        """Count tasks due between two dates with the due date index"""
+        low = start.isoformat() if start else "0000-01-01"
+        high = end.isoformat() if end else "9999-12-31"
+        return self.conn.execute(
+            f"SELECT COUNT(*) FROM tasks WHERE due_date BETWEEN ? AND ? AND due_date GLOB '{ISO_DATE_GLOB}'",
+            (low, high)
+        ).fetchone()[0]
+
+    def data_version(self):
+        """Number that changes whenever another connection commits to the database"""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def iter_matching(self, query, limit=None):
+        """Tasks matching a search query, best match first (see task_search.parse_query)
+
+        LIKE narrows the rows down to those containing every word of a
+        group anywhere; they are then matched on word prefixes and ranked
+        exactly as the in-memory SearchIndex does.
+        """
+        groups = parse_query(query)
+        if not groups:
+            return iter(())
+        clauses, params = [], []
+        for terms in groups:
+            term_clauses = []
+            for term in terms:
+                if not term.isascii():
+                    # LIKE only ignores the case of ASCII letters: leave this word to score_task
+                    continue
+                pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                term_clauses.append("(title LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\')")
+                params.extend((pattern, pattern))
+            clauses.append("(" + (" AND ".join(term_clauses) or "1") + ")")
+        scored = []
+        for task in self._query(f"SELECT * FROM tasks WHERE {' OR '.join(clauses)}", params):
+            score = score_task(task, groups)
+            if score:
+                # Ids are unique, so the tuples never compare the tasks themselves
+                scored.append((-score, task['id'], task))
+        ranked = sorted(scored) if limit is None else heapq.nsmallest(limit, scored)
+        return iter([task for _, _, task in ranked])
+
+    def category_counts(self):
+        """Return {category: task count}"""
+        return dict(self.conn.execute(
+            "SELECT category, COUNT(*) FROM tasks GROUP BY category"
+        ).fetchall())
+
+    def priority_counts(self):
+        """Return {priority: task count}"""
+        return dict(self.conn.execute(
+            "SELECT priority, COUNT(*) FROM tasks GROUP BY priority"
+        ).fetchall())
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+
+    def stats(self):
+        """Write counters for reporting"""
+        return {}
+
+
+# Backends whose file replaces a .json filename's extension
+BACKEND_SUFFIXES = {'ndjson': ".ndjson", 'journal': ".journal.json", 'sqlite': ".db"}
+
+STORES = {
+    'json': JsonFileStore,
+    'ndjson': NdjsonStore,
+    'journal': JournalStore,
+    'sqlite': SqliteStore,
+}
+
+
+def store_filename(filename, backend):
+    """The file a backend keeps tasks in when given filename"""
+    if backend in BACKEND_SUFFIXES and filename.endswith(".json") and not filename.endswith(BACKEND_SUFFIXES[backend]):
+        return filename[:-len(".json")] + BACKEND_SUFFIXES[backend]
+    return filename
+
+
+def open_store(filename="tasks.json", backend="json", **options):
+    """Create the storage backend registered under the given name
+
+    For the sqlite, ndjson and journal backends a .json filename is swapped
+    for a .db/.ndjson/.journal.json file, and the JSON file is converted
+    into it the first time, so no backend ever writes another one's file.
+    Every store takes notify, a callable receiving one-line notices such as
+    conversions and quarantined files (None, the default, stays silent).
+    """
+    if backend not in STORES:
+        raise ValueError(f"Unknown storage backend '{backend}'")
+    if backend == 'ndjson' and filename.endswith(".json"):
+        json_filename, filename = filename, store_filename(filename, backend)
+        if os.path.exists(json_filename) and not os.path.exists(filename):
+            converted = convert_json_to_ndjson(json_filename, filename)
+            if options.get('notify'):
+                options['notify'](f"📦 Converted {converted} tasks from {json_filename} to {filename}")
+    if backend == 'journal' and filename != store_filename(filename, backend):
+        json_filename, filename = filename, store_filename(filename, backend)
+        if os.path.exists(json_filename) and not os.path.exists(filename) and not os.path.exists(filename + ".log"):
+            converted = convert_json_to_journal(json_filename, filename)
+            if options.get('notify'):
+                options['notify'](f"📦 Converted {converted} tasks from {json_filename} to {filename}")
+    if backend == 'sqlite' and filename.endswith(".json"):
+        options.setdefault('migrate_from', filename)
+        filename = store_filename(filename, backend)
+    return STORES[backend](filename, **options)
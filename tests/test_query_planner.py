@@ -0,0 +1,53 @@
+"""
+The query planner must return exactly what a full scan with the same filter returns
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_engine import TaskEngine
+from task_query import TaskFilter
+from task_storage import open_store
+
+# The same category and priority stored in several spellings, as an import can leave them
+TASKS = [
+    ("report", "Work", "High"), ("standup", "work", "high"), ("deploy", "WORK", "Medium"),
+    ("groceries", "Personal", "Low"), ("gym", "personal", "HIGH"), ("invoice", "Work", "low"),
+]
+
+
+class MixedCaseBucketTest(unittest.TestCase):
+
+    def check_backend(self, backend):
+        with tempfile.TemporaryDirectory() as directory:
+            engine = TaskEngine(open_store(os.path.join(directory, "tasks.json"), backend),
+                                lazy=False, background=False)
+            engine.import_tasks({
+                'title': title, 'description': "", 'category': category, 'priority': priority,
+                'due_date': "No due date", 'completed': False, 'created_date': None, 'completed_date': None,
+            } for title, category, priority in TASKS)
+            for task_filter in (TaskFilter(category="work"), TaskFilter(category="Personal"),
+                                TaskFilter(priority="High"), TaskFilter(priority="Low", category="WORK")):
+                with self.subTest(backend=backend, filter=vars(task_filter)):
+                    source, estimate, _ = engine.plan(task_filter)
+                    planned = [task['id'] for task in engine.find(task_filter)]
+                    scanned = [task['id'] for task in engine.iter_tasks() if task_filter.matches(task)]
+                    self.assertNotEqual(source, 'all')
+                    self.assertEqual(planned, scanned)
+                    self.assertGreaterEqual(estimate, len(scanned))
+            self.assertEqual(engine.plan(TaskFilter(category="work"))[1], 4)
+            engine.close()
+
+    def test_json(self):
+        self.check_backend("json")
+
+    def test_sqlite(self):
+        self.check_backend("sqlite")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+Engines sharing one SQLite database must see each other's changes
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_engine import TaskEngine
+from task_query import TaskFilter
+from task_storage import open_store
+
+
+class SqliteRefreshTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        filename = os.path.join(self.directory.name, "tasks.json")
+        self.writer = TaskEngine(open_store(filename, "sqlite"), background=False)
+        self.reader = TaskEngine(open_store(filename, "sqlite"), background=False)
+
+    def tearDown(self):
+        self.writer.close()
+        self.reader.close()
+        self.directory.cleanup()
+
+    def test_stats_follow_other_engine(self):
+        self.assertEqual(self.reader.count(), (0, 0))
+        first = self.writer.add("report", category="Work", priority="High")
+        self.writer.add("groceries", category="Personal", priority="Low")
+        self.writer.complete(first['id'])
+
+        self.assertEqual(self.reader.count(), (2, 1))
+        stats = self.reader.stats()
+        self.assertEqual(stats.by_category, {'Work': 1, 'Personal': 1})
+        self.assertEqual(stats.by_priority, {'High': 1, 'Low': 1})
+
+    def test_plan_uses_fresh_counts(self):
+        self.reader.count()
+        for title in ("report", "standup", "deploy"):
+            self.writer.add(title, category="Work")
+        _, estimate, _ = self.reader.plan(TaskFilter(category="Work"))
+        self.assertEqual(estimate, 3)
+        self.assertEqual(len(list(self.reader.find(TaskFilter(category="Work")))), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()